@@ -0,0 +1,79 @@
+"""
+Serialization benchmark of OutilModelSerializer lists: rest_framework read path vs compiled_read.
+
+usage: PYTHONPATH=. python benchmarks/bench_compiled_serializer.py [--rows 20000] [--repeat 5]
+
+Instances are not saved (no database needed), serializers render model columns and a foreign key id.
+"""
+import argparse
+import datetime as dt
+import time
+import uuid
+
+import django
+from django.conf import settings
+
+settings.configure(INSTALLED_APPS=["django.contrib.contenttypes", "django.contrib.auth"])
+django.setup()
+
+from django.db import models  # noqa: E402
+
+from odjango.django import NullableCharField, NullableTextField  # noqa: E402
+from odjango.rest_framework import OutilModelSerializer  # noqa: E402
+
+
+class BenchSample(models.Model):
+    name = models.CharField(max_length=50)
+    code = NullableCharField(max_length=50, blank=True)
+    description = NullableTextField(blank=True)
+    count = models.IntegerField()
+    ratio = models.FloatField()
+    ref = models.UUIDField(default=uuid.uuid4)
+    created = models.DateTimeField()
+    parent = models.ForeignKey("self", null=True, on_delete=models.CASCADE)
+
+    class Meta:
+        app_label = "auth"
+
+
+class DRFSerializer(OutilModelSerializer):
+    class Meta:
+        model = BenchSample
+        fields = "__all__"
+
+
+class CompiledSerializer(DRFSerializer):
+    compiled_read = True
+
+
+def measure(serializer_class, instances, repeat):
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        serializer_class(instances, many=True).data
+        durations.append(time.perf_counter() - start)
+    return min(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    now = dt.datetime(2021, 1, 1)
+    instances = [
+        BenchSample(id=i, name="name %d" % i, code="" if i % 2 else "c%d" % i, description="d" * 100, count=i,
+                    ratio=i / 3, created=now, parent_id=i // 2 or None)
+        for i in range(1, args.rows + 1)
+    ]
+    assert DRFSerializer(instances[:100], many=True).data == CompiledSerializer(instances[:100], many=True).data
+
+    reference = measure(DRFSerializer, instances, args.repeat)
+    compiled = measure(CompiledSerializer, instances, args.repeat)
+    print("rest_framework %8.1f ms" % (reference * 1000))
+    print("compiled       %8.1f ms  (x%.1f)" % (compiled * 1000, reference / compiled))
+
+
+if __name__ == "__main__":
+    main()
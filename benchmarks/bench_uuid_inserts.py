@@ -0,0 +1,78 @@
+"""
+Insert benchmark of random (uuid4) vs time-ordered (uuid7) uuid primary keys, on a local postgres.
+
+usage: PYTHONPATH=. python benchmarks/bench_uuid_inserts.py [--dsn "dbname=bench"] [--rows 1000000] [--batch 1000]
+
+Each run creates a table with a uuid primary key, inserts rows by batches (one transaction per batch, like a write
+heavy application), and reports insert rate, final primary key index size and leaf pages density.
+"""
+import argparse
+import time
+import uuid
+
+import django
+import psycopg2
+from django.conf import settings
+from psycopg2.extras import execute_values
+
+settings.configure(INSTALLED_APPS=["django.contrib.contenttypes", "django.contrib.auth"])
+django.setup()
+
+from odjango.django.util import uuid7  # noqa: E402
+
+TABLE = "odjango_bench_uuid"
+
+
+def run(connection, name, generate, rows_nb, batch_size):
+    with connection.cursor() as cursor:
+        cursor.execute("DROP TABLE IF EXISTS %s" % TABLE)
+        cursor.execute("CREATE TABLE %s (id uuid PRIMARY KEY, created timestamptz DEFAULT now(), payload text)" % TABLE)
+        connection.commit()
+
+        start = time.perf_counter()
+        for _ in range(rows_nb // batch_size):
+            execute_values(
+                cursor,
+                "INSERT INTO %s (id, payload) VALUES %%s" % TABLE,
+                [(str(generate()), "x" * 50) for _ in range(batch_size)]
+            )
+            connection.commit()
+        duration = time.perf_counter() - start
+
+        cursor.execute("SELECT pg_relation_size('%s_pkey')" % TABLE)
+        index_size, = cursor.fetchone()
+        try:
+            cursor.execute("CREATE EXTENSION IF NOT EXISTS pgstattuple")
+            cursor.execute("SELECT avg_leaf_density FROM pgstatindex('%s_pkey')" % TABLE)
+            leaf_density, = cursor.fetchone()
+        except psycopg2.Error:
+            connection.rollback()
+            leaf_density = None
+        cursor.execute("DROP TABLE %s" % TABLE)
+        connection.commit()
+
+    print("%-6s %10.0f rows/s  index %8.1f MB  leaf density %s" % (
+        name,
+        rows_nb / duration,
+        index_size / 1024 ** 2,
+        "?" if leaf_density is None else "%.1f%%" % leaf_density
+    ))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dsn", default="dbname=postgres")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--batch", type=int, default=1000)
+    args = parser.parse_args()
+
+    connection = psycopg2.connect(args.dsn)
+    try:
+        for name, generate in (("uuid4", uuid.uuid4), ("uuid7", uuid7)):
+            run(connection, name, generate, args.rows, args.batch)
+    finally:
+        connection.close()
+
+
+if __name__ == "__main__":
+    main()
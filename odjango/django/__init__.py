@@ -1,6 +1,50 @@
-from .fields import NullableCharField, NullableTextField, ScriptField
-from .util import UUIDModel, reset_db, respond_file_from_bytes, respond_file_from_local_file
-from .fixtures import disable_for_loaddata
-from .validators import validate_timezone, validate_timezone_allow_none, validate_freq
-from .paths import build_absolute_path, build_base_path
-from .postgresql import PostgresqlDatabaseRetry
+"""
+Public api is resolved lazily (first attribute access imports its module), so that importing odjango.django doesn't
+import heavy dependencies (pandas, psycopg2, contenttypes...).
+"""
+import importlib
+
+# name: module
+_LAZY_ATTRIBUTES = dict(
+    NullableCharField="fields",
+    NullableTextField="fields",
+    ScriptField="fields",
+    CompressedScriptField="fields",
+    UUIDModel="util",
+    OrderedUUIDModel="util",
+    uuid7="util",
+    reset_db="util",
+    respond_file_from_bytes="util",
+    respond_file_from_local_file="util",
+    respond_stream_from_local_file="util",
+    disable_for_loaddata="fixtures",
+    load_fixtures="fixtures",
+    signals_suppressed="fixtures",
+    validate_timezone="validators",
+    validate_timezone_allow_none="validators",
+    validate_freq="validators",
+    validate_timezones="validators",
+    validate_freqs="validators",
+    build_absolute_path="paths",
+    build_base_path="paths",
+    PostgresqlDatabaseRetry="postgresql",
+    snapshot_db="snapshots",
+    restore_db="snapshots",
+    restore_or_snapshot_db="snapshots",
+    get_snapshot_key="snapshots"
+)
+
+__all__ = list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError("module '%s' has no attribute '%s'" % (__name__, name))
+    value = getattr(importlib.import_module("." + module_name, __name__), name)
+    globals()[name] = value  # next accesses don't go through __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()).union(_LAZY_ATTRIBUTES))
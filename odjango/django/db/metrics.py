@@ -0,0 +1,141 @@
+"""
+In-process metrics of the database layer (psycopg2_retries backend, PostgresqlDatabaseRetry).
+
+Metrics
+-------
+odjango_db_retries_total (counter; alias, error): retried errors, by error class
+odjango_db_retries_given_up_total (counter; alias, reason): errors that were not retried (max_attempts, deadline,
+    budget, circuit_open)
+odjango_db_retry_sleep_seconds (histogram; alias): backoff time slept before retries
+odjango_db_reconnects_total (counter; alias): reconnections performed by retry machinery
+odjango_db_connect_seconds (histogram; alias): connection establishment latency
+odjango_db_statement_seconds (histogram; alias): statements latency (including retries)
+odjango_db_pre_pings_total (counter; alias, result): liveness checks of idle connections (result: alive, dead)
+
+Export
+------
+registry.render_prometheus(): text exposition format (for example returned by a django view)
+registry.export(callback): callback(name, kind, labels, value) is called for each sample (kind: counter, histogram)
+"""
+import bisect
+import threading
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _format_labels(labels):
+    if len(labels) == 0:
+        return ""
+    return "{%s}" % ",".join('%s="%s"' % (k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+                             for k, v in labels)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, value=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def get(self, **labels):
+        return self._values.get(tuple(sorted(labels.items())), 0)
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for labels, value in values.items():
+            yield self.name, labels, value
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, documentation, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self._values = {}  # labels: [bucket counts..., +Inf count], sum
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(key, (None, 0))
+            if counts is None:
+                counts = [0] * (len(self.buckets) + 1)
+            counts[i] += 1
+            self._values[key] = counts, total + value
+
+    def get_count(self, **labels):
+        counts, _ = self._values.get(tuple(sorted(labels.items())), ([0], 0))
+        return sum(counts)
+
+    def get_sum(self, **labels):
+        return self._values.get(tuple(sorted(labels.items())), (None, 0))[1]
+
+    def samples(self):
+        with self._lock:
+            values = {k: (list(counts), total) for k, (counts, total) in self._values.items()}
+        for labels, (counts, total) in values.items():
+            cumulated = 0
+            for bound, count in zip(self.buckets + ("+Inf", ), counts):
+                cumulated += count
+                yield self.name + "_bucket", labels + (("le", bound), ), cumulated
+            yield self.name + "_count", labels, cumulated
+            yield self.name + "_sum", labels, total
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, documentation):
+        return self._register(Counter(name, documentation))
+
+    def histogram(self, name, documentation, buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, buckets=buckets))
+
+    def get(self, name):
+        return self._metrics[name]
+
+    def export(self, callback):
+        """
+        callback(name, kind, labels, value) is called for each sample, labels is a dict
+        """
+        for metric in list(self._metrics.values()):
+            for name, labels, value in metric.samples():
+                callback(name, metric.kind, dict(labels), value)
+
+    def render_prometheus(self):
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.append("# HELP %s %s" % (metric.name, metric.documentation))
+            lines.append("# TYPE %s %s" % (metric.name, metric.kind))
+            for name, labels, value in metric.samples():
+                lines.append("%s%s %s" % (name, _format_labels(labels), repr(float(value))))
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+retries_total = registry.counter("odjango_db_retries_total", "Retried database errors.")
+retries_given_up_total = registry.counter(
+    "odjango_db_retries_given_up_total", "Database errors that were not retried anymore.")
+retry_sleep_seconds = registry.histogram("odjango_db_retry_sleep_seconds", "Backoff time slept before retries.")
+reconnects_total = registry.counter("odjango_db_reconnects_total", "Reconnections performed by retry machinery.")
+connect_seconds = registry.histogram("odjango_db_connect_seconds", "Database connection establishment latency.")
+statement_seconds = registry.histogram("odjango_db_statement_seconds", "Database statements latency.")
+pre_pings_total = registry.counter("odjango_db_pre_pings_total", "Liveness checks of idle database connections.")
@@ -1,15 +1,25 @@
 from django.db.backends.postgresql.base import psycopg2_version, PSYCOPG2_VERSION, INETARRAY_OID, INETARRAY,\
     DatabaseWrapper as BaseDatabaseWrapper
 
-from django.db.utils import InterfaceError
-from psycopg2 import InterfaceError as InterfaceErrorPsycopg2, OperationalError as OperationalErrorPsycopg,\
-    DatabaseError as DatabaseErrorPsycopg, IntegrityError as IntegrityErrorPsycopg
-from django import db
+from django.utils.functional import cached_property
+import io
 import logging
 import time
 
+from django.db import connections
+from psycopg2.extensions import TRANSACTION_STATUS_UNKNOWN
+
+from .. import metrics
+from .retries import get_retrier, RETRY_ERRORS
+from .pool import get_pool
+from .prepared import get_statement_cache
+
 logger = logging.getLogger(__name__)
 
+PRE_PING_STATUS = "status"
+PRE_PING_QUERY = "query"
+DEFAULT_PRE_PING = dict(idle_seconds=60, method=PRE_PING_QUERY)
+
 
 class CursorWithRetries:
     def __init__(self, cursor, database, name):
@@ -19,63 +29,175 @@ class CursorWithRetries:
 
     def __getattr__(self, item):
         return getattr(self.cursor, item)
-        
+
+    def _reconnect(self):
+        metrics.reconnects_total.inc(alias=self.db.alias)
+        self.db.close()
+        self.db.connect()
+        self.cursor = self.db.dev_create_cursor(name=self.name, with_wrapper=False)
+
     def execute(self, sql, params=None):
-        for i in range(10):
-            try:
-                if params is None:
-                    return self.cursor.execute(sql)
-                else:
-                    return self.cursor.execute(sql, params)
-            except (db.utils.IntegrityError, IntegrityErrorPsycopg):
-                raise
-            except (db.utils.OperationalError, OperationalErrorPsycopg, InterfaceError, InterfaceErrorPsycopg2,
-                    db.utils.DatabaseError, DatabaseErrorPsycopg):
-                from django.core.exceptions import ObjectDoesNotExist
-                if i == 9:
-                    raise
-                logger.warning("Connection to the db lost, reconnecting and retrying", exc_info=True)
-                # exponential backoff
-                if i != 0:
-                    time.sleep(0.5*(2**i))
-                self.db.close()
-                self.db.connect()
-                self.cursor = self.db.dev_create_cursor(name=self.name, with_wrapper=False)
+        def _execute():
+            if self.name is None:
+                cache = get_statement_cache(self.cursor.connection, self.db.alias, self.db.settings_dict["OPTIONS"])
+                if (cache is not None) and cache.execute(self.cursor, sql, params):
+                    return
+            if params is None:
+                return self.cursor.execute(sql)
+            else:
+                return self.cursor.execute(sql, params)
+        start = time.perf_counter()
+        try:
+            return self.db.retrier.call(_execute, recover=self._reconnect)
+        finally:
+            metrics.statement_seconds.observe(time.perf_counter() - start, alias=self.db.alias)
+
+    def executemany(self, sql, param_list):
+        if not isinstance(param_list, (list, tuple)):
+            # must be replayable
+            param_list = list(param_list)
+        start = time.perf_counter()
+        try:
+            return self.db.retrier.call(lambda: self.cursor.executemany(sql, param_list), recover=self._reconnect)
+        finally:
+            metrics.statement_seconds.observe(time.perf_counter() - start, alias=self.db.alias)
+
+    def _copy_with_retries(self, copy, stream):
+        """
+        stream is rewound before each retry, copy is not retried if stream is not seekable
+        """
+        try:
+            position = stream.tell()
+        except (AttributeError, OSError, io.UnsupportedOperation):
+            return copy()
+
+        def _copy():
+            stream.seek(position)
+            return copy()
+        return self.db.retrier.call(_copy, recover=self._reconnect)
+
+    def copy_from(self, file, table, *args, **kwargs):
+        return self._copy_with_retries(lambda: self.cursor.copy_from(file, table, *args, **kwargs), file)
+
+    def copy_expert(self, sql, file, *args, **kwargs):
+        return self._copy_with_retries(lambda: self.cursor.copy_expert(sql, file, *args, **kwargs), file)
 
 
 class DatabaseWrapper(BaseDatabaseWrapper):
+    """
+    retries configuration: see retries module
+    pool configuration: see pool module
+    prepared statements configuration: see prepared module
+    replica: OPTIONS["primary"] (primary alias) makes connection fail over to primary when replica can't be reached,
+        see routers module
+    pre-ping: OPTIONS["pre_ping"] = dict(idle_seconds=60, method="query"), None to disable. When connection was not
+        used for more than idle_seconds, its liveness is checked before creating a cursor ("status": libpq status, no
+        round trip, "query": SELECT 1), and a dead connection is replaced before user's statement is run
+    """
+    _failover_alias = None
+    _last_used_at = None
+
+    @cached_property
+    def retrier(self):
+        return get_retrier(self.alias, self.settings_dict["OPTIONS"])
+
+    @cached_property
+    def pool(self):
+        return get_pool(self.alias, self.settings_dict["OPTIONS"])
+
+    def get_connection_params(self):
+        if self._failover_alias is not None:
+            return connections[self._failover_alias].get_connection_params()
+        conn_params = super().get_connection_params()
+        conn_params.pop("retries", None)
+        conn_params.pop("pool", None)
+        conn_params.pop("primary", None)
+        conn_params.pop("prepared_statements", None)
+        conn_params.pop("pre_ping", None)
+        return conn_params
+
+    def _get_new_physical_connection(self, conn_params):
+        start = time.perf_counter()
+        connection = super().get_new_connection(conn_params)
+        metrics.connect_seconds.observe(time.perf_counter() - start, alias=self.alias)
+        return connection
+
+    def get_new_connection(self, conn_params):
+        if (self.pool is None) or (self._failover_alias is not None):
+            return self._get_new_physical_connection(conn_params)
+
+        connection = self.pool.acquire(lambda: self._get_new_physical_connection(conn_params))
+        # reused connections: isolation level was set by super().get_new_connection when connection was created
+        self.isolation_level = self.settings_dict["OPTIONS"].get("isolation_level", connection.isolation_level)
+        return connection
+
+    def _close(self):
+        if (self.pool is None) or (self.connection is None) or (self._failover_alias is not None):
+            return super()._close()
+        if self.in_atomic_block:
+            # django keeps self.connection until the end of the atomic block (closed_in_transaction): it must not be
+            # used by other threads
+            self.pool.discard(self.connection)
+            return
+        self.pool.release(self.connection)
+
+    def _is_alive(self, method):
+        if self.connection.closed or (self.connection.get_transaction_status() == TRANSACTION_STATUS_UNKNOWN):
+            return False
+        if method == PRE_PING_QUERY:
+            return self.is_usable()
+        return True
+
+    def _pre_ping(self):
+        """
+        replaces connection if it is dead after having been idle
+        """
+        pre_ping = self.settings_dict["OPTIONS"].get("pre_ping", DEFAULT_PRE_PING)
+        if pre_ping is None:
+            return
+        now = time.monotonic()
+        last_used_at, self._last_used_at = self._last_used_at, now
+        if (last_used_at is None) or (now - last_used_at < pre_ping.get("idle_seconds", 60)):
+            return
+        if (self.connection is None) or self.in_atomic_block:
+            # transaction would be lost anyway
+            return
+        alive = self._is_alive(pre_ping.get("method", PRE_PING_QUERY))
+        metrics.pre_pings_total.inc(alias=self.alias, result="alive" if alive else "dead")
+        if not alive:
+            logger.warning("Idle connection to the db is dead, reconnecting")
+            self.close()
+            self.connect()
+
     def create_cursor(self, name=None):
+        self._pre_ping()
         return self.dev_create_cursor(name=name, with_wrapper=True)
 
     # same function, but return a normal cursor
     def dev_create_cursor(self, name=None, with_wrapper=True):
-        for i in range(10):
-            try:
-                if with_wrapper:
-                    return CursorWithRetries(super().create_cursor(name=name), self, name)
-                else:
-                    return super().create_cursor(name=name)
-            except (InterfaceError, InterfaceErrorPsycopg2, OperationalErrorPsycopg, db.utils.OperationalError,
-                    db.utils.DatabaseError, DatabaseErrorPsycopg):
-                if i == 9:
-                    raise
-                logger.warning("Connection to the db lost, reconnecting and retrying", exc_info=True)
-                # exponential backoff
-                if i != 0:
-                    time.sleep(0.5*(2**i))
-                self.close()
-                self.connect()
+        def _create_cursor():
+            if with_wrapper:
+                return CursorWithRetries(super(DatabaseWrapper, self).create_cursor(name=name), self, name)
+            else:
+                return super(DatabaseWrapper, self).create_cursor(name=name)
+
+        def _reconnect():
+            metrics.reconnects_total.inc(alias=self.alias)
+            self.close()
+            self.connect()
+
+        return self.retrier.call(_create_cursor, recover=_reconnect)
 
     def connect(self):
-        for i in range(10):
-            try:
-                return super().connect()
-            except (InterfaceError, InterfaceErrorPsycopg2, OperationalErrorPsycopg, db.utils.OperationalError,
-                    db.utils.DatabaseError, DatabaseErrorPsycopg):
-                if i == 9:
-                    raise
-                logger.warning("Connection to the db lost, reconnecting and retrying", exc_info=True)
-                # exponential backoff
-                if i != 0:
-                    time.sleep(0.5*(2**i))
-                self.close()
+        self._failover_alias = None
+        self._last_used_at = None
+        try:
+            return self.retrier.call(super().connect, recover=self.close)
+        except RETRY_ERRORS:
+            primary = self.settings_dict["OPTIONS"].get("primary")
+            if primary is None:
+                raise
+            logger.warning("Replica '%s' can't be reached, failing over to primary '%s'", self.alias, primary,
+                           exc_info=True)
+            self._failover_alias = primary
+            return connections[primary].retrier.call(super().connect, recover=self.close)
@@ -0,0 +1,197 @@
+"""
+Bulk loading for the psycopg2_retries backend.
+
+Rows are streamed: at most one batch is held in memory. Each batch is loaded in its own transaction, so a batch that
+failed because the connection was lost is rolled back as a whole and can safely be replayed after reconnection
+(retry machinery of the backend). When called inside an atomic block, batches are not retried (the transaction
+is lost with the connection).
+"""
+import datetime as dt
+import io
+import itertools
+import uuid
+from decimal import Decimal
+
+from django.db import connections, transaction, models
+from django.utils import timezone
+from psycopg2.extensions import Binary
+from psycopg2.extras import execute_values, Json
+
+DEFAULT_BATCH_SIZE = 50000
+DEFAULT_COPY_THRESHOLD = 1000
+
+METHOD_AUTO = "auto"
+METHOD_COPY = "copy"
+METHOD_VALUES = "values"
+
+_COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+# model fields whose database values (lists, dicts, ranges) can't be written in COPY text format
+NO_COPY_FIELD_TYPES = ("ArrayField", "HStoreField", "IntegerRangeField", "BigIntegerRangeField", "DecimalRangeField",
+                       "FloatRangeField", "DateTimeRangeField", "DateRangeField")
+
+
+def _to_copy_text(value):
+    """
+    PostgreSQL COPY text format
+    """
+    if value is None:
+        return "\\N"
+    if isinstance(value, Json):
+        return value.dumps(value.adapted).translate(_COPY_ESCAPES)
+    if isinstance(value, Binary):
+        value = value.adapted
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, str):
+        return value.translate(_COPY_ESCAPES)
+    if isinstance(value, (int, float, Decimal, uuid.UUID)):
+        return str(value)
+    if isinstance(value, (dt.datetime, dt.date, dt.time)):
+        return value.isoformat()
+    if isinstance(value, dt.timedelta):
+        return "%s seconds" % value.total_seconds()
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return "\\\\x" + bytes(value).hex()
+    raise TypeError(
+        "Can't convert value of type '%s' to COPY format, use method='%s'." % (type(value).__name__, METHOD_VALUES))
+
+
+def _batches(rows, batch_size):
+    rows = iter(rows)
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if len(batch) == 0:
+            return
+        yield batch
+
+
+def _model_rows(rows, fields, connection):
+    """
+    converts dicts (keys: field names or attnames) to tuples of database values
+    """
+    now = timezone.now()
+    for row in rows:
+        values = []
+        for field in fields:
+            if field.name in row:
+                value = row[field.name]
+            elif field.attname in row:
+                value = row[field.attname]
+            elif getattr(field, "auto_now", False) or getattr(field, "auto_now_add", False):
+                value = now
+            else:
+                value = field.get_default()
+            values.append(field.get_db_prep_save(value, connection))
+        yield tuple(values)
+
+
+def _to_copy_buffer(batch):
+    """
+    raises TypeError if a value can't be converted (nothing was written yet)
+    """
+    buffer = io.StringIO()
+    for row in batch:
+        buffer.write("\t".join(_to_copy_text(v) for v in row))
+        buffer.write("\n")
+    return buffer
+
+
+def _load_batch_copy(cursor, table, columns, buffer):
+    buffer.seek(0)
+    cursor.copy_expert("COPY %s (%s) FROM STDIN" % (table, ", ".join(columns)), buffer)
+
+
+def _load_batch_values(cursor, table, columns, batch):
+    execute_values(cursor, "INSERT INTO %s (%s) VALUES %%s" % (table, ", ".join(columns)), batch,
+                   page_size=len(batch))
+
+
+def bulk_load(
+        target,
+        rows,
+        columns=None,
+        using="default",
+        method=METHOD_AUTO,
+        batch_size=DEFAULT_BATCH_SIZE,
+        copy_threshold=DEFAULT_COPY_THRESHOLD
+):
+    """
+    Parameters
+    ----------
+    target: model class (rows are dicts, keys are field names or attnames), or table name (rows are tuples)
+    rows: iterable (may be a generator, it is not materialized)
+    columns: table: column names (required); model: field names (default: all concrete fields, except auto fields).
+        Missing dict keys are replaced by field default, auto_now/auto_now_add fields are set to current time.
+    using: database alias
+    method: 'copy' (COPY FROM STDIN), 'values' (INSERT ... VALUES with execute_values, supports all psycopg2
+        adaptable types) or 'auto' ('values' if there are less than copy_threshold rows or values COPY can't encode
+        (lists, dicts, ranges...), 'copy' else)
+    batch_size: number of rows loaded per transaction
+
+    Returns
+    -------
+    number of loaded rows
+
+    No signals are sent and no model validation is performed.
+    """
+    if method not in (METHOD_AUTO, METHOD_COPY, METHOD_VALUES):
+        raise ValueError("Unknown bulk load method: '%s'." % method)
+    connection = connections[using]
+    qn = connection.ops.quote_name
+
+    # prepare target
+    copy_safe = True
+    if isinstance(target, type) and issubclass(target, models.Model):
+        if columns is None:
+            fields = [f for f in target._meta.concrete_fields if not isinstance(f, models.AutoField)]
+        else:
+            fields = [target._meta.get_field(name) for name in columns]
+        no_copy_fields = [f.name for f in fields if f.get_internal_type() in NO_COPY_FIELD_TYPES]
+        copy_safe = len(no_copy_fields) == 0
+        if (method == METHOD_COPY) and not copy_safe:
+            raise ValueError("Fields %s can't be loaded with COPY, use method='%s'." % (
+                ", ".join(no_copy_fields), METHOD_VALUES))
+        table = qn(target._meta.db_table)
+        db_columns = [qn(f.column) for f in fields]
+        rows = _model_rows(rows, fields, connection)
+    else:
+        if columns is None:
+            raise ValueError("Columns must be provided when target is a table name.")
+        table = qn(target)
+        db_columns = [qn(c) for c in columns]
+
+    # choose method
+    rows = iter(rows)
+    is_auto = method == METHOD_AUTO
+    if is_auto:
+        head = list(itertools.islice(rows, copy_threshold))
+        method = METHOD_VALUES if (len(head) < copy_threshold) or not copy_safe else METHOD_COPY
+        rows = itertools.chain(head, rows)
+
+    # load
+    loaded_nb = 0
+    for batch in _batches(rows, batch_size):
+        load, data = _load_batch_values, batch
+        if method == METHOD_COPY:
+            try:
+                load, data = _load_batch_copy, _to_copy_buffer(batch)
+            except TypeError:
+                # table rows with values COPY can't encode: raised before batch is written (previous batches are)
+                if not is_auto:
+                    raise
+                method = METHOD_VALUES
+
+        def _load():
+            connection.ensure_connection()
+            with transaction.atomic(using=using):
+                with connection.connection.cursor() as cursor:
+                    load(cursor, table, db_columns, data)
+
+        if connection.in_atomic_block:
+            _load()
+        else:
+            connection.retrier.call(_load, recover=connection.close)
+        loaded_nb += len(batch)
+
+    return loaded_nb
@@ -0,0 +1,301 @@
+"""
+Optional in-process connection pool of the psycopg2_retries backend.
+
+Enabled by DATABASES[alias]["OPTIONS"]["pool"] (dict, all keys are optional):
+    min_size: number of idle connections that are never closed for idleness (default 0)
+    max_size: max number of connections (idle + in use) of the process (default 10)
+    timeout: seconds to wait for a connection when max_size is reached, PoolTimeoutError is then raised (default 10)
+    idle_timeout: seconds, idle connections above min_size are closed after this time (default 300)
+    max_lifetime: seconds, connections are closed (instead of being reused) after this time (default 3600)
+    reset: "rollback" (default, rollbacks pending transaction if any) or "discard_all" (also runs DISCARD ALL to
+        drop session state: temporary tables, prepared statements, settings...)
+    health_check: "status" (default, libpq status, no round trip), "query" (SELECT 1) or None; run on connections
+        taken from the pool
+
+Django's connection lifecycle (CONN_MAX_AGE, close after errors) then gives connections back to the pool instead of
+closing them. Pool is independent from django: connections are created by the connection factory given to
+acquire (may be a stub in tests).
+"""
+import collections
+import threading
+import time
+import logging
+
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_UNKNOWN
+
+from .retries import FailFastError
+from .prepared import clear_statement_cache
+
+logger = logging.getLogger(__name__)
+
+RESET_ROLLBACK = "rollback"
+RESET_DISCARD_ALL = "discard_all"
+HEALTH_CHECK_STATUS = "status"
+HEALTH_CHECK_QUERY = "query"
+
+
+class PoolTimeoutError(FailFastError):
+    pass
+
+
+_PooledConnection = collections.namedtuple("_PooledConnection", ("connection", "created_at", "released_at"))
+
+
+class ConnectionPool:
+    def __init__(
+            self,
+            min_size=0,
+            max_size=10,
+            timeout=10,
+            idle_timeout=300,
+            max_lifetime=3600,
+            reset=RESET_ROLLBACK,
+            health_check=HEALTH_CHECK_STATUS
+    ):
+        if reset not in (RESET_ROLLBACK, RESET_DISCARD_ALL):
+            raise ValueError("Unknown pool reset: '%s'." % reset)
+        if health_check not in (HEALTH_CHECK_STATUS, HEALTH_CHECK_QUERY, None):
+            raise ValueError("Unknown pool health check: '%s'." % health_check)
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.reset = reset
+        self.health_check = health_check
+
+        self._idle = []  # stack: most recently used connections are reused first, others expire
+        self._created_at = {}  # id(connection): created_at, for connections of the pool (idle or in use)
+        self._pending_nb = 0  # connections being created
+        self._condition = threading.Condition()
+        self._stats = collections.Counter()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # internal
+    # ------------------------------------------------------------------------------------------------------------------
+    @property
+    def _size(self):
+        return len(self._created_at) + self._pending_nb
+
+    def _forget(self, connection, reason):
+        """
+        must be called with condition acquired
+        """
+        self._created_at.pop(id(connection), None)
+        self._stats["closed_%s" % reason] += 1
+        self._condition.notify()
+
+    @staticmethod
+    def _close_quietly(connection):
+        try:
+            connection.close()
+        except Exception:
+            logger.debug("Could not close pooled connection", exc_info=True)
+
+    def _is_healthy(self, connection):
+        if connection.closed:
+            return False
+        try:
+            if connection.get_transaction_status() == TRANSACTION_STATUS_UNKNOWN:
+                return False
+            if self.health_check == HEALTH_CHECK_QUERY:
+                with connection.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+        except Exception:
+            return False
+        return True
+
+    def _reset(self, connection):
+        if connection.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+            connection.rollback()
+        if self.reset == RESET_DISCARD_ALL:
+            autocommit = connection.autocommit
+            connection.autocommit = True  # DISCARD ALL can't run in a transaction block
+            with connection.cursor() as cursor:
+                cursor.execute("DISCARD ALL")
+            clear_statement_cache(connection)
+            connection.autocommit = autocommit
+
+    def _pop_idle(self, now):
+        """
+        must be called with condition acquired, returns a reusable idle connection or None
+        closes expired connections (closing is quick on libpq side, it does not wait for the server)
+        """
+        while len(self._idle) > 0:
+            pooled = self._idle.pop()
+            if now - pooled.created_at > self.max_lifetime:
+                self._forget(pooled.connection, "lifetime")
+                self._close_quietly(pooled.connection)
+                continue
+            return pooled
+        return None
+
+    def _prune_idle(self, now):
+        """
+        must be called with condition acquired, closes idle connections above min_size that exceeded idle_timeout
+        (oldest released connections are at the bottom of the stack)
+        """
+        while (len(self._idle) > 0) and (self._size > self.min_size) and \
+                (now - self._idle[0].released_at > self.idle_timeout):
+            pooled = self._idle.pop(0)
+            self._forget(pooled.connection, "idle")
+            self._close_quietly(pooled.connection)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    # api
+    # ------------------------------------------------------------------------------------------------------------------
+    def acquire(self, connection_factory):
+        """
+        Returns an idle connection of the pool, or a new connection created by connection_factory() if none is
+        available. Waits if max_size is reached.
+        """
+        wait_start = time.monotonic()
+        deadline = wait_start + self.timeout
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                self._prune_idle(now)
+                pooled = self._pop_idle(now)
+                if pooled is not None:
+                    break
+                if self._size < self.max_size:
+                    # reserve slot, connection is created outside lock
+                    self._pending_nb += 1
+                    break
+                remaining = deadline - now
+                if remaining <= 0:
+                    self._stats["timeouts"] += 1
+                    raise PoolTimeoutError(
+                        "No database connection available in pool after %ss (max_size: %s)." % (
+                            self.timeout, self.max_size))
+                self._stats["waits"] += 1
+                self._condition.wait(remaining)
+            self._stats["wait_time"] += time.monotonic() - wait_start
+
+        if pooled is not None:
+            if self.health_check is None or self._is_healthy(pooled.connection):
+                with self._condition:
+                    self._stats["hits"] += 1
+                return pooled.connection
+            # unhealthy: replace it
+            with self._condition:
+                self._forget(pooled.connection, "unhealthy")
+                self._pending_nb += 1
+            self._close_quietly(pooled.connection)
+
+        return self._create(connection_factory)
+
+    def _create(self, connection_factory):
+        # ! a slot has been reserved by caller (pending)
+        try:
+            connection = connection_factory()
+        except Exception:
+            with self._condition:
+                self._pending_nb -= 1
+                self._condition.notify()
+            raise
+        with self._condition:
+            self._pending_nb -= 1
+            self._created_at[id(connection)] = time.monotonic()
+            self._stats["misses"] += 1
+        return connection
+
+    def release(self, connection):
+        """
+        Gives connection back to the pool. It is closed instead if it is broken, can't be reset or is too old.
+        """
+        with self._condition:
+            created_at = self._created_at.get(id(connection))
+        if created_at is None:
+            # not a connection of the pool (pool was reset for example)
+            self._close_quietly(connection)
+            return
+
+        now = time.monotonic()
+        reason = None
+        if connection.closed:
+            reason = "broken"
+        elif now - created_at > self.max_lifetime:
+            reason = "lifetime"
+        else:
+            try:
+                self._reset(connection)
+            except Exception:
+                logger.debug("Could not reset pooled connection, closing it", exc_info=True)
+                reason = "broken"
+
+        with self._condition:
+            if reason is None:
+                self._idle.append(_PooledConnection(connection, created_at, now))
+                self._condition.notify()
+            else:
+                self._forget(connection, reason)
+        if reason is not None:
+            self._close_quietly(connection)
+
+    def discard(self, connection):
+        """
+        closes connection instead of giving it back to the pool (it may still be referenced by its user)
+        """
+        with self._condition:
+            if id(connection) in self._created_at:
+                self._forget(connection, "discarded")
+        self._close_quietly(connection)
+
+    def clear(self):
+        """
+        closes all idle connections, in use connections will be closed when released
+        """
+        with self._condition:
+            idle, self._idle = self._idle, []
+            for pooled in idle:
+                self._forget(pooled.connection, "cleared")
+        for pooled in idle:
+            self._close_quietly(pooled.connection)
+
+    def get_stats(self):
+        """
+        size: number of connections (idle + in use)
+        idle, in_use: number of idle and in use connections
+        hits: acquisitions served by an idle connection, misses: acquisitions that created a connection
+        waits, wait_time (seconds), timeouts: acquisitions that had to wait because max_size was reached
+        closed_{reason}: number of connections closed, reason: idle, lifetime, unhealthy, broken, cleared, discarded
+        """
+        with self._condition:
+            size = len(self._created_at)
+            stats = dict(
+                size=size,
+                idle=len(self._idle),
+                in_use=size - len(self._idle),
+                min_size=self.min_size,
+                max_size=self.max_size,
+            )
+            for k in ("hits", "misses", "waits", "wait_time", "timeouts"):
+                stats[k] = self._stats[k]
+            stats.update({k: v for k, v in self._stats.items() if k.startswith("closed_")})
+        return stats
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, options):
+    """
+    returns the process-wide pool of given database alias, None if pooling is not enabled
+    """
+    if options.get("pool") is None:
+        return None
+    with _pools_lock:
+        if alias not in _pools:
+            _pools[alias] = ConnectionPool(**options["pool"])
+        return _pools[alias]
+
+
+def get_pools_stats():
+    """
+    returns {alias: stats} of all pools of the process
+    """
+    with _pools_lock:
+        pools = dict(_pools)
+    return {alias: pool.get_stats() for alias, pool in pools.items()}
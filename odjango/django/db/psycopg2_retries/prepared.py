@@ -0,0 +1,170 @@
+"""
+Optional server-side prepared statements cache of the psycopg2_retries backend.
+
+Enabled by DATABASES[alias]["OPTIONS"]["prepared_statements"] (dict, all keys are optional):
+    size: max number of prepared statements per connection, least recently used are deallocated (default 100)
+    threshold: number of executions of a sql text on a connection before it is prepared (default 3)
+
+Once prepared (PREPARE name AS ...), statements are run with EXECUTE name(params), so postgres skips parsing and
+planning (generic plans). Prepared statements belong to a physical connection: caches are attached to psycopg2
+connections and are naturally lost (and statements prepared again) after reconnection.
+
+Only unnamed cursors, SELECT/INSERT/UPDATE/DELETE/WITH statements with positional parameters are prepared. A
+statement that can't be prepared (for example when a parameter type can't be inferred) is never prepared again.
+Statements with string literals or dollar quoting are not prepared: placeholders are rewritten without parsing sql,
+a %s inside a literal would become a server-side parameter. Quoted identifiers (django quotes all of them) are kept.
+
+Hits and misses are counted by odjango_db_prepared_statements_total (see odjango.django.db.metrics).
+"""
+import collections
+import itertools
+import re
+import weakref
+
+from psycopg2 import DatabaseError as DatabaseErrorPsycopg
+
+from .. import metrics
+
+PREPARABLE_PREFIXES = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH")
+UNPREPARABLE_CHARACTERS = ("'", "$")  # string literals, dollar quoting (and existing server-side parameters)
+_PLACEHOLDER_REGEX = re.compile(r"%s|%%")
+_UNPREPARABLE = -1
+
+prepared_statements_total = metrics.registry.counter(
+    "odjango_db_prepared_statements_total",
+    "Prepared statements cache events (result: hit, miss, prepared, evicted, unpreparable).")
+
+_caches = weakref.WeakKeyDictionary()  # psycopg2 connection: StatementCache
+_names = itertools.count()
+
+
+def _to_server_placeholders(sql):
+    """
+    %s -> $1, $2... and %% -> % (sql is not parsed: must not contain string literals)
+
+    Returns
+    -------
+    converted sql, number of parameters
+    """
+    counter = itertools.count(1)
+
+    def _replace(match):
+        if match.group(0) == "%%":
+            return "%"
+        return "$%d" % next(counter)
+
+    converted = _PLACEHOLDER_REGEX.sub(_replace, sql)
+    return converted, next(counter) - 1
+
+
+class StatementCache:
+    def __init__(self, alias, size=100, threshold=3):
+        self.alias = alias
+        self.size = size
+        self.threshold = threshold
+        self._statements = collections.OrderedDict()  # sql: statement name (LRU order)
+        self._seen = collections.OrderedDict()  # sql: executions count or _UNPREPARABLE (LRU order, bounded)
+
+    def _count(self, event):
+        prepared_statements_total.inc(alias=self.alias, result=event)
+
+    def _see(self, sql):
+        count = self._seen.pop(sql, 0)
+        if count != _UNPREPARABLE:
+            count += 1
+        self._seen[sql] = count
+        if len(self._seen) > 10 * self.size:
+            self._seen.popitem(last=False)
+        return count
+
+    @staticmethod
+    def _prepare(cursor, converted_sql, name):
+        in_transaction = not cursor.connection.autocommit
+        if in_transaction:
+            # a failed prepare must not abort current transaction
+            cursor.execute("SAVEPOINT odjango_prepare")
+        try:
+            cursor.execute("PREPARE %s AS %s" % (name, converted_sql))
+        except DatabaseErrorPsycopg:
+            if not in_transaction or cursor.connection.closed:
+                raise
+            cursor.execute("ROLLBACK TO SAVEPOINT odjango_prepare")
+            raise
+        if in_transaction:
+            cursor.execute("RELEASE SAVEPOINT odjango_prepare")
+
+    def _evict(self, cursor):
+        _, name = self._statements.popitem(last=False)
+        cursor.execute("DEALLOCATE %s" % name)
+        self._count("evicted")
+
+    def execute(self, cursor, sql, params):
+        """
+        Returns
+        -------
+        True if statement was executed as a prepared statement, False if caller must execute it normally
+        """
+        # without params, sql is not interpolated by psycopg2 (% are not escaped): not prepared
+        if not isinstance(params, (list, tuple)):
+            return False
+
+        name = self._statements.get(sql)
+        if name is None:
+            if not sql.lstrip()[:6].upper().startswith(PREPARABLE_PREFIXES) or \
+                    any(c in sql for c in UNPREPARABLE_CHARACTERS):
+                return False
+            count = self._see(sql)
+            if (count == _UNPREPARABLE) or (count < self.threshold):
+                self._count("miss")
+                return False
+
+            # prepare
+            converted_sql, params_nb = _to_server_placeholders(sql)
+            if params_nb != len(params):
+                self._seen[sql] = _UNPREPARABLE
+                self._count("unpreparable")
+                return False
+            name = "odjango_%d" % next(_names)
+            if len(self._statements) >= self.size:
+                self._evict(cursor)
+            try:
+                self._prepare(cursor, converted_sql, name)
+            except DatabaseErrorPsycopg:
+                if cursor.connection.closed:
+                    raise
+                self._seen[sql] = _UNPREPARABLE
+                self._count("unpreparable")
+                return False
+            self._statements[sql] = name
+            self._count("prepared")
+        else:
+            self._statements.move_to_end(sql)
+            self._count("hit")
+
+        if len(params) > 0:
+            cursor.execute("EXECUTE %s (%s)" % (name, ", ".join(["%s"] * len(params))), params)
+        else:
+            cursor.execute("EXECUTE %s" % name)
+        return True
+
+
+def get_statement_cache(connection, alias, options):
+    """
+    Returns
+    -------
+    statement cache of given psycopg2 connection, None if prepared statements are not enabled
+    """
+    if options.get("prepared_statements") is None:
+        return None
+    cache = _caches.get(connection)
+    if cache is None:
+        cache = StatementCache(alias, **options["prepared_statements"])
+        _caches[connection] = cache
+    return cache
+
+
+def clear_statement_cache(connection):
+    """
+    must be called when prepared statements of connection were dropped (DISCARD ALL, DEALLOCATE ALL)
+    """
+    _caches.pop(connection, None)
@@ -0,0 +1,50 @@
+"""
+Replica reads context of current request (see routers module).
+
+Doesn't import psycopg2: may be imported by code that runs whatever the database backend (PermissionViewSet).
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_context = ContextVar("odjango_replica_context", default=None)
+
+
+class _ReplicaContext:
+    def __init__(self, user_key, reads_enabled):
+        self.user_key = user_key
+        self.reads_enabled = reads_enabled
+        self.pinned = None  # unknown
+
+
+def get_replica_context():
+    """
+    returns current replica context, None outside replica reads contexts
+    """
+    return _context.get()
+
+
+def start_replica_context(user_key=None, reads_enabled=True):
+    """
+    Parameters
+    ----------
+    user_key: identifies the user for pinning (None: no pinning)
+    reads_enabled: if False, only writes are tracked (pinning), reads go to primary
+
+    Returns
+    -------
+    token that must be given to stop_replica_context
+    """
+    return _context.set(_ReplicaContext(user_key, reads_enabled))
+
+
+def stop_replica_context(token):
+    _context.reset(token)
+
+
+@contextmanager
+def replica_reads(user_key=None, reads_enabled=True):
+    token = start_replica_context(user_key=user_key, reads_enabled=reads_enabled)
+    try:
+        yield
+    finally:
+        stop_replica_context(token)
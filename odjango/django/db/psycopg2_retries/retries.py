@@ -0,0 +1,276 @@
+"""
+Process-wide retry machinery of the psycopg2_retries backend.
+
+Configuration, in DATABASES[alias]["OPTIONS"]["retries"] (all keys are optional):
+    max_attempts: max number of attempts of one operation (default 10)
+    base_delay: seconds, backoff base (default 0.5), retry n sleeps random(0, min(max_delay, base_delay * 2**n))
+    max_delay: seconds, max sleep between two retries (default 10)
+    deadline: seconds, max total time spent retrying one operation (default 30)
+    failure_threshold: consecutive connection failures that open the circuit (default 5)
+    reset_timeout: seconds the circuit stays open before a probe is let through (default 10)
+    retry_budget: max number of retries available at once for the whole process (default 20)
+    retry_budget_refill: retries given back to the budget per second (default 2)
+
+While the circuit of a database is open, operations fail fast with CircuitOpenError. Once reset_timeout is elapsed,
+one caller probes the database (half-open state): on success the circuit is closed, on failure (whatever the error) it
+opens again. A probe that didn't report after reset_timeout is considered lost, and another probe is let through.
+"""
+import logging
+import random
+import threading
+import time
+
+from django import db
+from django.db.utils import InterfaceError
+from psycopg2 import InterfaceError as InterfaceErrorPsycopg2, OperationalError as OperationalErrorPsycopg,\
+    DatabaseError as DatabaseErrorPsycopg, IntegrityError as IntegrityErrorPsycopg,\
+    ProgrammingError as ProgrammingErrorPsycopg, DataError as DataErrorPsycopg,\
+    NotSupportedError as NotSupportedErrorPsycopg
+
+from .. import metrics
+
+logger = logging.getLogger(__name__)
+
+# errors that are retried
+RETRY_ERRORS = (db.utils.OperationalError, OperationalErrorPsycopg, InterfaceError, InterfaceErrorPsycopg2,
+                db.utils.DatabaseError, DatabaseErrorPsycopg)
+# errors that are never retried (same result on each attempt)
+NO_RETRY_ERRORS = (db.utils.IntegrityError, IntegrityErrorPsycopg, db.utils.ProgrammingError, ProgrammingErrorPsycopg,
+                   db.utils.DataError, DataErrorPsycopg, db.utils.NotSupportedError, NotSupportedErrorPsycopg)
+# errors that mean the database is unreachable (count for the circuit breaker)
+CONNECTION_ERRORS = (db.utils.OperationalError, OperationalErrorPsycopg, InterfaceError, InterfaceErrorPsycopg2)
+
+
+class FailFastError(OperationalErrorPsycopg):
+    """
+    errors that must not be retried
+    """
+
+
+class CircuitOpenError(FailFastError):
+    pass
+
+
+class RetryPolicy:
+    def __init__(
+            self,
+            max_attempts=10,
+            base_delay=0.5,
+            max_delay=10,
+            deadline=30,
+            failure_threshold=5,
+            reset_timeout=10,
+            retry_budget=20,
+            retry_budget_refill=2
+    ):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.retry_budget = retry_budget
+        self.retry_budget_refill = retry_budget_refill
+
+    @classmethod
+    def from_options(cls, options):
+        return cls(**options.get("retries", {}))
+
+    def get_delay(self, retry_nb):
+        """
+        full jitter exponential backoff (first retry is immediate)
+        """
+        if retry_nb == 0:
+            return 0
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** retry_nb)))
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures_nb = 0
+        self._opened_at = None
+        self._probe_started_at = None
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        """
+        raises CircuitOpenError if call is not allowed
+
+        Returns
+        -------
+        True if caller is the probe (it must then call record_success, record_failure or release_probe)
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return False
+            now = time.monotonic()
+            if ((self.state == self.OPEN) and (now - self._opened_at >= self.reset_timeout)) or \
+                    ((self.state == self.HALF_OPEN) and (now - self._probe_started_at >= self.reset_timeout)):
+                # this caller is the probe
+                self.state = self.HALF_OPEN
+                self._probe_started_at = now
+                return True
+        raise CircuitOpenError("Database circuit is open, failing fast.")
+
+    def release_probe(self):
+        """
+        to be called when probe ended without reporting success or failure (unexpected error): circuit opens again
+        """
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def record_success(self):
+        with self._lock:
+            self._failures_nb = 0
+            if self.state != self.CLOSED:
+                logger.warning("Database is reachable again, closing circuit")
+            self.state = self.CLOSED
+
+    def record_failure(self):
+        with self._lock:
+            self._failures_nb += 1
+            if (self.state == self.HALF_OPEN) or (self._failures_nb >= self.failure_threshold):
+                if self.state != self.OPEN:
+                    logger.warning("Database is unreachable, opening circuit")
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class RetryBudget:
+    """
+    token bucket shared by all threads of the process
+    """
+    def __init__(self, capacity, refill_per_second):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self._tokens = capacity
+        self._refilled_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._refilled_at) * self.refill_per_second)
+            self._refilled_at = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class Retrier:
+    def __init__(self, policy, alias=None):
+        self.policy = policy
+        self.alias = alias
+        self.circuit_breaker = CircuitBreaker(policy.failure_threshold, policy.reset_timeout)
+        self.budget = RetryBudget(policy.retry_budget, policy.retry_budget_refill)
+        self._local = threading.local()
+
+    def _give_up(self, error, reason):
+        metrics.retries_given_up_total.inc(alias=self.alias, reason=reason)
+        raise error
+
+    def get_retry_delay(self, error, retry_nb, start, max_attempts=None):
+        """
+        Must be called when a retryable error (RETRY_ERRORS) occurred. Raises error if it must not be retried
+        (max attempts, deadline, budget or open circuit), else returns backoff delay (seconds) caller must wait for.
+
+        Parameters
+        ----------
+        retry_nb: number of retries already performed for the operation
+        start: time.monotonic() when the operation was started
+        max_attempts: replaces max_attempts of policy if not None
+        """
+        if isinstance(error, (FailFastError, ) + NO_RETRY_ERRORS) or isinstance(error.__cause__, FailFastError):
+            # may have been wrapped by django
+            raise error
+        if isinstance(error, CONNECTION_ERRORS):
+            self.circuit_breaker.record_failure()
+            if self.circuit_breaker.state == CircuitBreaker.OPEN:
+                self._give_up(error, "circuit_open")
+        else:
+            self.circuit_breaker.record_success()
+        if retry_nb >= (self.policy.max_attempts if max_attempts is None else max_attempts) - 1:
+            self._give_up(error, "max_attempts")
+        delay = self.policy.get_delay(retry_nb)
+        if time.monotonic() - start + delay > self.policy.deadline:
+            logger.warning("Database retries deadline exceeded, giving up")
+            self._give_up(error, "deadline")
+        if not self.budget.try_acquire():
+            logger.warning("Database retry budget exhausted, giving up")
+            self._give_up(error, "budget")
+        logger.warning("Connection to the db lost, reconnecting and retrying", exc_info=error)
+        metrics.retries_total.inc(alias=self.alias, error=type(error).__name__)
+        if delay > 0:
+            metrics.retry_sleep_seconds.observe(delay, alias=self.alias)
+        return delay
+
+    def wait_before_retry(self, error, retry_nb, start):
+        """
+        same as get_retry_delay, but waits for backoff delay
+        """
+        delay = self.get_retry_delay(error, retry_nb, start)
+        if delay > 0:
+            time.sleep(delay)
+
+    def call(self, f, recover=None):
+        """
+        Calls f until it succeeds, recover is called before each retry (for example to reconnect).
+
+        Nested calls (recover or f calling this retrier again in the same thread, for example to reconnect) share
+        the deadline of the outermost call.
+        """
+        outer_start = getattr(self._local, "start", None)
+        self._local.start = time.monotonic() if outer_start is None else outer_start
+        try:
+            return self._call(f, recover, self._local.start)
+        finally:
+            self._local.start = outer_start
+
+    def _call(self, f, recover, start):
+        for i in range(self.policy.max_attempts):
+            try:
+                is_probe = self.circuit_breaker.before_call()
+            except CircuitOpenError as e:
+                self._give_up(e, "circuit_open")
+            try:
+                result = f()
+            except FailFastError:
+                raise
+            except NO_RETRY_ERRORS:
+                self.circuit_breaker.record_success()
+                raise
+            except RETRY_ERRORS as e:
+                self.wait_before_retry(e, i, start)
+                if recover is not None:
+                    recover()
+            else:
+                self.circuit_breaker.record_success()
+                return result
+            finally:
+                if is_probe:
+                    # no-op if success or failure was recorded
+                    self.circuit_breaker.release_probe()
+
+
+_retriers = {}
+_retriers_lock = threading.Lock()
+
+
+def get_retrier(alias, options):
+    """
+    returns the process-wide retrier of given database alias
+    """
+    with _retriers_lock:
+        if alias not in _retriers:
+            _retriers[alias] = Retrier(RetryPolicy.from_options(options), alias=alias)
+        return _retriers[alias]
@@ -0,0 +1,116 @@
+"""
+Read replicas routing.
+
+settings
+--------
+DATABASE_ROUTERS = ["odjango.django.db.psycopg2_retries.routers.ReplicaRouter"]
+DATABASE_REPLICAS = {"default": ["replica_1", "replica_2"]}  # primary alias: replicas aliases
+DATABASE_REPLICA_PIN_SECONDS = 5  # reads of a user go to primary during this time after one of his writes
+
+Replicas should also use the psycopg2_retries backend, with their primary declared in their options:
+DATABASES["replica_1"]["OPTIONS"]["primary"] = "default". When a replica can't be reached (retries exhausted, or
+circuit open), its connection fails over to the primary.
+
+Reads are only sent to replicas inside a replica reads context (see replica_reads, and PermissionViewSet
+replica_actions), outside transactions of the primary. Replicas are load-balanced (round-robin), those whose circuit
+is open are skipped. Pins are stored in django cache (use a shared cache if there are multiple processes).
+"""
+import itertools
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+# context helpers are defined in a psycopg2 free module, they are also available here
+from .replica_context import get_replica_context, start_replica_context, stop_replica_context,\
+    replica_reads  # noqa: F401
+from .retries import CircuitBreaker
+
+DEFAULT_PIN_SECONDS = 5
+
+
+def _get_pin_seconds():
+    return getattr(settings, "DATABASE_REPLICA_PIN_SECONDS", DEFAULT_PIN_SECONDS)
+
+
+def _get_pin_cache_key(user_key):
+    return "odjango-replica-pin-%s" % user_key
+
+
+class ReplicaRouter:
+    def __init__(self):
+        self._replicas = getattr(settings, "DATABASE_REPLICAS", {})
+        self._primaries = {replica: primary for primary, replicas in self._replicas.items() for replica in replicas}
+        self._cycles = {primary: itertools.cycle(replicas) for primary, replicas in self._replicas.items()}
+        self._lock = threading.Lock()
+        self._local_pins = {}  # user_key: pinned until (avoids cache reads in current process)
+        self._local_pins_pruned_at = time.monotonic()
+
+    def _is_pinned(self, context):
+        if context.pinned is None:
+            if context.user_key is None:
+                context.pinned = False
+            elif self._local_pins.get(context.user_key, 0) > time.monotonic():
+                context.pinned = True
+            else:
+                context.pinned = cache.get(_get_pin_cache_key(context.user_key)) is not None
+        return context.pinned
+
+    def _pin(self, context):
+        if (context.user_key is None) or context.pinned:
+            return
+        context.pinned = True
+        pin_seconds = _get_pin_seconds()
+        now = time.monotonic()
+        with self._lock:
+            self._local_pins[context.user_key] = now + pin_seconds
+            if now - self._local_pins_pruned_at >= pin_seconds:
+                # expired pins are dropped once per pin duration: only users who wrote recently are kept
+                self._local_pins = {k: v for k, v in self._local_pins.items() if v > now}
+                self._local_pins_pruned_at = now
+        cache.set(_get_pin_cache_key(context.user_key), True, timeout=pin_seconds)
+
+    def _choose_replica(self, primary):
+        replicas = self._replicas.get(primary, ())
+        with self._lock:
+            for _ in range(len(replicas)):
+                replica = next(self._cycles[primary])
+                retrier = getattr(connections[replica], "retrier", None)
+                if (retrier is None) or (retrier.circuit_breaker.state != CircuitBreaker.OPEN):
+                    return replica
+        return None
+
+    def db_for_read(self, model, **hints):
+        context = get_replica_context()
+        if (context is None) or (not context.reads_enabled):
+            return None
+        instance = hints.get("instance")
+        primary = "default" if (instance is None) or (instance._state.db is None) else \
+            self._primaries.get(instance._state.db, instance._state.db)
+        if connections[primary].in_atomic_block or self._is_pinned(context):
+            return None
+        return self._choose_replica(primary)
+
+    def db_for_write(self, model, **hints):
+        context = get_replica_context()
+        if context is not None:
+            self._pin(context)
+        # objects read from a replica must be written in primary
+        instance = hints.get("instance")
+        if (instance is not None) and (instance._state.db in self._primaries):
+            return self._primaries[instance._state.db]
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        db1 = self._primaries.get(obj1._state.db, obj1._state.db)
+        db2 = self._primaries.get(obj2._state.db, obj2._state.db)
+        if (db1 in self._replicas) and (db1 == db2):
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db in self._primaries:
+            return False
+        return None
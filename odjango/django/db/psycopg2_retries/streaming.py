@@ -0,0 +1,84 @@
+"""
+Resumable streaming of large querysets for the psycopg2_retries backend.
+
+queryset.iterator() uses a named (server-side) cursor: when the connection is lost, its position is lost too. Here,
+the key of the last delivered row is tracked and, after reconnection, iteration goes on with a
+'WHERE key > last' continuation instead of restarting from the first row.
+"""
+import operator
+import time
+
+from django.db import connections
+from django.db.models.query import ValuesIterable, FlatValuesListIterable
+
+from .retries import RETRY_ERRORS
+
+DEFAULT_CHUNK_SIZE = 2000
+
+
+def _get_key_getter(queryset, key, key_field):
+    fields = queryset._fields
+    if fields is None:
+        # model instances
+        return operator.attrgetter(key_field.attname)
+    if len(fields) == 0:
+        # values() or values_list() without arguments: all concrete fields
+        fields = tuple(f.attname for f in queryset.model._meta.concrete_fields)
+    for name in (key, key_field.name, key_field.attname):
+        if name in fields:
+            break
+    else:
+        raise ValueError("Key '%s' must be one of values() or values_list() fields." % key)
+    if issubclass(queryset._iterable_class, ValuesIterable):
+        return operator.itemgetter(name)
+    if issubclass(queryset._iterable_class, FlatValuesListIterable):
+        return lambda value: value
+    return operator.itemgetter(fields.index(name))
+
+
+def iterate_resumable(queryset, key="pk", chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Iterates over queryset (ordered by key) with a server-side cursor, resuming after the last delivered row when
+    the connection is lost. Retries follow the backend retry policy of the queryset database (see retries module),
+    the retry count is reset as soon as new rows are delivered.
+
+    Parameters
+    ----------
+    queryset: not sliced queryset, may be a values() or values_list() queryset (key must then be one of its fields)
+    key: unique not null field name (default: primary key), queryset is ordered by it
+    chunk_size: number of rows fetched per round trip
+
+    Can't resume inside an atomic block (the transaction is lost with the connection), errors are then raised.
+    """
+    if queryset.query.low_mark != 0 or queryset.query.high_mark is not None:
+        raise ValueError("Can't resume a sliced queryset.")
+    key_field = queryset.model._meta.pk if key == "pk" else queryset.model._meta.get_field(key)
+    if not (key_field.primary_key or (key_field.unique and not key_field.null)):
+        # rows sharing a key (or null keys) would be skipped when resuming
+        raise ValueError("Key '%s' must be the primary key or a unique not null field." % key)
+    get_key = _get_key_getter(queryset, key, key_field)
+    queryset = queryset.order_by(key_field.name)
+    connection = connections[queryset.db]
+
+    last_key = None
+    last_key_at_failure = None
+    has_progressed = False
+    retry_nb, start = 0, None
+    while True:
+        qs = queryset if not has_progressed else queryset.filter(**{"%s__gt" % key_field.name: last_key})
+        try:
+            for row in qs.iterator(chunk_size=chunk_size):
+                last_key = get_key(row)
+                has_progressed = True
+                yield row
+            return
+        except RETRY_ERRORS as e:
+            if connection.in_atomic_block:
+                raise
+            if (start is None) or (last_key != last_key_at_failure):
+                # first failure, or rows were delivered since last failure
+                retry_nb, start = 0, time.monotonic()
+            last_key_at_failure = last_key
+            connection.retrier.wait_before_retry(e, retry_nb, start)
+            retry_nb += 1
+            connection.close()
@@ -1,3 +1,5 @@
+import zlib
+
 from django.db import models
 
 
@@ -17,7 +19,39 @@ def _nullable_to_db(value):
     return value
 
 
-class NullableCharField(models.CharField):
+def _normalize_script(value):
+    return value.replace("\t", "    ")
+
+
+class _SqlNullIfMixin:
+    """
+    sql_nullif=True (opt-in): "" is converted to None by the database on select (NULLIF(column, '')), from_db_value
+    is not called (no python call per row and per field on large reads). Writes are unchanged. Columns selected by
+    subqueries (__in=queryset.values(...), Subquery...) are not wrapped, so they still match stored "" values.
+    """
+    def __init__(self, *args, sql_nullif=False, **kwargs):
+        self.sql_nullif = sql_nullif
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.sql_nullif:
+            kwargs["sql_nullif"] = True
+        return name, path, args, kwargs
+
+    def select_format(self, compiler, sql, params):
+        sql, params = super().select_format(compiler, sql, params)
+        if self.sql_nullif and not compiler.query.subquery:
+            return "NULLIF(%s, '')" % sql, params
+        return sql, params
+
+    def get_db_converters(self, connection):
+        if self.sql_nullif:
+            return []
+        return super().get_db_converters(connection)
+
+
+class NullableCharField(_SqlNullIfMixin, models.CharField):
     def __init__(self, *args, **kwargs):
         null = kwargs.get("null", False)
         if null:
@@ -46,7 +80,7 @@ class NullableCharField(models.CharField):
         return _nullable_to_db(value)
 
 
-class NullableTextField(models.TextField):
+class NullableTextField(_SqlNullIfMixin, models.TextField):
     def __init__(self, *args, **kwargs):
         null = kwargs.get("null", False)
         if null:
@@ -79,4 +113,46 @@ class NullableTextField(models.TextField):
 class ScriptField(NullableTextField):
     def get_prep_value(self, value):
         value = super().get_prep_value(value)
-        return value.replace("\t", "    ")
+        return _normalize_script(value)
+
+
+class CompressedScriptField(models.BinaryField):
+    """
+    ScriptField stored compressed (zlib, bytea column): smaller storage, TOAST and network i/o. Values are
+    decompressed when loaded (model instances, values() and values_list() get a str). Same nullable behaviour as
+    ScriptField ("" and None are stored as empty bytes, read as None).
+    """
+    def __init__(self, *args, compression_level=6, **kwargs):
+        null = kwargs.get("null", False)
+        if null:
+            raise FieldsError("Can't set null of a text or char field to True.")
+        kwargs.setdefault("editable", True)
+        self.compression_level = compression_level
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        if self.compression_level != 6:
+            kwargs["compression_level"] = self.compression_level
+        return name, path, args, kwargs
+
+    def get_default(self):
+        return models.Field.get_default(self)
+
+    def from_db_value(self, value, expression, connection, context=None):  # context: compat with old rest_framework
+        if (value is None) or (len(value) == 0):
+            return None
+        return zlib.decompress(value).decode("utf-8")
+
+    def to_python(self, value):
+        return _nullable_to_python(value)
+
+    def get_prep_value(self, value):
+        value = _nullable_to_db(value)
+        if value == "":
+            return b""
+        return zlib.compress(_normalize_script(str(value)).encode("utf-8"), self.compression_level)
+
+    def value_to_string(self, obj):
+        # serialized as text (fixtures)
+        return _nullable_to_db(self.value_from_object(obj))
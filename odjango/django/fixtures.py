@@ -1,5 +1,16 @@
+import bz2
+import collections
+import gzip
+import lzma
+import os
+from contextlib import contextmanager
 from functools import wraps
 
+from django.core import serializers
+from django.core.management.color import no_style
+from django.db import connections, transaction, DEFAULT_DB_ALIAS
+from django.db.models import AutoField, signals, sql
+
 
 def disable_for_loaddata(signal_handler):
     """
@@ -15,3 +26,185 @@ def disable_for_loaddata(signal_handler):
             return
         signal_handler(*args, **kwargs)
     return wrapper
+
+
+MODEL_SIGNALS = (
+    signals.pre_init, signals.post_init, signals.pre_save, signals.post_save, signals.m2m_changed,
+    signals.pre_delete, signals.post_delete
+)
+DEFAULT_FIXTURES_BATCH_SIZE = 1000
+
+_OPENERS = {".gz": gzip.open, ".bz2": bz2.open, ".xz": lzma.open}
+
+
+@contextmanager
+def signals_suppressed(signals_list=MODEL_SIGNALS):
+    """
+    Disconnects all receivers of given signals (default: model signals) while context is active, for all threads.
+    Receivers connected meanwhile are lost.
+    """
+    saved = []
+    for signal in signals_list:
+        with signal.lock:
+            saved.append((signal, signal.receivers))
+            signal.receivers = []
+            signal.sender_receivers_cache.clear()
+    try:
+        yield
+    finally:
+        for signal, receivers in saved:
+            with signal.lock:
+                signal.receivers = receivers
+                signal.sender_receivers_cache.clear()
+
+
+def _sort_models(models):
+    """
+    referenced models first (models of cycles are appended at the end)
+    """
+    models = set(models)
+    sorted_models = []
+    while len(models) > 0:
+        ready = sorted((m for m in models if not any(
+            (f.related_model in models) and (f.related_model is not m)
+            for f in m._meta.concrete_fields if f.is_relation)), key=lambda m: m._meta.label)
+        if len(ready) == 0:
+            sorted_models.extend(sorted(models, key=lambda m: m._meta.label))
+            break
+        sorted_models.extend(ready)
+        models.difference_update(ready)
+    return sorted_models
+
+
+def _open_fixture(path):
+    """
+    Returns
+    -------
+    stream, format
+    """
+    name, extension = os.path.splitext(path)
+    opener = _OPENERS.get(extension)
+    if opener is None:
+        name, opener = path, open
+    return opener(path, "rt", encoding="utf-8"), os.path.splitext(name)[1][1:]
+
+
+class _FixtureLoader:
+    def __init__(self, using, batch_size, ignore_conflicts):
+        self.using = using
+        self.connection = connections[using]
+        self.batch_size = batch_size
+        self.ignore_conflicts = ignore_conflicts
+        self.buffers = collections.defaultdict(list)  # model: objects
+        self.deferred = []  # deserialized objects with forward references
+        self.models = set()
+        self.loaded_nb = 0
+
+    def add(self, deserialized):
+        obj = deserialized.object
+        model = type(obj)._meta.concrete_model  # proxies
+        self.models.add(model)
+        self._buffer(model, obj)
+        for field_name, related_pks in (deserialized.m2m_data or {}).items():
+            field = model._meta.get_field(field_name)
+            through = field.remote_field.through
+            source = through._meta.get_field(field.m2m_field_name()).attname
+            target = through._meta.get_field(field.m2m_reverse_field_name()).attname
+            for related_pk in related_pks:
+                self._buffer(through, through(**{source: obj.pk, target: related_pk}))
+        if deserialized.deferred_fields:
+            self.deferred.append(deserialized)
+
+    def _buffer(self, model, obj):
+        buffer = self.buffers[model]
+        buffer.append(obj)
+        if len(buffer) >= self.batch_size:
+            # foreign keys constraints are deferred (postgresql, sqlite): insertion order doesn't matter until commit
+            self._flush(model)
+
+    def _insert(self, model, fields, objects):
+        """
+        raw insert (like loaddata: fields values are not computed, auto_now/auto_now_add values of fixture are kept)
+        """
+        batch_size = max(min(self.batch_size, self.connection.ops.bulk_batch_size(fields, objects)), 1)
+        for i in range(0, len(objects), batch_size):
+            query = sql.InsertQuery(model, ignore_conflicts=self.ignore_conflicts)
+            query.insert_values(fields, objects[i:i + batch_size], raw=True)
+            query.get_compiler(using=self.using).execute_sql()
+
+    def _flush(self, model):
+        objects, self.buffers[model] = self.buffers[model], []
+        if len(objects) == 0:
+            return
+        # multi-table inheritance: fixtures contain one object per table, only local fields are inserted (like loaddata)
+        fields = model._meta.local_concrete_fields
+        with_pk = [obj for obj in objects if obj.pk is not None]
+        without_pk = [obj for obj in objects if obj.pk is None]
+        if (self.connection.vendor == "postgresql") and (not self.ignore_conflicts) and (len(with_pk) > 0):
+            # imported here: psycopg2 is only required on postgresql
+            from .db.psycopg2_retries.bulk import bulk_load, METHOD_AUTO
+            bulk_load(
+                model,
+                ({f.attname: getattr(obj, f.attname) for f in fields} for obj in with_pk),
+                columns=[f.name for f in fields],
+                using=self.using,
+                method=METHOD_AUTO,  # COPY is only used when it can encode all fields values
+                batch_size=len(with_pk)
+            )
+        elif len(with_pk) > 0:
+            self._insert(model, fields, with_pk)
+        if len(without_pk) > 0:
+            self._insert(model, [f for f in fields if not isinstance(f, AutoField)], without_pk)
+        self.loaded_nb += len(objects)
+
+    def finish(self):
+        for model in _sort_models(self.buffers):
+            self._flush(model)
+        for deserialized in self.deferred:
+            deserialized.save_deferred_fields(using=self.using)
+
+        # loaded primary keys may be greater than sequences values
+        sequence_sql = self.connection.ops.sequence_reset_sql(no_style(), list(self.models))
+        if sequence_sql:
+            with self.connection.cursor() as cursor:
+                for sql in sequence_sql:
+                    cursor.execute(sql)
+
+
+def load_fixtures(
+        fixture_paths,
+        using=DEFAULT_DB_ALIAS,
+        batch_size=DEFAULT_FIXTURES_BATCH_SIZE,
+        ignore_conflicts=False
+):
+    """
+    Fast alternative to loaddata, for seeding databases with large fixtures.
+
+    Objects are deserialized in a stream (jsonl and xml are read progressively, json is parsed at once), grouped per
+    model and inserted by batches (raw multi-rows INSERT, COPY on postgresql for large batches of fields COPY can
+    encode), in one transaction, signals suppressed.
+    Like loaddata, fixture values are inserted as is (auto_now and auto_now_add fields included), and multi-table
+    inherited models are inserted table by table. Unlike loaddata, existing rows are not updated: loading a fixture row
+    that already exists fails (or is skipped if ignore_conflicts).
+
+    Parameters
+    ----------
+    fixture_paths: paths of fixture files (json, jsonl, xml, yaml; may be compressed: .gz, .bz2, .xz)
+    using: database alias
+    batch_size: max number of objects per model held in memory
+    ignore_conflicts: rows that already exist are skipped (INSERT ... ON CONFLICT DO NOTHING, COPY is not used)
+
+    Returns
+    -------
+    number of inserted rows (m2m rows included)
+    """
+    loader = _FixtureLoader(using, batch_size, ignore_conflicts)
+    with signals_suppressed(), transaction.atomic(using=using):
+        for path in fixture_paths:
+            stream, format = _open_fixture(path)
+            with stream:
+                for deserialized in serializers.deserialize(
+                        format, stream, using=using, handle_forward_references=True):
+                    loader.add(deserialized)
+        loader.finish()
+    return loader.loaded_nb
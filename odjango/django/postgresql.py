@@ -1,28 +1,95 @@
+import asyncio
+import functools
+import itertools
 import logging
+import time
 
 from django.db.utils import InterfaceError, OperationalError, InternalError
 from django import db
 from psycopg2 import OperationalError as OperationalErrorPsycopg
 
+from .db.psycopg2_retries.retries import get_retrier
+
 logger = logging.getLogger(__name__)
 
+RETRY_ERRORS = (InterfaceError, OperationalError, OperationalErrorPsycopg, InternalError)
+
+
+def _close_failed_connections(using):
+    """
+    closes connections that failed (django flags them, or psycopg2 connection is closed), connection of using alias
+    if none is found (psycopg2 errors that were not wrapped by django)
+    """
+    closed = False
+    for connection in db.connections.all():
+        if (connection.connection is not None) and (connection.errors_occurred or connection.connection.closed):
+            connection.close()
+            closed = True
+    if not closed:
+        db.connections[using].close()
+
 
 class PostgresqlDatabaseRetry:
-    def __init__(self, retries_nb):
+    """
+    Retries decorated function (or coroutine function) on database errors, after having closed connection that failed.
+
+    Backoff, deadline, retry budget and circuit breaker are those of the database alias (DATABASES[using]["OPTIONS"]
+    ["retries"], see odjango.django.db.psycopg2_retries.retries), shared with psycopg2_retries backend. Coroutines wait
+    with asyncio.sleep, so retries don't block the event loop.
+
+    Parameters
+    ----------
+    retries_nb: max number of retries, replaces max_attempts of retries policy (None: max_attempts is used)
+    using: database alias whose retries policy is used
+    """
+    def __init__(self, retries_nb=None, using=db.DEFAULT_DB_ALIAS):
         self.retries_nb = retries_nb
+        self.using = using
+
+    @property
+    def retrier(self):
+        return get_retrier(self.using, db.connections.databases[self.using].get("OPTIONS", {}))
+
+    def _get_delay(self, error, retry_nb, start):
+        """
+        raises error if it must not be retried
+        """
+        max_attempts = None if self.retries_nb is None else self.retries_nb + 1
+        return self.retrier.get_retry_delay(error, retry_nb, start, max_attempts=max_attempts)
 
     def __call__(self, f):
+        if asyncio.iscoroutinefunction(f):
+            return self._wrap_coroutine_function(f)
+
+        @functools.wraps(f)
         def wrapped_function(*args, **kwargs):
-            for i in range(self.retries_nb):
+            start = time.monotonic()
+            for i in itertools.count():
                 try:
                     return f(*args, **kwargs)
-                except InterfaceError:
-                    logger.warning("Connection to the db lost, reconnection and retrying", exc_info=True)
-                    db.connection.close()
-                except (OperationalError, OperationalErrorPsycopg, InternalError):
-                    logger.warning("Database error, closing connection and retrying", exc_info=True)
-                    db.connection.close()
-
-            return f(*args, **kwargs)
+                except RETRY_ERRORS as e:
+                    delay = self._get_delay(e, i, start)
+                    _close_failed_connections(self.using)
+                    if delay > 0:
+                        time.sleep(delay)
+
+        return wrapped_function
+
+    def _wrap_coroutine_function(self, f):
+        # asgiref is installed with django>=3.0, which is required by coroutine functions support only
+        from asgiref.sync import sync_to_async
+
+        @functools.wraps(f)
+        async def wrapped_function(*args, **kwargs):
+            start = time.monotonic()
+            for i in itertools.count():
+                try:
+                    return await f(*args, **kwargs)
+                except RETRY_ERRORS as e:
+                    delay = self._get_delay(e, i, start)
+                    # connections are bound to the thread that runs sync_to_async code
+                    await sync_to_async(_close_failed_connections)(self.using)
+                    if delay > 0:
+                        await asyncio.sleep(delay)
 
         return wrapped_function
@@ -0,0 +1,270 @@
+"""
+Database snapshots, to restore a migrated (and fixture-loaded) database almost instantly (tests, demo resets).
+
+postgresql: snapshot is a database created with CREATE DATABASE ... TEMPLATE (named <database>_snap_<key>), restore
+    recreates the database from it (under a temporary name, renamed once complete). No other connection to the
+    database may be open (other processes, pools): DatabaseInUseError is raised before anything is changed.
+sqlite: snapshot is a copy made with sqlite backup api (file <database>.snapshot-<key>, kept in memory for in-memory
+    databases), restore copies it back into the database.
+
+Snapshot keys are derived from migrations files (see get_snapshot_key): snapshots become stale as soon as a migration is
+added, removed or edited, and are rebuilt by restore_or_snapshot_db (stale snapshots are dropped).
+
+reset_db can be used between restores to flush some apps only.
+"""
+import glob
+import hashlib
+import os
+import sqlite3
+import sys
+
+from django.db import connections, DEFAULT_DB_ALIAS
+from django.db.migrations.loader import MigrationLoader
+from django.db.transaction import TransactionManagementError
+
+POSTGRESQL_SNAPSHOT_INFIX = "_snap_"
+SQLITE_SNAPSHOT_SUFFIX = ".snapshot-"
+
+_memory_snapshots = {}  # (alias, key): sqlite3 connection
+
+
+def get_snapshot_key(extra=None):
+    """
+    Parameters
+    ----------
+    extra: str, to be changed when snapshot content changes without migration changes (fixtures version for example)
+
+    Returns
+    -------
+    key derived from all migrations found on disk (names and files contents: edited migrations change the key)
+    """
+    loader = MigrationLoader(None, ignore_no_migrations=True)
+    state = hashlib.blake2b(digest_size=6)
+    for migration_key in sorted(loader.disk_migrations):
+        state.update(("%s.%s\n" % migration_key).encode("utf-8"))
+        state.update(_get_migration_source(loader.disk_migrations[migration_key]))
+    if extra is not None:
+        state.update(("\n" + extra).encode("utf-8"))
+    return state.hexdigest()
+
+
+def _get_migration_source(migration):
+    module = sys.modules[type(migration).__module__]
+    file_path = getattr(module, "__file__", None)
+    if (file_path is None) or (not os.path.isfile(file_path)):
+        # no source file (frozen, compiled only...): operations representation
+        return repr([operation.deconstruct() for operation in migration.operations]).encode("utf-8")
+    with open(file_path, "rb") as f:
+        return f.read()
+
+
+# ------------------------------------------------- postgresql ---------------------------------------------------------
+def _get_postgresql_snapshot_prefix(connection):
+    # identifiers are limited to 63 characters
+    return connection.settings_dict["NAME"][:40] + POSTGRESQL_SNAPSHOT_INFIX
+
+
+def _close_postgresql_connections(connection):
+    connection.close()
+    pool = getattr(connection, "pool", None)  # psycopg2_retries backend
+    if pool is not None:
+        pool.clear()
+
+
+class DatabaseInUseError(RuntimeError):
+    pass
+
+
+def _check_no_other_sessions(cursor, names):
+    """
+    CREATE DATABASE ... TEMPLATE and ALTER DATABASE ... RENAME fail when other sessions use the databases
+    """
+    cursor.execute(
+        "SELECT datname, count(*) FROM pg_stat_activity WHERE datname = ANY(%s) AND pid <> pg_backend_pid() "
+        "GROUP BY datname ORDER BY datname", [list(names)])
+    sessions = cursor.fetchall()
+    if len(sessions) > 0:
+        raise DatabaseInUseError(
+            "Databases are used by other sessions (other processes, pools, shells...), they must be closed: %s" %
+            ", ".join("%s (%s sessions)" % (name, count) for name, count in sessions))
+
+
+def _clone_postgresql_database(connection, source, target):
+    """
+    target is replaced once its copy is complete: source is copied under a temporary name, which is then renamed
+    (previous target is dropped after the rename)
+    """
+    qn = connection.ops.quote_name
+    # identifiers are limited to 63 characters
+    tmp, old = target[:59] + "_tmp", target[:59] + "_old"
+    _close_postgresql_connections(connection)
+    with connection._nodb_cursor() as cursor:
+        _check_no_other_sessions(cursor, (source, target))
+        cursor.execute("DROP DATABASE IF EXISTS %s" % qn(tmp))
+        cursor.execute("CREATE DATABASE %s TEMPLATE %s" % (qn(tmp), qn(source)))
+        cursor.execute("SELECT 1 FROM pg_database WHERE datname = %s", [target])
+        exists = cursor.fetchone() is not None
+        if exists:
+            cursor.execute("DROP DATABASE IF EXISTS %s" % qn(old))
+            cursor.execute("ALTER DATABASE %s RENAME TO %s" % (qn(target), qn(old)))
+        try:
+            cursor.execute("ALTER DATABASE %s RENAME TO %s" % (qn(tmp), qn(target)))
+        except Exception:
+            if exists:
+                cursor.execute("ALTER DATABASE %s RENAME TO %s" % (qn(old), qn(target)))
+            raise
+        if exists:
+            cursor.execute("DROP DATABASE %s" % qn(old))
+
+
+def _get_postgresql_snapshots(connection):
+    prefix = _get_postgresql_snapshot_prefix(connection)
+    with connection._nodb_cursor() as cursor:
+        cursor.execute("SELECT datname FROM pg_database WHERE left(datname, %s) = %s", [len(prefix), prefix])
+        return {name[len(prefix):]: name for name, in cursor.fetchall()}
+
+
+def _drop_postgresql_snapshot(connection, name):
+    with connection._nodb_cursor() as cursor:
+        cursor.execute("DROP DATABASE IF EXISTS %s" % connection.ops.quote_name(name))
+
+
+# --------------------------------------------------- sqlite -----------------------------------------------------------
+def _get_sqlite_snapshots(connection):
+    if connection.is_in_memory_db():
+        return {key: key for alias, key in _memory_snapshots if alias == connection.alias}
+    prefix = str(connection.settings_dict["NAME"]) + SQLITE_SNAPSHOT_SUFFIX
+    return {path[len(prefix):]: path for path in glob.glob(glob.escape(prefix) + "*")}
+
+
+def _snapshot_sqlite_database(connection, key):
+    connection.ensure_connection()
+    if connection.is_in_memory_db():
+        snapshot = sqlite3.connect(":memory:", check_same_thread=False)
+        connection.connection.backup(snapshot)
+        _memory_snapshots[(connection.alias, key)] = snapshot
+        return
+    snapshot = sqlite3.connect(str(connection.settings_dict["NAME"]) + SQLITE_SNAPSHOT_SUFFIX + key)
+    try:
+        connection.connection.backup(snapshot)
+    finally:
+        snapshot.close()
+
+
+def _restore_sqlite_database(connection, key):
+    connection.ensure_connection()
+    if connection.is_in_memory_db():
+        _memory_snapshots[(connection.alias, key)].backup(connection.connection)
+        return
+    snapshot = sqlite3.connect(str(connection.settings_dict["NAME"]) + SQLITE_SNAPSHOT_SUFFIX + key)
+    try:
+        snapshot.backup(connection.connection)
+    finally:
+        snapshot.close()
+
+
+def _drop_sqlite_snapshot(connection, key, name):
+    if connection.is_in_memory_db():
+        _memory_snapshots.pop((connection.alias, key)).close()
+    else:
+        os.remove(name)
+
+
+# ---------------------------------------------------- api -------------------------------------------------------------
+def _get_connection(using):
+    connection = connections[DEFAULT_DB_ALIAS if using is None else using]
+    if connection.vendor not in ("postgresql", "sqlite"):
+        raise ValueError("database snapshots are not supported by %s" % connection.vendor)
+    if connection.in_atomic_block:
+        raise TransactionManagementError("database snapshots can't be used inside a transaction")
+    return connection
+
+
+def _get_snapshots(connection):
+    """
+    Returns
+    -------
+    {key: snapshot name}
+    """
+    if connection.vendor == "postgresql":
+        return _get_postgresql_snapshots(connection)
+    return _get_sqlite_snapshots(connection)
+
+
+def snapshot_exists(key=None, using=None):
+    connection = _get_connection(using)
+    return (get_snapshot_key() if key is None else key) in _get_snapshots(connection)
+
+
+def snapshot_db(key=None, using=None):
+    """
+    Snapshots current database content (existing snapshot with same key is replaced).
+
+    Parameters
+    ----------
+    key: snapshot key, default get_snapshot_key()
+    using: database alias (default: default database)
+    """
+    connection = _get_connection(using)
+    key = get_snapshot_key() if key is None else key
+    if connection.vendor == "postgresql":
+        _clone_postgresql_database(
+            connection, connection.settings_dict["NAME"], _get_postgresql_snapshot_prefix(connection) + key)
+    else:
+        _snapshot_sqlite_database(connection, key)
+
+
+def restore_db(key=None, using=None):
+    """
+    Replaces database content by snapshot content.
+
+    Returns
+    -------
+    True if snapshot was restored, False if it doesn't exist
+    """
+    connection = _get_connection(using)
+    key = get_snapshot_key() if key is None else key
+    snapshots = _get_snapshots(connection)
+    if key not in snapshots:
+        return False
+    if connection.vendor == "postgresql":
+        _clone_postgresql_database(connection, snapshots[key], connection.settings_dict["NAME"])
+    else:
+        _restore_sqlite_database(connection, key)
+    return True
+
+
+def drop_stale_snapshots(key=None, using=None):
+    """
+    drops all snapshots of database, except the one of given key
+    """
+    connection = _get_connection(using)
+    key = get_snapshot_key() if key is None else key
+    for snapshot_key, name in _get_snapshots(connection).items():
+        if snapshot_key == key:
+            continue
+        if connection.vendor == "postgresql":
+            _drop_postgresql_snapshot(connection, name)
+        else:
+            _drop_sqlite_snapshot(connection, snapshot_key, name)
+
+
+def restore_or_snapshot_db(prepare, key=None, using=None):
+    """
+    Restores snapshot if it exists, else prepares database and snapshots it (stale snapshots are dropped).
+
+    Parameters
+    ----------
+    prepare: callable, must migrate database and load data (fixtures) on an empty or stale database
+
+    Returns
+    -------
+    True if snapshot was restored, False if database was prepared
+    """
+    key = get_snapshot_key() if key is None else key
+    if restore_db(key=key, using=using):
+        return True
+    drop_stale_snapshots(key=key, using=using)
+    prepare()
+    snapshot_db(key=key, using=using)
+    return False
@@ -1,12 +1,51 @@
 import uuid
+import collections
+import hashlib
 import mimetypes
 import os
+import re
+import threading
+import time
+import zlib
 
-from django.db import models
-from django.http import HttpResponse
+from django.apps import apps as django_apps
+from django.core.management.color import no_style
+from django.db import models, connections, transaction, DEFAULT_DB_ALIAS
+from django.http import HttpResponse, FileResponse, StreamingHttpResponse, HttpResponseNotModified
+from django.utils.http import http_date, parse_etags
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
 from django.contrib.contenttypes.models import ContentType
 
 
+_uuid7_lock = threading.Lock()
+_uuid7_last = [0, 0]  # unix ms, counter
+
+
+def uuid7():
+    """
+    Time-ordered uuid (RFC 9562 version 7): 48 bits unix timestamp (ms), 12 bits counter (monotonic in process), 62
+    random bits. Inserts are appended to the end of primary key indexes (no random page splits).
+    """
+    with _uuid7_lock:
+        unix_ms = time.time_ns() // 1000000
+        last_ms, counter = _uuid7_last
+        if unix_ms <= last_ms:
+            # same millisecond (or clock went backward): keep order with counter
+            counter += 1
+            if counter > 0xfff:
+                last_ms, counter = last_ms + 1, 0
+            unix_ms = last_ms
+        else:
+            counter = 0
+        _uuid7_last[:] = unix_ms, counter
+    rand_b = int.from_bytes(os.urandom(8), "big") & 0x3fffffffffffffff
+    return uuid.UUID(int=(unix_ms << 80) | (0x7 << 76) | (counter << 64) | (0b10 << 62) | rand_b)
+
+
 class UUIDModel(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
 
@@ -18,41 +57,143 @@ class UUIDModel(models.Model):
         abstract = True
 
 
-def reset_db(apps=None, exclude=("authtoken", "corsheaders", "contenttypes")):
+class OrderedUUIDModel(UUIDModel):
+    """
+    same as UUIDModel, with time-ordered ids (see uuid7): better for write-heavy tables and recent rows queries.
+    Switching an existing model only changes the default (same column type, existing ids are kept).
+    """
+    id = models.UUIDField(primary_key=True, default=uuid7, editable=False)
+
+    class Meta:
+        abstract = True
+
+
+def _get_reset_tables(models_classes, connection):
+    """
+    Returns
+    -------
+    {table: model}, existing tables only
+    """
+    tables = {}
+    for model in models_classes:
+        if model._meta.proxy or not model._meta.managed:
+            continue
+        tables[model._meta.db_table] = model
+        for field in model._meta.local_many_to_many:
+            if field.remote_field.through._meta.auto_created:
+                tables[field.remote_field.through._meta.db_table] = field.remote_field.through
+    existing_tables = set(connection.introspection.table_names())
+    # sorted: to be deterministic
+    return {table: tables[table] for table in sorted(tables) if table in existing_tables}
+
+
+def _get_external_references(tables, connection):
+    """
+    foreign keys of tables that are not reset (excluded or other apps), referencing reset tables
+    """
+    existing_tables = set(connection.introspection.table_names())
+    references = []
+    for model in django_apps.get_models(include_auto_created=True):
+        if model._meta.proxy or (not model._meta.managed) or (model._meta.db_table in tables) or \
+                (model._meta.db_table not in existing_tables):
+            continue
+        for field in model._meta.concrete_fields:
+            if field.is_relation and (field.remote_field.model._meta.db_table in tables):
+                references.append(field)
+    return references
+
+
+def _clear_external_references(references, using):
+    """
+    applies on_delete of references, as if all reset rows were deleted (CASCADE: referencing rows are deleted, SET_NULL:
+    set to null). Raises ValueError if a reference with another on_delete is not null.
+    """
+    for field in references:
+        queryset = field.model._base_manager.using(using).filter(**{"%s__isnull" % field.name: False})
+        on_delete = field.remote_field.on_delete
+        if on_delete is models.CASCADE:
+            queryset.delete()
+        elif on_delete is models.SET_NULL:
+            queryset.update(**{field.name: None})
+        elif (on_delete is not models.DO_NOTHING) and queryset.exists():
+            raise ValueError(
+                "Can't reset tables: %s.%s references them (on_delete=%s). Reset its app too, or use fire_signals=True."
+                % (field.model._meta.label, field.name, on_delete.__name__))
+
+
+def _get_flush_sql(connection, tables, truncate):
+    qn = connection.ops.quote_name
+    if truncate:
+        # postgresql, only possible if no other table references reset tables (no CASCADE: it would empty them)
+        return ["TRUNCATE %s RESTART IDENTITY;" % ", ".join(qn(table) for table in tables)]
+    sql_list = ["DELETE FROM %s;" % qn(table) for table in tables]
+    sequences = [dict(table=table, column=model._meta.pk.column) for table, model in tables.items()
+                 if isinstance(model._meta.pk, models.AutoField)]
+    sql_list.extend(connection.ops.sequence_reset_by_name_sql(no_style(), sequences))
+    return sql_list
+
+
+def _flush_tables(tables, using):
+    connection = connections[using]
+    with transaction.atomic(using=using):
+        references = _get_external_references(tables, connection)
+        _clear_external_references(references, using)
+        sql_list = _get_flush_sql(
+            connection, tables, truncate=(connection.vendor == "postgresql") and (len(references) == 0))
+        with connection.cursor() as cursor:
+            for sql in sql_list:
+                cursor.execute(sql)
+
+
+def reset_db(apps=None, exclude=("authtoken", "corsheaders", "contenttypes"), fire_signals=False, using=None):
     """
     Parameters
     ----------
     apps : list of apps names to reset (except excluded). If None, will reset all apps except excluded.
     exclude : list of apps not to reset
+    fire_signals : if False (default), tables are flushed with a few statements (postgresql: TRUNCATE ... RESTART
+        IDENTITY, DELETE FROM if other tables reference reset tables, sqlite: DELETE FROM). Rows of other apps (or
+        excluded apps) referencing reset rows are handled like a deletion would (on_delete CASCADE: deleted, SET_NULL:
+        set to null, other: ValueError if any), other rows are kept. If True, objects are deleted one by one (slow),
+        delete signals are sent.
+    using : database alias (default: default database)
     """
+    using = DEFAULT_DB_ALIAS if using is None else using
+
     # prepare arguments
     if apps is None:
-        apps = set(ct.app_label for ct in ContentType.objects.all())
+        apps = set(ct.app_label for ct in ContentType.objects.db_manager(using).all())
     else:
         apps = set(apps)
     exclude = set(exclude)
 
     # remove apps
     # sorted: to be deterministic
-    for app_label in sorted(apps.difference(exclude)):
-        for ct in ContentType.objects.filter(app_label=app_label).order_by("model"):
-            for obj in ct.model_class().objects.order_by("pk"):
+    app_labels = sorted(apps.difference(exclude))
+    if not fire_signals:
+        models_classes = [ct.model_class() for ct in ContentType.objects.db_manager(using).filter(
+            app_label__in=app_labels)]
+        tables = _get_reset_tables([m for m in models_classes if m is not None], connections[using])
+        if len(tables) > 0:
+            _flush_tables(tables, using)
+        return
+
+    for app_label in app_labels:
+        for ct in ContentType.objects.db_manager(using).filter(app_label=app_label).order_by("model"):
+            for obj in ct.model_class().objects.using(using).order_by("pk"):
                 obj.delete()
 
 
-def respond_file_from_local_file(file_path):
+def respond_file_from_local_file(file_path, request=None):
     """https://djangosnippets.org/snippets/1710/"""
     with open(file_path, "rb") as f:
         bts = f.read()
     file_name = os.path.basename(file_path)
     content_length = os.path.getsize(file_path)
-    return respond_file_from_bytes(bts, file_name, content_length=content_length)
-
+    return respond_file_from_bytes(bts, file_name, content_length=content_length, request=request)
 
-def respond_file_from_bytes(bts, file_name, content_length=None):
-    # make response
-    response = HttpResponse(bts)
 
+def _set_file_headers(response, file_name, content_length=None):
     # choose file_type
     file_type, file_encoding = mimetypes.guess_type(file_name)
     if file_type is None:
@@ -65,5 +206,273 @@ def respond_file_from_bytes(bts, file_name, content_length=None):
         response["Content-Encoding"] = file_encoding
     response["Content-Disposition"] = "attachment; filename=%s" % file_name
 
+
+ENCODING_BROTLI = "br"
+ENCODING_GZIP = "gzip"
+COMPRESSION_MIN_SIZE = 1024  # smaller contents are not compressed
+COMPRESSION_CHUNK_SIZE = 64 * 1024
+COMPRESSED_CACHE_MAX_BYTES = 64 * 1024 * 1024
+COMPRESSIBLE_TYPES = ("application/json", "application/xml", "application/javascript", "image/svg+xml")
+
+
+class _CompressedCache:
+    """
+    LRU cache of compressed contents, keyed by (content digest, encoding), bounded by total size
+    """
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._contents = collections.OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            content = self._contents.get(key)
+            if content is not None:
+                self._contents.move_to_end(key)
+            return content
+
+    def set(self, key, content):
+        if len(content) > self.max_bytes // 4:
+            return
+        with self._lock:
+            if key in self._contents:
+                return
+            self._contents[key] = content
+            self._bytes += len(content)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._contents.popitem(last=False)
+                self._bytes -= len(evicted)
+
+
+_compressed_cache = _CompressedCache(COMPRESSED_CACHE_MAX_BYTES)
+
+
+def _get_compressor(encoding):
+    """
+    Returns
+    -------
+    compress(bytes) -> bytes, flush() -> bytes
+    """
+    if encoding == ENCODING_BROTLI:
+        compressor = brotli.Compressor(quality=5)
+        return compressor.process, compressor.finish
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)  # gzip container
+    return compressor.compress, compressor.flush
+
+
+def _iter_compressed(bts, encoding, cache_key):
+    """
+    compresses by chunks, compressed content is cached once fully sent
+    """
+    compress, flush = _get_compressor(encoding)
+    chunks = []
+    view = memoryview(bts)
+    for i in range(0, len(bts), COMPRESSION_CHUNK_SIZE):
+        chunk = compress(view[i:i + COMPRESSION_CHUNK_SIZE])
+        if chunk:
+            chunks.append(chunk)
+            yield chunk
+    chunk = flush()
+    chunks.append(chunk)
+    yield chunk
+    _compressed_cache.set(cache_key, b"".join(chunks))
+
+
+def _is_compressible(file_type):
+    return file_type.startswith("text/") or (file_type in COMPRESSIBLE_TYPES) or \
+        file_type.endswith(("+json", "+xml"))
+
+
+def _choose_encoding(accept_encoding):
+    """
+    Returns
+    -------
+    best supported encoding accepted by client (brotli is preferred), None if none
+    """
+    if not accept_encoding:
+        return None
+    supported = (ENCODING_BROTLI, ENCODING_GZIP) if brotli is not None else (ENCODING_GZIP, )
+    qualities = {}
+    for item in accept_encoding.split(","):
+        name, *params = [p.strip() for p in item.split(";")]
+        quality = 1
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0
+        qualities[name.lower()] = quality
+    candidates = [e for e in supported if qualities.get(e, 0) > 0]
+    if len(candidates) == 0:
+        return None
+    return max(candidates, key=lambda e: qualities[e])  # max keeps first (preferred) encoding on ties
+
+
+def respond_file_from_bytes(bts, file_name, content_length=None, request=None):
+    """
+    Parameters
+    ----------
+    request: django request. If given, content is compressed (gzip, or brotli if installed) when client accepts it, and
+        requests whose If-None-Match matches content ETag receive a 304 response
+    """
+    if request is None:
+        response = HttpResponse(bts)
+        _set_file_headers(response, file_name, content_length=content_length)
+        return response
+
+    # negotiate
+    if isinstance(bts, str):
+        bts = bts.encode("utf-8")
+    file_type, file_encoding = mimetypes.guess_type(file_name)
+    encoding = None
+    if (file_encoding is None) and (len(bts) >= COMPRESSION_MIN_SIZE) and \
+            _is_compressible(file_type or "application/octet-stream"):
+        encoding = _choose_encoding(request.headers.get("Accept-Encoding"))
+
+    # strong ETag, one per representation
+    digest = hashlib.blake2b(bts, digest_size=16).hexdigest()
+    etag = '"%s"' % digest if encoding is None else '"%s-%s"' % (digest, encoding)
+
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match is not None:
+        etags = parse_etags(if_none_match)
+        if ("*" in etags) or (etag in [e[2:] if e.startswith("W/") else e for e in etags]):
+            response = HttpResponseNotModified()
+            response["ETag"] = etag
+            response["Vary"] = "Accept-Encoding"
+            return response
+
+    if encoding is None:
+        response = HttpResponse(bts)
+        _set_file_headers(response, file_name, content_length=content_length)
+    else:
+        cache_key = (digest, encoding)
+        compressed = _compressed_cache.get(cache_key)
+        if compressed is None:
+            response = StreamingHttpResponse(_iter_compressed(bts, encoding, cache_key))
+            _set_file_headers(response, file_name)
+        else:
+            response = HttpResponse(compressed)
+            _set_file_headers(response, file_name, content_length=len(compressed))
+        response["Content-Encoding"] = encoding
+    response["ETag"] = etag
+    response["Vary"] = "Accept-Encoding"
     return response
 
+
+OFFLOAD_X_SENDFILE = "x-sendfile"  # apache (mod_xsendfile), lighttpd
+OFFLOAD_X_ACCEL_REDIRECT = "x-accel-redirect"  # nginx
+STREAM_BLOCK_SIZE = 64 * 1024
+
+_RANGE_REGEX = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class _StreamingFileResponse(FileResponse):
+    block_size = STREAM_BLOCK_SIZE
+
+
+class _FileRange:
+    """
+    file-like reading length bytes from start (has no fileno: servers won't sendfile the rest of the file)
+    """
+    def __init__(self, file, start, length):
+        self._file = file
+        self._remaining = length
+        file.seek(start)
+
+    def read(self, size=-1):
+        if (size < 0) or (size > self._remaining):
+            size = self._remaining
+        data = self._file.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def close(self):
+        self._file.close()
+
+
+def _parse_range(range_header, size):
+    """
+    Returns
+    -------
+    None if header must be ignored (absent, invalid, multiple ranges), (start, end) (end is included) if satisfiable,
+        else (None, None)
+    """
+    if range_header is None:
+        return None
+    match = _RANGE_REGEX.match(range_header.strip())
+    if match is None:
+        return None
+    start, end = match.groups()
+    if start == "":
+        if end == "":
+            return None
+        # suffix: last bytes
+        length = int(end)
+        if (length == 0) or (size == 0):
+            return None, None
+        return max(0, size - length), size - 1
+    start = int(start)
+    if (end != "") and (int(end) < start):
+        return None
+    if start >= size:
+        return None, None
+    end = size - 1 if end == "" else min(int(end), size - 1)
+    return start, end
+
+
+def respond_stream_from_local_file(file_path, request=None, offload=None, offload_path=None):
+    """
+    Streams a local file (memory usage doesn't depend on file size), same headers as respond_file_from_bytes.
+
+    Full file responses are sent with wsgi.file_wrapper when server provides it (os.sendfile for gunicorn, uwsgi...).
+    If request is given, single byte ranges are supported (Range, If-Range headers: resumable downloads).
+
+    Parameters
+    ----------
+    request: django request, needed for Range support
+    offload: None, "x-sendfile" or "x-accel-redirect": file is not sent by django but by front web server, ranges are
+        handled by web server
+    offload_path: value of offload header (default: file_path). For nginx, internal location uri of file.
+    """
+    file_name = os.path.basename(file_path)
+    stat = os.stat(file_path)
+    last_modified = http_date(stat.st_mtime)
+
+    # offload
+    if offload is not None:
+        if offload not in (OFFLOAD_X_SENDFILE, OFFLOAD_X_ACCEL_REDIRECT):
+            raise ValueError("unknown offload mode: %s" % offload)
+        response = HttpResponse()
+        _set_file_headers(response, file_name)
+        response["Last-Modified"] = last_modified
+        response["X-Sendfile" if offload == OFFLOAD_X_SENDFILE else "X-Accel-Redirect"] = \
+            file_path if offload_path is None else offload_path
+        return response
+
+    # range
+    byte_range = None
+    if request is not None:
+        if_range = request.headers.get("If-Range")
+        if (if_range is None) or (if_range == last_modified):
+            byte_range = _parse_range(request.headers.get("Range"), stat.st_size)
+
+    if byte_range == (None, None):
+        response = HttpResponse(status=416)
+        response["Content-Range"] = "bytes */%d" % stat.st_size
+        return response
+
+    f = open(file_path, "rb")
+    if byte_range is None:
+        response = _StreamingFileResponse(f)
+        _set_file_headers(response, file_name, content_length=stat.st_size)
+    else:
+        start, end = byte_range
+        response = _StreamingFileResponse(_FileRange(f, start, end - start + 1), status=206)
+        _set_file_headers(response, file_name, content_length=end - start + 1)
+        response["Content-Range"] = "bytes %d-%d/%d" % (start, end, stat.st_size)
+    response["Accept-Ranges"] = "bytes"
+    response["Last-Modified"] = last_modified
+    return response
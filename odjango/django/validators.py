@@ -1,12 +1,31 @@
+import functools
+import re
+
 from rest_framework.exceptions import ValidationError
 import pytz
-from pandas.tseries.frequencies import to_offset
+
+# <count><unit> (2min, 15D...): validity only depends on unit, which is checked once with pandas (larger counts are
+# parsed by pandas: they may overflow)
+_SIMPLE_FREQ_REGEX = re.compile(r"(\d{0,9})([A-Za-z]+)")
+_FREQ_CACHE_SIZE = 1024
+
+
+@functools.lru_cache(maxsize=1)
+def _get_timezones():
+    return frozenset(pytz.all_timezones)
+
+
+def _is_valid_timezone(timezone):
+    try:
+        return timezone in _get_timezones()
+    except TypeError:  # unhashable
+        return False
 
 
 def validate_timezone(timezone):
-    if timezone not in pytz.all_timezones:
+    if not _is_valid_timezone(timezone):
         raise ValidationError(
-            "Unknown timezone: '%s'. List of available timezones in pytz.all_timezones."% str(timezone))
+            "Unknown timezone: '%s'. List of available timezones in pytz.all_timezones." % str(timezone))
 
 
 def validate_timezone_allow_none(timezone):
@@ -15,11 +34,70 @@ def validate_timezone_allow_none(timezone):
     validate_timezone(timezone)
 
 
-def validate_freq(freqstr, allow_empty=False):
-    if allow_empty and freqstr == "":
-        return
+def _unique(values):
+    """
+    unique hashable values (first occurrence order), followed by unhashable values
+    """
+    unique, unhashable = {}, []
+    for value in values:
+        try:
+            unique[value] = None
+        except TypeError:
+            unhashable.append(value)
+    return list(unique) + unhashable
+
+
+def validate_timezones(timezones, allow_none=False):
+    """
+    validates a whole column (iterable) of timezones, each distinct value is checked once
+    """
+    for timezone in _unique(timezones):
+        if allow_none and (timezone is None):
+            continue
+        validate_timezone(timezone)
+
+
+def _parse_freq(freqstr):
+    """
+    Returns
+    -------
+    True if pandas can parse freq, False if it raises ValueError
+    """
+    from pandas.tseries.frequencies import to_offset  # heavy, imported on first use
     try:
         to_offset(freqstr)
     except ValueError:
+        return False
+    return True
+
+
+_parse_freq_cached = functools.lru_cache(maxsize=_FREQ_CACHE_SIZE)(_parse_freq)
+
+
+@functools.lru_cache(maxsize=_FREQ_CACHE_SIZE)
+def _is_valid_freq_str(freqstr):
+    match = _SIMPLE_FREQ_REGEX.fullmatch(freqstr)
+    if match is not None:
+        return _parse_freq_cached(match.group(2))
+    return _parse_freq_cached(freqstr)
+
+
+def _is_valid_freq(freqstr):
+    if isinstance(freqstr, str):
+        return _is_valid_freq_str(freqstr)
+    return _parse_freq(freqstr)
+
+
+def validate_freq(freqstr, allow_empty=False):
+    if allow_empty and freqstr == "":
+        return
+    if not _is_valid_freq(freqstr):
         raise ValidationError("Could not parse freq: '%s'." % freqstr)
 
+
+def validate_freqs(freqstrs, allow_empty=False):
+    """
+    validates a whole column (iterable) of freqs, each distinct value is checked once
+    """
+    for freqstr in _unique(freqstrs):
+        validate_freq(freqstr, allow_empty=allow_empty)
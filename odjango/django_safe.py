@@ -16,9 +16,12 @@ def collect_static():
     execute_from_command_line(["", "collectstatic", "--noinput"])
 
 
-def initialize_django_files(migrations=True, static=True):
+def initialize_django_files(migrations=True, static=True, from_snapshot=False):
     """
     only for sqlite config
+
+    from_snapshot: only for tests and demos, database is replaced by a snapshot of the migrated database (built on first
+        call, and each time migrations change, see odjango.django.snapshots)
     """
     # redirect stdout to logger
     with io.StringIO() as fo, io.StringIO() as fe:
@@ -28,7 +31,14 @@ def initialize_django_files(migrations=True, static=True):
         sys.stderr = fe
         try:
             # migrations
-            if migrations:
+            if migrations and from_snapshot:
+                from odjango.django.snapshots import restore_or_snapshot_db
+                print("Restoring database snapshot.")
+                if restore_or_snapshot_db(lambda: apply_migrations(no_input=True)):
+                    print("Database snapshot has been restored.\n")
+                else:
+                    print("Migrations have been applied, database snapshot has been created.\n")
+            elif migrations:
                 print("Applying migrations.")
                 apply_migrations(no_input=True)
                 print("Migrations have been applied.\n")
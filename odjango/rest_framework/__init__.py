@@ -1,14 +1,45 @@
-# !!! import order matters
-
-from .pagination import OPagination, OPaginationSerializer
-from .renderers import BrowsableAPIRenderer  # must be before viewsets
-from .filter import DatatablesFilterBackend, DatatablesFilterSerializer
-from .viewset import MultipleSerializerViewSet, PermissionViewSet, get_api_main_view
-from .rest import datatables_filter_paginate_respond_from_iterable, filter_paginate_respond_from_queryset,\
-    get_object_bypass_filters
-from .clients import propagate_client_errors
-from .serializers import OutilModelSerializer, NullableModelSerializer, NullableSerializerCharField, \
-    ScriptSerializerField
-from .inspectors import OAutoSchema
-from .decorators import doc_detail_route, doc_list_route
-from .mixins import PartialUpdateModelMixin, UpdateModelMixin
+"""
+Public api is resolved lazily (first attribute access imports its module), so that importing odjango.rest_framework
+doesn't import heavy dependencies (coreapi schemas, renderers, oclients...).
+"""
+import importlib
+
+# name: module
+_LAZY_ATTRIBUTES = dict(
+    OPagination="pagination",
+    OPaginationSerializer="pagination",
+    BrowsableAPIRenderer="renderers",
+    DatatablesFilterBackend="filter",
+    DatatablesFilterSerializer="filter",
+    MultipleSerializerViewSet="viewset",
+    PermissionViewSet="viewset",
+    get_api_main_view="viewset",
+    datatables_filter_paginate_respond_from_iterable="rest",
+    filter_paginate_respond_from_queryset="rest",
+    get_object_bypass_filters="rest",
+    propagate_client_errors="clients",
+    OutilModelSerializer="serializers",
+    NullableModelSerializer="serializers",
+    NullableSerializerCharField="serializers",
+    ScriptSerializerField="serializers",
+    OAutoSchema="inspectors",
+    doc_detail_route="decorators",
+    doc_list_route="decorators",
+    PartialUpdateModelMixin="mixins",
+    UpdateModelMixin="mixins"
+)
+
+__all__ = list(_LAZY_ATTRIBUTES)
+
+
+def __getattr__(name):
+    module_name = _LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError("module '%s' has no attribute '%s'" % (__name__, name))
+    value = getattr(importlib.import_module("." + module_name, __name__), name)
+    globals()[name] = value  # next accesses don't go through __getattr__
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()).union(_LAZY_ATTRIBUTES))
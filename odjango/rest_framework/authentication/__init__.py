@@ -1 +1,2 @@
-from .expiring_token_authentication import ExpiringTokenAuthentication
\ No newline at end of file
+from .expiring_token_authentication import ExpiringTokenAuthentication
+from .signed_token_authentication import SignedTokenAuthentication, SignedToken
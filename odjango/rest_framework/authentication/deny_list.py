@@ -0,0 +1,124 @@
+import hashlib
+import logging
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DENY_LIST_REFRESH_SECONDS = 30
+DEFAULT_DENY_LIST_FALSE_POSITIVE_RATE = 0.001
+MIN_BLOOM_CAPACITY = 1024
+
+
+class BloomFilter:
+    """
+    Compact probabilistic set: membership tests may return false positives, never false negatives.
+    """
+    def __init__(self, capacity, false_positive_rate=DEFAULT_DENY_LIST_FALSE_POSITIVE_RATE):
+        capacity = max(capacity, 1)
+        self.bits_nb = max(8, int(-capacity * math.log(false_positive_rate) / (math.log(2) ** 2)))
+        self.hashes_nb = max(1, round(self.bits_nb / capacity * math.log(2)))
+        self.bits = bytearray((self.bits_nb + 7) // 8)
+
+    def _positions(self, value):
+        # double hashing (Kirsch-Mitzenmacher): one digest gives all positions
+        digest = hashlib.blake2b(value.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hashes_nb):
+            yield (h1 + i * h2) % self.bits_nb
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value):
+        for position in self._positions(value):
+            if not self.bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+
+class DenyList:
+    """
+    In-memory deny-list of revoked signed tokens (by jti).
+
+    The source of truth is the RevokedSignedToken table (odjango.rest_framework_app). It is loaded in a bloom
+    filter which is rebuilt every SIGNED_TOKEN_DENY_LIST_REFRESH_SECONDS, so the authentication hot path does not
+    touch the database. Only bloom filter hits (revoked tokens or rare false positives) are confirmed by an exact
+    lookup.
+
+    A token revoked by another process is therefore rejected by this process at most
+    SIGNED_TOKEN_DENY_LIST_REFRESH_SECONDS after its revocation.
+    """
+    def __init__(self):
+        self._bloom = None
+        self._loaded_at = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def get_refresh_seconds():
+        return getattr(settings, "SIGNED_TOKEN_DENY_LIST_REFRESH_SECONDS", DEFAULT_DENY_LIST_REFRESH_SECONDS)
+
+    def _is_stale(self):
+        return (self._loaded_at is None) or (time.monotonic() - self._loaded_at > self.get_refresh_seconds())
+
+    def refresh(self):
+        from odjango.rest_framework_app.models import RevokedSignedToken
+
+        jtis = list(RevokedSignedToken.objects.filter(expires_at__gt=timezone.now()).values_list("jti", flat=True))
+        bloom = BloomFilter(max(MIN_BLOOM_CAPACITY, 2 * len(jtis)))
+        for jti in jtis:
+            bloom.add(jti)
+        self._bloom, self._loaded_at = bloom, time.monotonic()
+
+    def _refresh_or_keep_previous(self):
+        try:
+            self.refresh()
+        except Exception:
+            if self._bloom is None:
+                raise
+            # database unavailable: keep on using previous filter, retry after next refresh period
+            logger.warning("Could not refresh signed tokens deny-list, keeping previous one", exc_info=True)
+            self._loaded_at = time.monotonic()
+
+    def _get_bloom(self):
+        if self._is_stale():
+            # only one thread reloads, the others keep on using the previous filter
+            if self._lock.acquire(blocking=self._bloom is None):
+                try:
+                    if self._is_stale():
+                        self._refresh_or_keep_previous()
+                finally:
+                    self._lock.release()
+        return self._bloom
+
+    def revoke(self, jti, expires_at):
+        from odjango.rest_framework_app.models import RevokedSignedToken
+
+        RevokedSignedToken.objects.get_or_create(jti=jti, defaults=dict(expires_at=expires_at))
+        bloom = self._get_bloom()
+        if bloom is not None:
+            bloom.add(jti)
+
+    def is_revoked(self, jti):
+        if jti not in self._get_bloom():
+            return False
+
+        from odjango.rest_framework_app.models import RevokedSignedToken
+        return RevokedSignedToken.objects.filter(jti=jti).exists()
+
+    def purge_expired(self):
+        """
+        Revoked tokens are useless once expired (signature check rejects them), we remove them from the table.
+        """
+        from odjango.rest_framework_app.models import RevokedSignedToken
+        deleted_nb, _ = RevokedSignedToken.objects.filter(expires_at__lte=timezone.now()).delete()
+        return deleted_nb
+
+
+deny_list = DenyList()
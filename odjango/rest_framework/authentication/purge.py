@@ -0,0 +1,71 @@
+import datetime as dt
+import logging
+import time
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from .expiring_token_authentication import DEFAULT_EXPIRY_TIME
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PURGE_CHUNK_SIZE = 1000
+
+# index on authtoken created, must be added by project migrations (authtoken is optional for odjango apps):
+# migrations.RunSQL(CREATE_CREATED_INDEX_SQL, reverse_sql=DROP_CREATED_INDEX_SQL), depending on authtoken migrations
+CREATED_INDEX_NAME = "odjango_authtoken_created_idx"
+CREATE_CREATED_INDEX_SQL = 'CREATE INDEX IF NOT EXISTS %s ON "authtoken_token" ("created")' % CREATED_INDEX_NAME
+DROP_CREATED_INDEX_SQL = "DROP INDEX IF EXISTS %s" % CREATED_INDEX_NAME
+
+
+def purge_expired_tokens(chunk_size=DEFAULT_PURGE_CHUNK_SIZE, max_duration=None, pause=0):
+    """
+    Deletes expired authtoken tokens by chunks (each chunk is a short transaction, so locks are not held long).
+    Chunks are iterated by keyset on 'created', so each select starts where the previous one stopped instead of
+    scanning already deleted rows again. Without an index on 'created' each select scans the whole table: project
+    must add it (see CREATE_CREATED_INDEX_SQL).
+
+    Can be called periodically (scheduler, cron...) or through the purge_expired_tokens management command.
+
+    Parameters
+    ----------
+    chunk_size: max number of tokens deleted per statement
+    max_duration: seconds, purge stops after current chunk once exceeded (None: no limit)
+    pause: seconds to sleep between chunks
+
+    Returns
+    -------
+    dict: deleted (nb of rows), chunks (nb of delete statements), duration (seconds), complete (bool)
+    """
+    start = time.monotonic()
+    cutoff = timezone.now() - dt.timedelta(
+        seconds=getattr(settings, "TOKEN_EXPIRY_TIME_SECONDS", DEFAULT_EXPIRY_TIME))
+
+    deleted, chunks, complete = 0, 0, False
+    last_created = None
+    while True:
+        qs = Token.objects.filter(created__lt=cutoff)
+        if last_created is not None:
+            qs = qs.filter(created__gte=last_created)
+        rows = list(qs.order_by("created").values_list("key", "created")[:chunk_size])
+        if len(rows) == 0:
+            complete = True
+            break
+        last_created = rows[-1][1]
+        chunk_deleted, _ = Token.objects.filter(key__in=[key for key, _ in rows], created__lt=cutoff).delete()
+        deleted += chunk_deleted
+        chunks += 1
+        if len(rows) < chunk_size:
+            complete = True
+            break
+        if (max_duration is not None) and (time.monotonic() - start > max_duration):
+            break
+        if pause > 0:
+            time.sleep(pause)
+
+    stats = dict(deleted=deleted, chunks=chunks, duration=time.monotonic() - start, complete=complete)
+    logger.info(
+        "Expired tokens purge: %(deleted)s tokens deleted in %(chunks)s chunks, %(duration).3fs "
+        "(complete: %(complete)s)", stats)
+    return stats
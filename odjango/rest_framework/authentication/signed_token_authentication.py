@@ -0,0 +1,74 @@
+import datetime as dt
+from django.conf import settings
+from django.utils.translation import ugettext_lazy as _
+from rest_framework import exceptions
+from rest_framework_simplejwt.authentication import JWTTokenUserAuthentication
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import Token
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from .expiring_token_authentication import DEFAULT_EXPIRY_TIME
+from .deny_list import deny_list
+
+DEFAULT_REFRESH_EXPIRY_TIME = 60*60*24*7  # 1 week
+REFRESH_EXP_CLAIM = "refresh_exp"
+
+
+class SignedToken(Token):
+    """
+    Stateless token: user id, expiry and jti are signed (see SIMPLE_JWT settings for algorithm and signing key).
+
+    Expiry: TOKEN_EXPIRY_TIME_SECONDS (same setting as ExpiringTokenAuthentication).
+    A token may be refreshed until SIGNED_TOKEN_REFRESH_EXPIRY_TIME_SECONDS after the initial login.
+    """
+    token_type = "signed"
+
+    @property
+    def lifetime(self):
+        return dt.timedelta(seconds=getattr(settings, "TOKEN_EXPIRY_TIME_SECONDS", DEFAULT_EXPIRY_TIME))
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token.set_exp(
+            REFRESH_EXP_CLAIM,
+            lifetime=dt.timedelta(
+                seconds=getattr(settings, "SIGNED_TOKEN_REFRESH_EXPIRY_TIME_SECONDS", DEFAULT_REFRESH_EXPIRY_TIME)))
+        return token
+
+    def verify(self):
+        super().verify()
+        if deny_list.is_revoked(self["jti"]):
+            raise TokenError(_("Token revoked."))
+
+    def refreshed(self):
+        """
+        returns a new token for the same user (old token must be revoked by caller)
+        """
+        self.check_exp(REFRESH_EXP_CLAIM)
+        token = self.__class__()
+        for claim, value in self.payload.items():
+            if claim in ("exp", "jti"):
+                continue
+            token[claim] = value
+        return token
+
+    def revoke(self):
+        deny_list.revoke(self["jti"], datetime_from_epoch(self["exp"]))
+
+
+class SignedTokenAuthentication(JWTTokenUserAuthentication):
+    """
+    Stateless alternative to ExpiringTokenAuthentication: tokens are verified by signature and expiry, revoked
+    tokens are checked against an in-memory deny-list. No database access is performed on the request hot path,
+    request.user is therefore a rest_framework_simplejwt.models.TokenUser (not a user model instance).
+
+    Requires odjango.rest_framework_app in INSTALLED_APPS (revoked tokens table).
+
+    Header: "Authorization: Bearer <token>" (see SIMPLE_JWT["AUTH_HEADER_TYPES"]).
+    """
+    def get_validated_token(self, raw_token):
+        try:
+            return SignedToken(raw_token)
+        except TokenError as e:
+            raise exceptions.AuthenticationFailed(e.args[0])
@@ -1,13 +1,17 @@
 import datetime as dt
 
-from rest_framework import parsers, renderers
+from rest_framework import parsers, renderers, exceptions, serializers
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.authtoken.views import ObtainAuthToken as ObtainAuthTokenBase
 from rest_framework.authtoken.models import Token
 from django.utils import timezone
 from django.conf import settings
+from django.db import connections, router
+from rest_framework_simplejwt.exceptions import TokenError
 from .expiring_token_authentication import DEFAULT_EXPIRY_TIME
+from .signed_token_authentication import SignedToken, SignedTokenAuthentication
 
 
 class LogoutToken(APIView):
@@ -21,21 +25,123 @@ class LogoutToken(APIView):
         return Response({'message': 'Successfully logged out'})
 
 
+def _get_or_rotate_token_key_postgresql(connection, user, expiry_seconds):
+    """
+    one atomic statement creates user token, or replaces it if expired, and returns its key. A valid token is not
+    updated (login doesn't write), nothing is returned: its key is then selected.
+    """
+    qn = connection.ops.quote_name
+    table = qn(Token._meta.db_table)
+    key_column = qn(Token._meta.get_field("key").column)
+    user_column = qn(Token._meta.get_field("user").column)
+    created_column = qn(Token._meta.get_field("created").column)
+    upsert_sql = (
+        "INSERT INTO {table} ({key}, {user}, {created}) VALUES (%s, %s, now()) "
+        "ON CONFLICT ({user}) DO UPDATE SET {key} = EXCLUDED.{key}, {created} = EXCLUDED.{created} "
+        "WHERE {table}.{created} < now() - %s * interval '1 second' "
+        "RETURNING {key}"
+    ).format(table=table, key=key_column, user=user_column, created=created_column)
+    select_sql = "SELECT {key} FROM {table} WHERE {user} = %s".format(table=table, key=key_column, user=user_column)
+    with connection.cursor() as cursor:
+        while True:
+            cursor.execute(upsert_sql, [Token.generate_key(), user.pk, expiry_seconds])
+            row = cursor.fetchone()
+            if row is None:
+                cursor.execute(select_sql, [user.pk])
+                row = cursor.fetchone()
+            if row is not None:  # else token was deleted (logout) in between, try again
+                return row[0]
+
+
+def get_or_rotate_token_key(user):
+    """
+    returns user token key, a new token is created if user has none or if it is expired
+    """
+    expiry_seconds = getattr(settings, "TOKEN_EXPIRY_TIME_SECONDS", DEFAULT_EXPIRY_TIME)
+    connection = connections[router.db_for_write(Token)]
+    if connection.vendor == "postgresql":
+        return _get_or_rotate_token_key_postgresql(connection, user, expiry_seconds)
+
+    token, created = Token.objects.get_or_create(user=user)
+    if not created:
+        # check if expired
+        if timezone.now() - token.created > dt.timedelta(seconds=expiry_seconds):
+            token.delete()
+            token = Token.objects.create(user=user)
+    return token.key
+
+
 class ObtainAuthToken(ObtainAuthTokenBase):
     def post(self, request, *args, **kwargs):
         serializer = self.serializer_class(data=request.data,
                                            context={'request': request})
         serializer.is_valid(raise_exception=True)
         user = serializer.validated_data['user']
-        token, created = Token.objects.get_or_create(user=user)
-        if not created:
-            # check if expired
-            if timezone.now() - token.created > dt.timedelta(
-                    seconds=getattr(settings, "TOKEN_EXPIRY_TIME_SECONDS", DEFAULT_EXPIRY_TIME)):
-                token.delete()
-                token = Token.objects.create(user=user)
-        return Response({'token': token.key})
+        return Response({'token': get_or_rotate_token_key(user)})
+
+
+class ObtainSignedToken(ObtainAuthTokenBase):
+    """
+    same as ObtainAuthToken, but returns a stateless SignedToken (nothing is written in database)
+    """
+    def post(self, request, *args, **kwargs):
+        serializer = self.serializer_class(data=request.data,
+                                           context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        user = serializer.validated_data['user']
+        return Response({'token': str(SignedToken.for_user(user))})
+
+
+class SignedTokenSerializer(serializers.Serializer):
+    token = serializers.CharField()
+
+    def validate_token(self, value):
+        try:
+            return SignedToken(value)
+        except TokenError as e:
+            raise exceptions.AuthenticationFailed(e.args[0])
+
+
+class RefreshSignedToken(APIView):
+    """
+    exchanges a valid signed token against a new one (the old one is revoked)
+    """
+    throttle_classes = ()
+    permission_classes = ()
+    authentication_classes = ()
+    parser_classes = (parsers.FormParser, parsers.MultiPartParser, parsers.JSONParser,)
+    renderer_classes = (renderers.JSONRenderer,)
+    serializer_class = SignedTokenSerializer
+
+    def post(self, request, *args, **kwargs):
+        serializer = self.serializer_class(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        token = serializer.validated_data['token']
+        try:
+            new_token = token.refreshed()
+        except TokenError as e:
+            raise exceptions.AuthenticationFailed(e.args[0])
+        token.revoke()
+        return Response({'token': str(new_token)})
+
+
+class LogoutSignedToken(APIView):
+    """
+    revokes the signed token the request is authenticated with
+    """
+    throttle_classes = ()
+    authentication_classes = (SignedTokenAuthentication,)
+    permission_classes = (IsAuthenticated,)
+    parser_classes = (parsers.FormParser, parsers.MultiPartParser, parsers.JSONParser,)
+    renderer_classes = (renderers.JSONRenderer,)
+
+    def get(self, request, *args, **kwargs):
+        request.auth.revoke()
+        return Response({'message': 'Successfully logged out'})
 
 
 obtain_auth_token = ObtainAuthToken.as_view()
 logout_token = LogoutToken.as_view()
+obtain_signed_token = ObtainSignedToken.as_view()
+refresh_signed_token = RefreshSignedToken.as_view()
+logout_signed_token = LogoutSignedToken.as_view()
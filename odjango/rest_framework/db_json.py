@@ -0,0 +1,178 @@
+"""
+Database-side JSON rendering of list pages (postgresql).
+
+For serializers that only render plain model columns and simple foreign keys ids, postgresql builds the page json
+(json_build_object/json_agg over the sliced queryset, aggregated in queryset order): no model instantiation, no
+serialization, no json encoding in python. Eligibility is strict (see get_db_json_columns), anything else falls back to
+the normal serialization path.
+
+Eligible serializer fields (exact classes, source is a concrete field of serializer model):
+    CharField on char/text columns ("" rendered as null for NullableCharField, NullableTextField and ScriptField)
+    NullableSerializerCharField, ScriptSerializerField on char/text columns ("" rendered as null)
+    IntegerField on integer columns
+    BooleanField on boolean columns
+    UUIDField (hex_verbose format) on uuid columns
+    PrimaryKeyRelatedField (without pk_field) on foreign keys to integer or uuid columns
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connections
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from rest_framework import serializers
+
+from odjango.django.fields import NullableCharField, NullableTextField
+from .serializers import NullableSerializerCharField, ScriptSerializerField, OutilModelSerializer
+
+INTEGER_TYPES = ("AutoField", "BigAutoField", "SmallAutoField", "IntegerField", "BigIntegerField",
+                 "SmallIntegerField", "PositiveIntegerField", "PositiveSmallIntegerField", "PositiveBigIntegerField")
+TEXT_TYPES = ("CharField", "TextField")
+BOOLEAN_TYPES = ("BooleanField", "NullBooleanField")
+
+KIND_VALUE = "value"
+KIND_NULLIF = "nullif"
+
+ROW_NUMBER_ALIAS = "odjango_row_number"
+
+
+def _get_kind(field, model):
+    """
+    Returns
+    -------
+    (model field, kind) if field is eligible, else None
+    """
+    if (field.source == "*") or (len(field.source_attrs) != 1):
+        return None
+    try:
+        model_field = model._meta.get_field(field.source_attrs[0])
+    except FieldDoesNotExist:
+        return None
+    if not model_field.concrete:
+        return None
+
+    field_class = type(field)
+    if model_field.is_relation:
+        if (field_class is serializers.PrimaryKeyRelatedField) and (field.pk_field is None) and \
+                (model_field.many_to_one or model_field.one_to_one) and \
+                (model_field.target_field.get_internal_type() in INTEGER_TYPES + ("UUIDField", )):
+            return model_field, KIND_VALUE
+        return None
+
+    internal_type = model_field.get_internal_type()
+    if (field_class in (serializers.CharField, NullableSerializerCharField, ScriptSerializerField)) and \
+            (internal_type in TEXT_TYPES):
+        # "" is rendered as null by nullable serializer fields, or loaded as None by nullable model fields
+        nullable = (field_class is not serializers.CharField) or \
+            isinstance(model_field, (NullableCharField, NullableTextField))
+        return model_field, KIND_NULLIF if nullable else KIND_VALUE
+    if (field_class is serializers.IntegerField) and (internal_type in INTEGER_TYPES):
+        return model_field, KIND_VALUE
+    if (field_class is serializers.BooleanField) and (internal_type in BOOLEAN_TYPES):
+        return model_field, KIND_VALUE
+    if (field_class is serializers.UUIDField) and (field.uuid_format == "hex_verbose") and \
+            (internal_type == "UUIDField"):
+        return model_field, KIND_VALUE
+    return None
+
+
+def get_db_json_columns(serializer):
+    """
+    Parameters
+    ----------
+    serializer: serializer instance (fields may depend on its context), or class (instantiated without context)
+
+    Returns
+    -------
+    ((key, model field, kind), ...) if serializer is eligible to database json rendering, else None
+    """
+    serializer_cls = serializer if isinstance(serializer, type) else type(serializer)
+    if not issubclass(serializer_cls, serializers.ModelSerializer):
+        return None
+    if serializer_cls.to_representation not in (
+            serializers.Serializer.to_representation, OutilModelSerializer.to_representation):
+        return None
+    if isinstance(serializer, type):
+        serializer = serializer()
+    model = serializer_cls.Meta.model
+    columns = []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        kind = _get_kind(field, model)
+        if kind is None:
+            return None
+        model_field, kind = kind
+        columns.append((name, model_field, kind))
+    return tuple(columns) if len(columns) > 0 else None
+
+
+def _is_trivial_queryset(queryset):
+    query = queryset.query
+    return (queryset._fields is None) and (query.combinator is None) and (not query.distinct) and \
+        (len(query.extra) == 0) and (len(query.annotations) == 0)
+
+
+def _get_order_by(query):
+    """
+    Returns
+    -------
+    ordering expressions of query, None if it can't be reproduced (random, extra tables...) or query is not ordered
+    """
+    ordering = query.order_by or (query.get_meta().ordering if query.default_ordering else ())
+    if (len(query.extra_order_by) > 0) or (len(ordering) == 0):
+        return None
+    order_by = []
+    for item in ordering:
+        if isinstance(item, str):
+            if (item == "?") or ("." in item):
+                return None
+            expression = F(item.lstrip("-+"))
+            item = expression.desc() if item.startswith("-") else expression.asc()
+        elif not hasattr(item, "resolve_expression"):
+            return None
+        order_by.append(item)
+    return order_by
+
+
+def get_page_json(request, page, serializer_cls, context=None):
+    """
+    Parameters
+    ----------
+    page: sliced queryset (not evaluated)
+    context: serializer context (fields may depend on it)
+
+    Returns
+    -------
+    json text of serialized page (list), None if database rendering is not possible (caller must fall back)
+    """
+    accepted_renderer = getattr(request, "accepted_renderer", None)
+    if (accepted_renderer is None) or (accepted_renderer.format != "json"):
+        return None
+    if not hasattr(page, "query"):  # already evaluated
+        return None
+    connection = connections[page.db]
+    if (connection.vendor != "postgresql") or (not _is_trivial_queryset(page)):
+        return None
+    order_by = _get_order_by(page.query)
+    if order_by is None:
+        return None
+    try:
+        columns = get_db_json_columns(serializer_cls(context=context))
+    except Exception:
+        # normal serialization path reports errors
+        return None
+    if (columns is None) or (page.model is not serializer_cls.Meta.model):
+        return None
+
+    qn = connection.ops.quote_name
+    # json_agg doesn't keep subquery order: rows are numbered in queryset order (window is computed before LIMIT)
+    sql, params = page.annotate(**{ROW_NUMBER_ALIAS: Window(RowNumber(), order_by=order_by)}).values(
+        *[model_field.attname for _, model_field, _ in columns], ROW_NUMBER_ALIAS).query.sql_with_params()
+    items = []
+    for _, model_field, kind in columns:
+        column = "page.%s" % qn(model_field.column)
+        items.append("%%s, %s" % (column if kind == KIND_VALUE else "NULLIF(%s, '')" % column))
+    page_sql = "SELECT COALESCE(json_agg(json_build_object(%s) ORDER BY page.%s), '[]'::json)::text " \
+        "FROM (%s) page" % (", ".join(items), qn(ROW_NUMBER_ALIAS), sql)
+    with connection.cursor() as cursor:
+        cursor.execute(page_sql, [key for key, _, _ in columns] + list(params))
+        return cursor.fetchone()[0]
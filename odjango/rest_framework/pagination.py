@@ -1,6 +1,8 @@
+import json
 import logging
 from collections import OrderedDict
 
+from django.http import HttpResponse
 from rest_framework.pagination import BasePagination
 from rest_framework.response import Response
 from rest_framework import serializers
@@ -104,15 +106,27 @@ class OPagination(BasePagination):
 
         return self._filter_data(queryset)
 
-    def get_paginated_response(self, data):
-        # fixme: add page num and number of records returned (max and current page)
-        return Response(OrderedDict([
+    def _get_response_header(self):
+        return OrderedDict([
             ("draw", self.draw),
             ("recordsTotal", self.records_total),
             ("recordsFiltered", self.records_filtered),
-            ("start", self.start),
-            ("data", data)
-        ]))
+            ("start", self.start)
+        ])
+
+    def get_paginated_response(self, data):
+        # fixme: add page num and number of records returned (max and current page)
+        content = self._get_response_header()
+        content["data"] = data
+        return Response(content)
+
+    def get_json_paginated_response(self, data_json):
+        """
+        data_json: json text of data (already rendered, see db_json module), response is not rendered by rest_framework
+        """
+        header = json.dumps(self._get_response_header())
+        content = '%s, "data": %s}' % (header[:-1], data_json)
+        return HttpResponse(content.encode("utf-8"), content_type="application/json")
 
     def to_html(self):
         raise RuntimeError('not implemented')
@@ -1,5 +1,6 @@
 from rest_framework.generics import get_object_or_404
 
+from .db_json import get_page_json
 from .filter import DatatablesFilterBackend
 from .pagination import OPagination
 
@@ -46,7 +47,11 @@ def get_object_bypass_filters(view, bypass_all=False):
     return instance
 
 
-def filter_paginate_respond_from_queryset(view, queryset, serializer_cls, filtering_view_cls=None):
+def filter_paginate_respond_from_queryset(view, queryset, serializer_cls, filtering_view_cls=None, db_json=False):
+    """
+    db_json: if True, page json is built by postgresql when serializer and queryset are simple enough (see db_json
+        module), normal serialization is used otherwise
+    """
     # filter if filtering_view_cls is given
     if filtering_view_cls is not None:
         for backend in list(filtering_view_cls.filter_backends):
@@ -54,6 +59,10 @@ def filter_paginate_respond_from_queryset(view, queryset, serializer_cls, filter
 
     # paginate (see mixins.ListViewSet)
     page = view.paginate_queryset(queryset)
+    if db_json and isinstance(view.paginator, OPagination):
+        page_json = get_page_json(view.request, page, serializer_cls, context=view.get_serializer_context())
+        if page_json is not None:
+            return view.paginator.get_json_paginated_response(page_json)
     serializer = serializer_cls(page, many=True)
     return view.get_paginated_response(serializer.data)
 
@@ -1,6 +1,12 @@
+import keyword
+from collections.abc import Mapping
+
+from django.core.exceptions import FieldDoesNotExist
 from rest_framework import serializers
+from rest_framework.fields import SkipField
+from rest_framework.relations import PKOnlyObject
 from odjango.django import NullableCharField as NullableCharModelField, NullableTextField as NullableTextModelField, \
-    ScriptField as ScriptModelField
+    ScriptField as ScriptModelField, CompressedScriptField as CompressedScriptModelField
 
 
 class NullableSerializerCharField(serializers.CharField):
@@ -37,7 +43,8 @@ mapping = serializers.ModelSerializer.serializer_field_mapping.copy()
 mapping.update({
         NullableCharModelField: NullableSerializerCharField,
         NullableTextModelField: NullableSerializerCharField,
-        ScriptModelField: ScriptSerializerField
+        ScriptModelField: ScriptSerializerField,
+        CompressedScriptModelField: ScriptSerializerField
     })
 
 
@@ -45,5 +52,117 @@ class NullableModelSerializer(serializers.ModelSerializer):  # obsolete, use Out
     serializer_field_mapping = mapping
 
 
+def _nullable_str(value):
+    return str(value) or None
+
+
+# exact field classes whose to_representation is replaced by a plain function
+_CONVERTERS = {
+    serializers.CharField: str,
+    serializers.IntegerField: int,
+    serializers.FloatField: float,
+    NullableSerializerCharField: _nullable_str,
+    ScriptSerializerField: _nullable_str
+}
+_GENERIC = object()  # field.to_representation is called
+
+_compiled_readers = {}  # (serializer class, fields signature): read function
+
+
+def _read_with_drf(instance, field, ret):
+    """
+    same as rest_framework Serializer.to_representation loop body
+    """
+    try:
+        attribute = field.get_attribute(instance)
+    except SkipField:
+        return
+    check_for_none = attribute.pk if isinstance(attribute, PKOnlyObject) else attribute
+    ret[field.field_name] = None if check_for_none is None else field.to_representation(attribute)
+
+
+def _compile_field(field, model):
+    """
+    Returns
+    -------
+    (attname, converter) (converter: None for identity, _GENERIC, or function), None if field can't be compiled
+    """
+    if isinstance(field, (serializers.BaseSerializer, serializers.ManyRelatedField,
+                          serializers.SerializerMethodField)) or (len(field.source_attrs) != 1):
+        return None
+    try:
+        model_field = model._meta.get_field(field.source_attrs[0])
+    except FieldDoesNotExist:
+        return None
+    if (not model_field.concrete) or (not model_field.attname.isidentifier()) or keyword.iskeyword(
+            model_field.attname):
+        return None
+    if model_field.is_relation:
+        if (type(field) is serializers.PrimaryKeyRelatedField) and (field.pk_field is None) and \
+                (model_field.many_to_one or model_field.one_to_one):
+            return model_field.attname, None
+        return None
+    if type(field).get_attribute is not serializers.Field.get_attribute:
+        # custom attribute lookup (may not read model attribute)
+        return None
+    if (type(field) is serializers.UUIDField) and (field.uuid_format == "hex_verbose"):
+        return model_field.attname, str
+    return model_field.attname, _CONVERTERS.get(type(field), _GENERIC)
+
+
+def _compile_reader(fields, model):
+    """
+    generates read(instance, fields) -> dict, with one flat statement per field
+    """
+    namespace = dict(_read_with_drf=_read_with_drf)
+    lines = ["def read(instance, fields):", "    ret = {}"]
+    for i, field in enumerate(fields):
+        compiled = _compile_field(field, model)
+        if compiled is None:
+            lines.append("    _read_with_drf(instance, fields[%d], ret)" % i)
+            continue
+        attname, converter = compiled
+        if converter is None:
+            lines.append("    ret[%r] = instance.%s" % (field.field_name, attname))
+            continue
+        if converter is _GENERIC:
+            expression = "fields[%d].to_representation(value)" % i
+        else:
+            namespace["convert_%d" % i] = converter
+            expression = "convert_%d(value)" % i
+        lines.append("    value = instance.%s" % attname)
+        lines.append("    ret[%r] = None if value is None else %s" % (field.field_name, expression))
+    lines.append("    return ret")
+    exec("\n".join(lines), namespace)
+    return namespace["read"]
+
+
 class OutilModelSerializer(serializers.ModelSerializer):
+    """
+    compiled_read = True (opt-in): to_representation uses a read function generated once per serializer class (and
+    fields set), building plain dicts with direct attribute access for model columns and simple foreign keys ids.
+    Other fields (nested serializers, method fields, dotted sources...) are read by rest_framework.
+    """
     serializer_field_mapping = mapping
+    compiled_read = False
+
+    def _get_compiled_reader(self):
+        fields = tuple(self._readable_fields)
+        key = (type(self), tuple(
+            (f.field_name, type(f), f.source, getattr(f, "uuid_format", None), getattr(f, "pk_field", None) is None)
+            for f in fields
+        ))
+        read = _compiled_readers.get(key)
+        if read is None:
+            read = _compile_reader(fields, self.Meta.model)
+            _compiled_readers[key] = read
+        return read, fields
+
+    def to_representation(self, instance):
+        if (not self.compiled_read) or isinstance(instance, Mapping):
+            return super().to_representation(instance)
+        compiled = self.__dict__.get("_compiled_reader")
+        if compiled is None:
+            compiled = self._compiled_reader = self._get_compiled_reader()
+        read, fields = compiled
+        return read(instance, fields)
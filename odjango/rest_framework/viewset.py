@@ -1,23 +1,111 @@
+import logging
 from collections import OrderedDict
 
 from rest_framework.viewsets import GenericViewSet
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from django import __version__ as django_version
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
 
-from odjango.django import build_absolute_path
+from odjango.django import build_absolute_path, CompressedScriptField
 
+logger = logging.getLogger(__name__)
 
 STANDARD_ACTIONS = ("create", "retrieve", "list", "update", "partial_update", "destroy")
 
+# model text fields that are deferred on list actions when list serializer doesn't render them (ScriptField,
+# NullableTextField...), other binary fields are not (they may be small: hashes, keys...)
+LARGE_FIELDS_CLASSES = (models.TextField, CompressedScriptField)
+
+_deferrable_fields = {}  # (serializer class, model, readable fields sources): fields names
+
+
+def _analyze_deferrable_fields(serializer, model):
+    """
+    Returns
+    -------
+    names of large fields of model that serializer doesn't render. Empty if serializer may read them anyway (source
+        '*', method fields, properties...): deferred fields would be loaded by one query per row.
+    """
+    large_fields = [f for f in model._meta.concrete_fields if isinstance(f, LARGE_FIELDS_CLASSES) and not f.primary_key]
+    if len(large_fields) == 0:
+        return ()
+
+    serializer_class = type(serializer)
+    used, uncertain = set(), []
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if field.source == "*":
+            uncertain.append(name)
+            continue
+        attr = field.source.split(".")[0]
+        used.add(attr)
+        try:
+            model._meta.get_field(attr)
+        except FieldDoesNotExist:
+            if not any(f.attname == attr for f in model._meta.concrete_fields):
+                uncertain.append(name)  # property or method, may read any field
+
+    deferrable = tuple(f.name for f in large_fields if (f.name not in used) and (f.attname not in used))
+    if (len(deferrable) > 0) and (len(uncertain) > 0):
+        logger.warning(
+            "%s fields %s may read fields %s of %s model: they are not deferred on list action (deferral would load "
+            "them with one query per row). Set defer_list_large_fields = False to silence this warning.",
+            serializer_class.__name__, ", ".join(uncertain), ", ".join(deferrable), model.__name__
+        )
+        return ()
+    return deferrable
+
+
+def get_deferrable_fields(serializer_class, model, get_serializer=None):
+    """
+    cached per (serializer class, model, names and sources of serializer readable fields)
+
+    get_serializer: callable returning a serializer instance with its context (fields may depend on request), default:
+        serializer_class(). If it raises, nothing is deferred.
+    """
+    try:
+        serializer = serializer_class() if get_serializer is None else get_serializer()
+        sources = tuple((name, field.source) for name, field in serializer.fields.items() if not field.write_only)
+    except Exception:
+        logger.warning(
+            "Could not analyze %s fields, large fields are not deferred on list action.",
+            serializer_class.__name__, exc_info=True)
+        return ()
+    key = (serializer_class, model, sources)
+    deferrable = _deferrable_fields.get(key)
+    if deferrable is None:
+        deferrable = _analyze_deferrable_fields(serializer, model)
+        _deferrable_fields[key] = deferrable
+    return deferrable
+
 
 class MultipleSerializerViewSet(GenericViewSet):
     """
     user mixins: from rest_framework.viewsets import mixins
+
+    list action: large text fields (TextField, CompressedScriptField and subclasses) that list serializer doesn't
+    render are deferred (see get_deferrable_fields), unless defer_list_large_fields is False
     """
     flat_serializer_class = None
     retrieve_serializer_class = None
     list_serializer_class = None
+    defer_list_large_fields = True
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if (self.action != "list") or (not self.defer_list_large_fields) or (queryset._fields is not None):
+            # values() querysets can't be deferred
+            return queryset
+        serializer_class = self.get_serializer_class()
+        if serializer_class is None:
+            return queryset
+        deferrable = get_deferrable_fields(serializer_class, queryset.model, get_serializer=self.get_serializer)
+        if len(deferrable) > 0:
+            queryset = queryset.defer(*deferrable)
+        return queryset
 
     def get_serializer_class(self):
         if self.serializer_class is not None:
@@ -33,6 +121,9 @@ class MultipleSerializerViewSet(GenericViewSet):
 
 
 class PermissionViewSet(MultipleSerializerViewSet):
+    # actions whose reads may be sent to read replicas (see odjango.django.db.psycopg2_retries.routers)
+    replica_actions = ("list", "retrieve")
+
     # ------------------------------------- methods for dev to subclass ------------------------------------------------
     def perm_action_ok(self):
         """
@@ -127,6 +218,23 @@ class PermissionViewSet(MultipleSerializerViewSet):
         return self.perm_action_ok()
 
     # ---------------------------------------------- admin methods -----------------------------------------------------
+    def initial(self, request, *args, **kwargs):
+        # authentication and permissions checks are read on primary
+        super().initial(request, *args, **kwargs)
+        # psycopg2 free module: psycopg2 is only required by psycopg2_retries backend users
+        from odjango.django.db.psycopg2_retries.replica_context import start_replica_context
+        self._replica_context_token = start_replica_context(
+            user_key=getattr(request.user, "pk", None),
+            reads_enabled=self.action in self.replica_actions
+        )
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = self.__dict__.pop("_replica_context_token", None)
+        if token is not None:
+            from odjango.django.db.psycopg2_retries.replica_context import stop_replica_context
+            stop_replica_context(token)
+        return super().finalize_response(request, response, *args, **kwargs)
+
     def get_queryset(self):
         q = super().get_queryset()
 
@@ -4,3 +4,4 @@ from django.apps import AppConfig
 class RestFrameworkAppConfig(AppConfig):
     name = "odjango.rest_framework_app"
     verbose_name = "Odjango django rest framework app"
+    default_auto_field = "django.db.models.AutoField"
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from odjango.django.fixtures import load_fixtures, DEFAULT_FIXTURES_BATCH_SIZE
+
+
+class Command(BaseCommand):
+    help = "Loads fixture files by bulk inserts, signals suppressed (existing rows are not updated)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("fixture_paths", nargs="+", help="fixture files paths")
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS, help="database alias")
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_FIXTURES_BATCH_SIZE,
+                            help="max number of objects per model held in memory")
+        parser.add_argument("--ignore-conflicts", action="store_true", help="skip rows that already exist")
+
+    def handle(self, *args, **options):
+        loaded_nb = load_fixtures(
+            options["fixture_paths"],
+            using=options["database"],
+            batch_size=options["batch_size"],
+            ignore_conflicts=options["ignore_conflicts"]
+        )
+        self.stdout.write("%s rows loaded from %s fixture(s)" % (loaded_nb, len(options["fixture_paths"])))
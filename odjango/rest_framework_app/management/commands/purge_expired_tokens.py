@@ -0,0 +1,30 @@
+from django.apps import apps
+from django.core.management.base import BaseCommand
+
+from odjango.rest_framework.authentication.purge import DEFAULT_PURGE_CHUNK_SIZE
+
+
+class Command(BaseCommand):
+    help = "Deletes expired authentication tokens by chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_PURGE_CHUNK_SIZE,
+                            help="max number of tokens deleted per statement")
+        parser.add_argument("--max-duration", type=float, default=None,
+                            help="seconds, purge stops after current chunk once exceeded")
+        parser.add_argument("--pause", type=float, default=0, help="seconds to sleep between chunks")
+
+    def handle(self, *args, **options):
+        if apps.is_installed("rest_framework.authtoken"):
+            from odjango.rest_framework.authentication.purge import purge_expired_tokens
+            stats = purge_expired_tokens(
+                chunk_size=options["chunk_size"],
+                max_duration=options["max_duration"],
+                pause=options["pause"]
+            )
+            self.stdout.write(
+                "authtoken: %(deleted)s expired tokens deleted in %(chunks)s chunks, %(duration).3fs "
+                "(complete: %(complete)s)" % stats)
+
+        from odjango.rest_framework.authentication.deny_list import deny_list
+        self.stdout.write("signed tokens: %s expired revoked tokens deleted" % deny_list.purge_expired())
@@ -0,0 +1,9 @@
+from django.db import models
+
+
+class RevokedSignedToken(models.Model):
+    """
+    Signed tokens revoked before their expiry (see odjango.rest_framework.authentication.SignedTokenAuthentication).
+    """
+    jti = models.CharField(max_length=255, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
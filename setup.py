@@ -16,6 +16,7 @@ setup(
     author_email="contact@openergy.fr",
     long_description=open("README.md").read(),
     install_requires=requirements,
+    python_requires=">=3.7",  # module __getattr__ (PEP 562), contextvars, time.time_ns
     url="https://github.com/openergy/odjango",
     classifiers=[
         "Programming Language :: Python",
@@ -23,7 +24,6 @@ setup(
         "Intended Audience :: Science/Research",
         "Natural Language :: French",
         "Operating System :: POSIX :: Linux",
-        "Programming Language :: Python :: 3.6",
         "Programming Language :: Python :: 3.7",
         "Programming Language :: Python :: 3.8",
         "Programming Language :: Python :: 3.9",
@@ -0,0 +1,15 @@
+"""
+Django settings of tests, configured once for all test modules (sqlite in-memory database).
+Test models are declared in test modules, in the testapp app (app_label = "testapp").
+"""
+import django
+from django.conf import settings
+
+if not settings.configured:
+    settings.configure(
+        INSTALLED_APPS=["django.contrib.contenttypes", "django.contrib.auth", "rest_framework",
+                        "rest_framework.authtoken", "odjango.rest_framework_app", "tests.testapp"],
+        DATABASES={"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}},
+        SECRET_KEY="odjango-tests"
+    )
+    django.setup()
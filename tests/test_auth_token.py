@@ -0,0 +1,45 @@
+import unittest
+from unittest import mock
+
+from odjango.rest_framework.authentication import views
+
+
+def get_connection(*rows):
+    connection = mock.MagicMock()
+    connection.ops.quote_name = lambda name: '"%s"' % name
+    cursor = connection.cursor.return_value.__enter__.return_value
+    cursor.fetchone.side_effect = rows
+    return connection, cursor
+
+
+class TestGetOrRotateTokenKeyPostgresql(unittest.TestCase):
+    user = mock.Mock(pk=3)
+
+    def test_created_or_rotated(self):
+        connection, cursor = get_connection(("new", ))
+        with mock.patch.object(views.Token, "generate_key", return_value="new"):
+            self.assertEqual(views._get_or_rotate_token_key_postgresql(connection, self.user, 60), "new")
+        (sql, params), = [call.args for call in cursor.execute.call_args_list]
+        self.assertEqual(
+            sql,
+            'INSERT INTO "authtoken_token" ("key", "user_id", "created") VALUES (%s, %s, now()) '
+            'ON CONFLICT ("user_id") DO UPDATE SET "key" = EXCLUDED."key", "created" = EXCLUDED."created" '
+            'WHERE "authtoken_token"."created" < now() - %s * interval \'1 second\' '
+            'RETURNING "key"')
+        self.assertEqual(params, ["new", 3, 60])
+
+    def test_valid_token_is_selected(self):
+        connection, cursor = get_connection(None, ("valid", ))
+        self.assertEqual(views._get_or_rotate_token_key_postgresql(connection, self.user, 60), "valid")
+        self.assertEqual(
+            cursor.execute.call_args.args,
+            ('SELECT "key" FROM "authtoken_token" WHERE "user_id" = %s', [3]))
+
+    def test_token_deleted_in_between(self):
+        connection, cursor = get_connection(None, None, ("new", ))
+        self.assertEqual(views._get_or_rotate_token_key_postgresql(connection, self.user, 60), "new")
+        self.assertEqual(cursor.execute.call_count, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,168 @@
+import contextlib
+import io
+import unittest
+from unittest import mock
+
+from django.contrib.postgres.fields import ArrayField
+from django.db import models
+from psycopg2 import OperationalError
+from psycopg2.extensions import Binary
+from psycopg2.extras import Json
+
+from odjango.django.db.psycopg2_retries import bulk
+from odjango.django.db.psycopg2_retries.base import CursorWithRetries
+from odjango.django.db.psycopg2_retries.retries import Retrier, RetryPolicy
+
+
+class BulkSample(models.Model):
+    name = models.CharField(max_length=20)
+    data = models.BinaryField(null=True)
+
+    class Meta:
+        app_label = "testapp"
+
+
+class BulkArraySample(models.Model):
+    tags = ArrayField(models.CharField(max_length=20))
+
+    class Meta:
+        app_label = "testapp"
+
+
+def get_retrier():
+    return Retrier(RetryPolicy(base_delay=0, failure_threshold=100))
+
+
+class StubCursor:
+    """
+    copy_expert, copy_from and executemany record loaded data, first calls may fail
+    """
+    def __init__(self, failures_nb=0):
+        self.failures_nb = failures_nb
+        self.copied = []
+        self.executed = []
+
+    def _fail(self):
+        if self.failures_nb > 0:
+            self.failures_nb -= 1
+            raise OperationalError("lost")
+
+    def copy_expert(self, sql, file):
+        data = file.read()
+        self._fail()
+        self.copied.append((sql, data))
+
+    def copy_from(self, file, table):
+        self.copy_expert(table, file)
+
+    def executemany(self, sql, param_list):
+        params = list(param_list)
+        self._fail()
+        self.executed.append((sql, params))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+class TestBulkLoad(unittest.TestCase):
+    def setUp(self):
+        self.cursor = StubCursor()
+        connection = mock.MagicMock(in_atomic_block=False, retrier=get_retrier())
+        connection.ops.quote_name = lambda name: '"%s"' % name
+        connection.connection.cursor.return_value = self.cursor
+        self.connection = connection
+        self.values = []
+        for patcher in (
+                mock.patch.object(bulk, "connections", {"default": connection}),
+                mock.patch.object(bulk.transaction, "atomic", lambda using: contextlib.nullcontext()),
+                mock.patch.object(bulk, "execute_values", lambda cursor, sql, batch, page_size: self.values.append(
+                    (sql, batch)))):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_to_copy_text(self):
+        self.assertEqual(bulk._to_copy_text("a\tb\\"), "a\\tb\\\\")
+        self.assertEqual(bulk._to_copy_text(None), "\\N")
+        self.assertEqual(bulk._to_copy_text(Binary(b"\x01\xff")), "\\\\x01ff")
+        self.assertEqual(bulk._to_copy_text(Json({"a": "\n"})), '{"a": "\\\\n"}')
+        self.assertRaises(TypeError, bulk._to_copy_text, [1, 2])
+
+    def test_copy_batches(self):
+        rows = (("a%s" % i, i) for i in range(5))
+        self.assertEqual(bulk.bulk_load("t", rows, columns=["name", "nb"], method="copy", batch_size=2), 5)
+        self.assertEqual(
+            self.cursor.copied,
+            [('COPY "t" ("name", "nb") FROM STDIN', "a0\t0\na1\t1\n"),
+             ('COPY "t" ("name", "nb") FROM STDIN', "a2\t2\na3\t3\n"),
+             ('COPY "t" ("name", "nb") FROM STDIN', "a4\t4\n")])
+
+    def test_auto_method(self):
+        bulk.bulk_load("t", [("a", 1)], columns=["name", "nb"], copy_threshold=2)
+        self.assertEqual(self.values, [('INSERT INTO "t" ("name", "nb") VALUES %s', [("a", 1)])])
+        bulk.bulk_load("t", [("b", 1), ("c", 2)], columns=["name", "nb"], copy_threshold=2)
+        self.assertEqual(len(self.cursor.copied), 1)
+
+    def test_model_binary_copy(self):
+        self.connection.Database.Binary = Binary  # BinaryField database value is a psycopg2 adapter
+        bulk.bulk_load(BulkSample, [dict(name="a", data=b"\x00")], method="copy")
+        self.assertEqual(
+            self.cursor.copied, [('COPY "testapp_bulksample" ("name", "data") FROM STDIN', "a\t\\\\x00\n")])
+
+    def test_values_copy_can_not_encode(self):
+        # model fields: checked before anything is written
+        with self.assertRaises(ValueError):
+            bulk.bulk_load(BulkArraySample, [dict(tags=["a"])], method="copy")
+        bulk.bulk_load(BulkArraySample, [dict(tags=["a"])] * 3, copy_threshold=2)
+        self.assertEqual(len(self.values), 1)
+
+        # table rows: auto method falls back to values for the batch
+        self.values.clear()
+        bulk.bulk_load("t", [(["a"], ), (["b"], )], columns=["tags"], copy_threshold=2)
+        self.assertEqual((len(self.cursor.copied), len(self.values)), (0, 1))
+        self.assertRaises(TypeError, bulk.bulk_load, "t", [(["a"], )], columns=["tags"], method="copy")
+        self.assertEqual(len(self.cursor.copied), 0)
+
+    def test_batch_replayed_after_failure(self):
+        self.cursor.failures_nb = 1
+        self.assertEqual(bulk.bulk_load("t", [("a", 1)], columns=["name", "nb"], method="copy"), 1)
+        self.assertEqual(self.cursor.copied, [('COPY "t" ("name", "nb") FROM STDIN', "a\t1\n")])
+        self.connection.close.assert_called_once_with()
+
+
+class TestCursorWithRetries(unittest.TestCase):
+    def get_cursor(self, failures_nb):
+        self.stub_cursor = StubCursor(failures_nb)
+        database = mock.Mock(alias="default", retrier=get_retrier())
+        database.dev_create_cursor.return_value = self.stub_cursor
+        return CursorWithRetries(self.stub_cursor, database, None)
+
+    def test_executemany(self):
+        cursor = self.get_cursor(failures_nb=1)
+        cursor.executemany("INSERT", ((i, ) for i in range(3)))
+        # generator was materialized, so it is replayed entirely
+        self.assertEqual(self.stub_cursor.executed, [("INSERT", [(0, ), (1, ), (2, )])])
+        cursor.db.close.assert_called_once_with()
+
+    def test_copy_rewinds_stream(self):
+        for method in ("copy_from", "copy_expert"):
+            with self.subTest(method):
+                cursor = self.get_cursor(failures_nb=1)
+                file = io.StringIO("skipped\n1\n2\n")
+                file.readline()
+                if method == "copy_from":
+                    cursor.copy_from(file, "t")
+                else:
+                    cursor.copy_expert("t", file)
+                self.assertEqual(self.stub_cursor.copied, [("t", "1\n2\n")])
+
+    def test_copy_not_seekable_not_retried(self):
+        cursor = self.get_cursor(failures_nb=1)
+        file = mock.Mock(read=lambda: "1\n", tell=mock.Mock(side_effect=io.UnsupportedOperation))
+        self.assertRaises(OperationalError, cursor.copy_expert, "COPY", file)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+import datetime as dt
+import decimal
+import unittest
+import uuid
+
+from django.contrib.auth.models import Group
+from django.db import models
+from rest_framework import serializers
+
+from odjango.django import NullableCharField, ScriptField
+from odjango.rest_framework import OutilModelSerializer, NullableSerializerCharField
+
+
+class CompiledSample(models.Model):
+    name = models.CharField(max_length=20)
+    count = models.IntegerField(null=True)
+    ratio = models.FloatField(null=True)
+    ref = models.UUIDField(default=uuid.uuid4)
+    created = models.DateTimeField(null=True)
+    active = models.BooleanField(default=True)
+    comment = NullableCharField(max_length=20, blank=True)
+    script = ScriptField(blank=True)
+    amount = models.DecimalField(max_digits=6, decimal_places=2, null=True)
+    parent = models.ForeignKey("self", null=True, on_delete=models.CASCADE)
+    group = models.ForeignKey(Group, null=True, on_delete=models.CASCADE)
+
+    @property
+    def label(self):
+        return self.name.upper()
+
+    class Meta:
+        app_label = "testapp"
+
+
+class AllSerializer(OutilModelSerializer):
+    class Meta:
+        model = CompiledSample
+        fields = "__all__"
+
+
+class MixedSerializer(OutilModelSerializer):
+    label = serializers.ReadOnlyField()
+    parent_name = serializers.CharField(source="parent.name", default=None)
+    doubled = serializers.SerializerMethodField()
+    hex_ref = serializers.UUIDField(source="ref", format="hex")
+    nullable_name = NullableSerializerCharField(source="name")
+    count_str = serializers.CharField(source="count")
+
+    class Meta:
+        model = CompiledSample
+        fields = ("id", "label", "parent", "parent_name", "doubled", "hex_ref", "nullable_name", "count_str", "script")
+
+    def get_doubled(self, obj):
+        return None if obj.count is None else obj.count * 2
+
+
+class DefaultCountField(serializers.IntegerField):
+    def get_attribute(self, instance):
+        value = super().get_attribute(instance)
+        return -1 if value is None else value
+
+
+class CustomAttributeSerializer(OutilModelSerializer):
+    count = DefaultCountField()
+
+    class Meta:
+        model = CompiledSample
+        fields = ("id", "count")
+
+
+def _compiled(serializer_class):
+    return type("Compiled" + serializer_class.__name__, (serializer_class, ), dict(compiled_read=True))
+
+
+def _get_instances():
+    parent = CompiledSample(id=1, name="parent", count=3, ratio=0.5, created=dt.datetime(2020, 1, 2, 3, 4, 5),
+                            comment="a comment", script="print(1)", amount=decimal.Decimal("1.50"), group_id=7)
+    child = CompiledSample(id=2, name="", count=None, ratio=None, active=False, comment="", parent=parent)
+    empty = CompiledSample(name="x")
+    return [parent, child, empty]
+
+
+class TestCompiledSerializer(unittest.TestCase):
+    def assert_parity(self, serializer_class):
+        instances = _get_instances()
+        expected = serializer_class(instances, many=True).data
+        compiled = _compiled(serializer_class)(instances, many=True).data
+        self.assertEqual(expected, compiled)
+        for instance in instances:
+            self.assertEqual(serializer_class(instance).data, _compiled(serializer_class)(instance).data)
+        return compiled
+
+    def test_all_fields(self):
+        data = self.assert_parity(AllSerializer)
+        self.assertIsNone(data[1]["comment"])
+        self.assertEqual(data[0]["group"], 7)
+        self.assertEqual(data[1]["parent"], 1)
+
+    def test_mixed_fields(self):
+        data = self.assert_parity(MixedSerializer)
+        self.assertEqual(data[0]["label"], "PARENT")
+        self.assertEqual(data[1]["parent_name"], "parent")
+        self.assertIsNone(data[1]["nullable_name"])
+        self.assertEqual(list(data[0]), list(MixedSerializer.Meta.fields))
+
+    def test_custom_get_attribute(self):
+        data = self.assert_parity(CustomAttributeSerializer)
+        self.assertEqual(data[1]["count"], -1)
+
+    def test_mapping_instance(self):
+        instance = dict(id=3, label="L", parent=None, ref=uuid.uuid4(), name="n", count=1, script="")
+
+        class DictSerializer(MixedSerializer):
+            class Meta(MixedSerializer.Meta):
+                fields = ("id", "label", "hex_ref", "nullable_name", "count_str")
+        self.assertEqual(DictSerializer(instance).data, _compiled(DictSerializer)(instance).data)
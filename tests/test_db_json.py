@@ -0,0 +1,176 @@
+import unittest
+import uuid
+from unittest import mock
+
+from django.contrib.auth.models import Group
+from django.db import connection, models
+from rest_framework import serializers
+
+from odjango.django import NullableCharField, ScriptField
+from odjango.rest_framework import OutilModelSerializer
+from odjango.rest_framework import db_json
+from odjango.rest_framework.db_json import get_db_json_columns, get_page_json, KIND_VALUE, KIND_NULLIF
+
+
+class DbJsonSample(models.Model):
+    name = models.CharField(max_length=20)
+    count = models.IntegerField(null=True)
+    ratio = models.FloatField(null=True)
+    ref = models.UUIDField(default=uuid.uuid4)
+    created = models.DateTimeField(null=True)
+    active = models.BooleanField(default=True)
+    comment = NullableCharField(max_length=20, blank=True)
+    script = ScriptField(blank=True)
+    group = models.ForeignKey(Group, null=True, on_delete=models.CASCADE)
+
+    class Meta:
+        app_label = "testapp"
+
+
+class SimpleSerializer(OutilModelSerializer):
+    class Meta:
+        model = DbJsonSample
+        fields = ("id", "name", "count", "ref", "active", "comment", "script", "group")
+
+
+class TestDbJsonEligibility(unittest.TestCase):
+    def test_simple_serializer(self):
+        columns = get_db_json_columns(SimpleSerializer)
+        self.assertEqual(
+            [(key, model_field.column, kind) for key, model_field, kind in columns],
+            [("id", "id", KIND_VALUE), ("name", "name", KIND_VALUE), ("count", "count", KIND_VALUE),
+             ("ref", "ref", KIND_VALUE), ("active", "active", KIND_VALUE), ("comment", "comment", KIND_NULLIF),
+             ("script", "script", KIND_NULLIF), ("group", "group_id", KIND_VALUE)]
+        )
+
+    def test_ineligible_fields(self):
+        class FloatSerializer(OutilModelSerializer):  # float formatting may differ
+            class Meta:
+                model = DbJsonSample
+                fields = ("id", "ratio")
+
+        class DateTimeSerializer(OutilModelSerializer):  # timezone and format are handled by rest_framework
+            class Meta:
+                model = DbJsonSample
+                fields = ("id", "created")
+
+        class MethodSerializer(OutilModelSerializer):
+            upper = serializers.SerializerMethodField()
+
+            class Meta:
+                model = DbJsonSample
+                fields = ("id", "upper")
+
+            def get_upper(self, obj):
+                return obj.name.upper()
+
+        class NestedSourceSerializer(OutilModelSerializer):
+            group_name = serializers.CharField(source="group.name")
+
+            class Meta:
+                model = DbJsonSample
+                fields = ("id", "group_name")
+
+        class HexSerializer(OutilModelSerializer):
+            ref = serializers.UUIDField(format="hex")
+
+            class Meta:
+                model = DbJsonSample
+                fields = ("id", "ref")
+
+        class CustomRepresentationSerializer(SimpleSerializer):
+            def to_representation(self, instance):
+                return super().to_representation(instance)
+
+        for serializer_cls in (FloatSerializer, DateTimeSerializer, MethodSerializer, NestedSourceSerializer,
+                               HexSerializer, CustomRepresentationSerializer):
+            with self.subTest(serializer_cls.__name__):
+                self.assertIsNone(get_db_json_columns(serializer_cls))
+
+
+class PlainCharSerializer(OutilModelSerializer):
+    comment = serializers.CharField()  # model field loads "" as None
+
+    class Meta:
+        model = DbJsonSample
+        fields = ("id", "comment")
+
+
+class ContextSerializer(OutilModelSerializer):
+    def get_fields(self):
+        fields = super().get_fields()
+        if not self.context["request"].user_is_admin:
+            fields.pop("name")
+        return fields
+
+    class Meta:
+        model = DbJsonSample
+        fields = ("id", "name")
+
+
+class StubConnection:
+    vendor = "postgresql"
+    ops = connection.ops
+
+    def __init__(self):
+        self.executed = []
+
+    def cursor(self):
+        stub = self
+
+        class Cursor:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *args):
+                pass
+
+            def execute(self, sql, params):
+                stub.executed.append((sql, params))
+
+            def fetchone(self):
+                return ["[]"]
+
+        return Cursor()
+
+
+class TestDbJsonPage(unittest.TestCase):
+    def get_page_sql(self, page, serializer_cls, context=None):
+        stub = StubConnection()
+        request = mock.Mock(accepted_renderer=mock.Mock(format="json"))
+        with mock.patch.object(db_json, "connections", {"default": stub}):
+            page_json = get_page_json(request, page, serializer_cls, context=context)
+        if page_json is None:
+            return None
+        self.assertEqual(page_json, "[]")
+        return stub.executed[0]
+
+    def test_nullable_model_field(self):
+        self.assertEqual([kind for _, _, kind in get_db_json_columns(PlainCharSerializer)], [KIND_VALUE, KIND_NULLIF])
+        sql, params = self.get_page_sql(DbJsonSample.objects.order_by("id")[:10], PlainCharSerializer)
+        self.assertIn("""json_build_object(%s, page."id", %s, NULLIF(page."comment", ''))""", sql)
+        self.assertEqual(params[:2], ["id", "comment"])
+
+    def test_order(self):
+        sql, params = self.get_page_sql(
+            DbJsonSample.objects.filter(name="x").order_by("-count", "id")[20:30], SimpleSerializer)
+        self.assertIn('ORDER BY page."odjango_row_number"', sql)
+        self.assertIn(
+            'ROW_NUMBER() OVER (ORDER BY "testapp_dbjsonsample"."count" DESC, "testapp_dbjsonsample"."id" ASC)', sql)
+        self.assertIn("LIMIT 10 OFFSET 20", sql)
+        self.assertEqual(params[-1], "x")
+
+        # not reproducible orderings
+        self.assertIsNone(self.get_page_sql(DbJsonSample.objects.order_by("?")[:10], SimpleSerializer))
+        self.assertIsNone(self.get_page_sql(DbJsonSample.objects.all()[:10], SimpleSerializer))
+
+    def test_serializer_context(self):
+        self.assertIsNone(self.get_page_sql(DbJsonSample.objects.order_by("id")[:10], ContextSerializer))  # fallback
+        for user_is_admin, keys in ((True, ["id", "name"]), (False, ["id"])):
+            context = dict(request=mock.Mock(user_is_admin=user_is_admin))
+            sql, params = self.get_page_sql(DbJsonSample.objects.order_by("id")[:10], ContextSerializer, context)
+            self.assertEqual(params[:len(keys)], keys)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import json
+import unittest
+import zlib
+
+from django.db import connection, models
+from django.db.models import OuterRef, Subquery
+
+from odjango.django import NullableCharField, NullableTextField, CompressedScriptField
+
+
+class NullIfSample(models.Model):
+    name = NullableCharField(max_length=20, blank=True, sql_nullif=True)
+    text = NullableTextField(blank=True, sql_nullif=True)
+    plain = NullableCharField(max_length=20, blank=True)
+
+    class Meta:
+        app_label = "testapp"
+
+
+class CompressedSample(models.Model):
+    script = CompressedScriptField(blank=True)
+
+    class Meta:
+        app_label = "testapp"
+
+
+class TestSqlNullIf(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        with connection.schema_editor() as editor:
+            editor.create_model(NullIfSample)
+
+    @classmethod
+    def tearDownClass(cls):
+        with connection.schema_editor() as editor:
+            editor.delete_model(NullIfSample)
+
+    def setUp(self):
+        NullIfSample.objects.all().delete()
+        self.empty = NullIfSample.objects.create(name=None, text=None, plain=None)
+        self.filled = NullIfSample.objects.create(name="a", text="t", plain="p")
+
+    def test_writes(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name, text, plain FROM %s ORDER BY id" % NullIfSample._meta.db_table)
+            self.assertEqual(cursor.fetchall(), [("", "", ""), ("a", "t", "p")])
+
+    def test_reads(self):
+        self.assertEqual(
+            list(NullIfSample.objects.order_by("id").values_list("name", "text", "plain")),
+            [(None, None, None), ("a", "t", "p")]
+        )
+        obj = NullIfSample.objects.get(pk=self.empty.pk)
+        self.assertEqual((obj.name, obj.text, obj.plain), (None, None, None))
+        self.assertEqual(NullIfSample._meta.get_field("name").get_db_converters(connection), [])
+
+    def test_filters(self):
+        self.assertEqual(NullIfSample.objects.filter(name=None).get().pk, self.empty.pk)
+        self.assertEqual(NullIfSample.objects.filter(name__in=NullIfSample.objects.values("name")).count(), 2)
+        same = Subquery(NullIfSample.objects.filter(pk=OuterRef("pk")).values("name"))
+        self.assertEqual(NullIfSample.objects.filter(name=same).count(), 2)
+        # outermost select is still wrapped
+        self.assertEqual(
+            list(NullIfSample.objects.annotate(same=same).order_by("id").values_list("same", flat=True)), [None, "a"])
+
+
+class TestCompressedScriptField(unittest.TestCase):
+    script = "def f():\n\treturn 'é'\n" * 100
+
+    @classmethod
+    def setUpClass(cls):
+        with connection.schema_editor() as editor:
+            editor.create_model(CompressedSample)
+
+    @classmethod
+    def tearDownClass(cls):
+        with connection.schema_editor() as editor:
+            editor.delete_model(CompressedSample)
+
+    def setUp(self):
+        CompressedSample.objects.all().delete()
+        self.obj = CompressedSample.objects.create(script=self.script)
+        self.empty = CompressedSample.objects.create(script=None)
+
+    def test_stored_compressed(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT script FROM %s ORDER BY id" % CompressedSample._meta.db_table)
+            (compressed, ), (empty, ) = cursor.fetchall()
+        self.assertLess(len(compressed), len(self.script))
+        self.assertEqual(zlib.decompress(compressed).decode("utf-8"), self.script.replace("\t", "    "))
+        self.assertEqual(bytes(empty), b"")
+
+    def test_round_trip(self):
+        obj = CompressedSample.objects.get(pk=self.obj.pk)
+        self.assertEqual(obj.script, self.script.replace("\t", "    "))
+        self.assertIsNone(CompressedSample.objects.get(pk=self.empty.pk).script)
+        obj.script = "updated"
+        obj.save()
+        self.assertEqual(CompressedSample.objects.get(pk=self.obj.pk).script, "updated")
+
+    def test_values(self):
+        values = list(CompressedSample.objects.order_by("id").values("script"))
+        self.assertEqual(values, [{"script": self.script.replace("\t", "    ")}, {"script": None}])
+        self.assertIs(type(values[0]["script"]), str)
+        json.dumps(values)
+        self.assertEqual(
+            list(CompressedSample.objects.order_by("id").values_list("script", flat=True))[0], values[0]["script"])
+
+
+if __name__ == "__main__":
+    unittest.main()
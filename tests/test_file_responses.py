@@ -0,0 +1,127 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+from django.test import RequestFactory
+
+from odjango.django.util import respond_stream_from_local_file, respond_file_from_bytes
+
+CONTENT = bytes(range(256)) * 1000
+
+
+class TestRespondStreamFromLocalFile(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.dir.name, "result.csv")
+        with open(self.file_path, "wb") as f:
+            f.write(CONTENT)
+        self.factory = RequestFactory()
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def _get(self, **headers):
+        response = respond_stream_from_local_file(self.file_path, request=self.factory.get("/", **headers))
+        content = b"".join(response.streaming_content) if response.streaming else response.content
+        response.close()
+        return response, content
+
+    def test_full(self):
+        response, content = self._get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(content, CONTENT)
+        self.assertEqual(response["Content-Length"], str(len(CONTENT)))
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertEqual(response["Content-Disposition"], "attachment; filename=result.csv")
+        self.assertEqual(response["Accept-Ranges"], "bytes")
+
+    def test_ranges(self):
+        for range_header, start, end in (
+                ("bytes=10-19", 10, 19),
+                ("bytes=100000-", 100000, len(CONTENT) - 1),
+                ("bytes=-5", len(CONTENT) - 5, len(CONTENT) - 1),
+                ("bytes=255990-999999", 255990, len(CONTENT) - 1)
+        ):
+            response, content = self._get(HTTP_RANGE=range_header)
+            self.assertEqual(response.status_code, 206)
+            self.assertEqual(content, CONTENT[start:end + 1])
+            self.assertEqual(response["Content-Length"], str(end - start + 1))
+            self.assertEqual(response["Content-Range"], "bytes %d-%d/%d" % (start, end, len(CONTENT)))
+
+    def test_ignored_ranges(self):
+        for headers in (
+                dict(HTTP_RANGE="bytes=0-1,5-6"),
+                dict(HTTP_RANGE="bytes=9-3"),
+                dict(HTTP_RANGE="lines=1-2"),
+                dict(HTTP_RANGE="bytes=0-1", HTTP_IF_RANGE="Thu, 01 Jan 1970 00:00:00 GMT")
+        ):
+            response, content = self._get(**headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(content, CONTENT)
+
+    def test_unsatisfiable_range(self):
+        response, _ = self._get(HTTP_RANGE="bytes=%d-" % len(CONTENT))
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response["Content-Range"], "bytes */%d" % len(CONTENT))
+
+    def test_offload(self):
+        response = respond_stream_from_local_file(
+            self.file_path, offload="x-accel-redirect", offload_path="/protected/result.csv")
+        self.assertEqual(response["X-Accel-Redirect"], "/protected/result.csv")
+        self.assertEqual(response["Content-Disposition"], "attachment; filename=result.csv")
+        self.assertEqual(response.content, b"")
+        response = respond_stream_from_local_file(self.file_path, offload="x-sendfile")
+        self.assertEqual(response["X-Sendfile"], self.file_path)
+
+
+class TestRespondFileFromBytes(unittest.TestCase):
+    content = b"a;b;c\n" + b"1;2;3\n" * 10000
+
+    def setUp(self):
+        self.factory = RequestFactory()
+
+    def _get(self, content, file_name, **headers):
+        response = respond_file_from_bytes(content, file_name, request=self.factory.get("/", **headers))
+        body = b"".join(response.streaming_content) if response.streaming else response.content
+        return response, body
+
+    def test_without_request(self):
+        response = respond_file_from_bytes(self.content, "data.csv", content_length=len(self.content))
+        self.assertEqual(response.content, self.content)
+        self.assertEqual(response["Content-Length"], str(len(self.content)))
+        self.assertFalse(response.has_header("ETag"))
+
+    def test_gzip(self):
+        for _ in range(2):  # streamed, then cached
+            response, body = self._get(self.content, "data.csv", HTTP_ACCEPT_ENCODING="deflate, gzip;q=0.8")
+            self.assertEqual(response["Content-Encoding"], "gzip")
+            self.assertEqual(response["Content-Disposition"], "attachment; filename=data.csv")
+            self.assertEqual(gzip.decompress(body), self.content)
+        self.assertEqual(response["Content-Length"], str(len(body)))
+
+    def test_not_compressed(self):
+        for file_name, headers in (
+                ("data.csv", dict(HTTP_ACCEPT_ENCODING="gzip;q=0")),
+                ("data.csv", dict()),
+                ("data.csv.gz", dict(HTTP_ACCEPT_ENCODING="gzip")),  # already encoded
+                ("data.png", dict(HTTP_ACCEPT_ENCODING="gzip"))
+        ):
+            response, body = self._get(self.content, file_name, **headers)
+            self.assertEqual(body, self.content)
+            if not file_name.endswith(".gz"):
+                self.assertFalse(response.has_header("Content-Encoding"))
+
+    def test_etag(self):
+        response, _ = self._get(self.content, "data.csv", HTTP_ACCEPT_ENCODING="gzip")
+        gzip_etag = response["ETag"]
+        response, _ = self._get(self.content, "data.csv")
+        identity_etag = response["ETag"]
+        self.assertNotEqual(gzip_etag, identity_etag)
+
+        response, _ = self._get(self.content, "data.csv", HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=gzip_etag)
+        self.assertEqual(response.status_code, 304)
+        response, _ = self._get(self.content, "data.csv", HTTP_IF_NONE_MATCH="W/" + identity_etag)
+        self.assertEqual(response.status_code, 304)
+        response, body = self._get(self.content + b"4;5;6\n", "data.csv", HTTP_IF_NONE_MATCH=identity_etag)
+        self.assertEqual(response.status_code, 200)
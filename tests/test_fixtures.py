@@ -0,0 +1,114 @@
+import datetime as dt
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+from django.contrib.auth.models import Group
+from django.core.management import call_command
+from django.db import connection, models
+
+from odjango.django.fixtures import load_fixtures, _FixtureLoader
+from odjango.django.db.psycopg2_retries import bulk
+
+
+class FixturePlace(models.Model):
+    name = models.CharField(max_length=20)
+    created = models.DateField(auto_now_add=True)
+    updated = models.DateTimeField(auto_now=True)
+    groups = models.ManyToManyField(Group)
+
+    class Meta:
+        app_label = "testapp"
+
+
+class FixtureRestaurant(FixturePlace):
+    serves_pizza = models.BooleanField(default=False)
+
+    class Meta:
+        app_label = "testapp"
+
+
+MODELS = (FixturePlace, FixtureRestaurant)
+
+
+class TestLoadFixtures(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        call_command("migrate", verbosity=0)
+        with connection.schema_editor() as editor:
+            for model in MODELS:
+                editor.create_model(model)
+
+    @classmethod
+    def tearDownClass(cls):
+        with connection.schema_editor() as editor:
+            for model in reversed(MODELS):
+                editor.delete_model(model)
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        with connection.cursor() as cursor:  # no collector: other tests models relate to Group
+            for table in ("testapp_fixturerestaurant", FixturePlace.groups.through._meta.db_table, "testapp_fixtureplace",
+                          "auth_group"):
+                cursor.execute("DELETE FROM %s" % table)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def write_fixture(self, objects, name="fixture.json"):
+        path = os.path.join(self.dir.name, name)
+        with open(path, "w") as f:
+            json.dump(objects, f)
+        return path
+
+    def test_load(self):
+        path = self.write_fixture([
+            {"model": "auth.group", "pk": 1, "fields": {"name": "g1", "permissions": []}},
+            {"model": "testapp.fixtureplace", "pk": 1, "fields": {
+                "name": "p", "created": "2001-01-01", "updated": "2001-01-02T03:04:05", "groups": [1]}},
+            {"model": "testapp.fixtureplace", "pk": 2, "fields": {
+                "name": "r", "created": "2002-01-01", "updated": "2002-01-02T03:04:05", "groups": []}},
+            {"model": "testapp.fixturerestaurant", "pk": 2, "fields": {"serves_pizza": True}},
+        ])
+        self.assertEqual(load_fixtures([path]), 5)
+
+        place = FixturePlace.objects.get(pk=1)
+        self.assertEqual(place.created, dt.date(2001, 1, 1))  # auto_now_add value of fixture is kept
+        self.assertEqual(place.updated, dt.datetime(2001, 1, 2, 3, 4, 5))
+        self.assertEqual(list(place.groups.values_list("name", flat=True)), ["g1"])
+
+        restaurant = FixtureRestaurant.objects.get()
+        self.assertEqual((restaurant.pk, restaurant.name, restaurant.serves_pizza), (2, "r", True))
+        self.assertEqual(restaurant.created, dt.date(2002, 1, 1))
+
+        # sequences were reset
+        self.assertEqual(FixturePlace.objects.create(name="new").pk, 3)
+
+    def test_ignore_conflicts(self):
+        path = self.write_fixture([{"model": "auth.group", "pk": 1, "fields": {"name": "g1", "permissions": []}}])
+        load_fixtures([path])
+        self.assertEqual(load_fixtures([path], ignore_conflicts=True), 1)
+        self.assertEqual(Group.objects.count(), 1)
+
+    def test_postgresql_bulk_load(self):
+        loader = _FixtureLoader("default", 10, False)
+        loader.connection = mock.MagicMock(vendor="postgresql")
+        with mock.patch.object(bulk, "bulk_load") as bulk_load:
+            loader.add(mock.Mock(object=Group(pk=1, name="g1"), m2m_data=None, deferred_fields=None))
+            loader.finish()
+        (model, rows), kwargs = bulk_load.call_args
+        self.assertEqual((model, list(rows)), (Group, [{"id": 1, "name": "g1"}]))
+        self.assertEqual(kwargs["method"], bulk.METHOD_AUTO)
+
+    def test_psycopg2_not_imported(self):
+        script = "import sys; import odjango.django.fixtures; print('psycopg2' in sys.modules)"
+        output = subprocess.run([sys.executable, "-c", script], check=True, stdout=subprocess.PIPE).stdout
+        self.assertEqual(output.strip(), b"False")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,31 @@
+import json
+import subprocess
+import sys
+import unittest
+
+# generous: cold import of odjango packages is expected to take a few tens of milliseconds
+MAX_IMPORT_SECONDS = 1
+HEAVY_MODULES = ("pandas", "psycopg2", "pytz", "oclients", "coreapi", "rest_framework.schemas",
+                 "django.contrib.contenttypes.models")
+
+SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+import odjango.django, odjango.rest_framework
+duration = time.perf_counter() - start
+print(json.dumps(dict(duration=duration, heavy=[m for m in %r if m in sys.modules])))
+""" % (HEAVY_MODULES, )
+
+
+class TestImportTime(unittest.TestCase):
+    def test_cold_import(self):
+        output = subprocess.run([sys.executable, "-c", SCRIPT], check=True, stdout=subprocess.PIPE).stdout
+        result = json.loads(output)
+        self.assertEqual(result["heavy"], [])
+        self.assertLess(result["duration"], MAX_IMPORT_SECONDS)
+
+    def test_lazy_attributes(self):
+        import odjango.django
+        self.assertIn("reset_db", dir(odjango.django))
+        with self.assertRaises(AttributeError):
+            odjango.django.unknown_attribute
@@ -0,0 +1,45 @@
+import unittest
+
+from odjango.django.db.metrics import Registry
+
+
+class TestRegistry(unittest.TestCase):
+    def test_render_prometheus(self):
+        registry = Registry()
+        counter = registry.counter("odjango_test_total", "Test counter.")
+        histogram = registry.histogram("odjango_test_seconds", "Test histogram.", buckets=(0.1, 1))
+        counter.inc(alias="default", error='Bad "error"\\\n')
+        counter.inc(2, alias="default", error='Bad "error"\\\n')
+        histogram.observe(0.05, alias="default")
+        histogram.observe(0.5, alias="default")
+        histogram.observe(5, alias="default")
+
+        self.assertEqual(registry.render_prometheus(), "\n".join([
+            "# HELP odjango_test_total Test counter.",
+            "# TYPE odjango_test_total counter",
+            'odjango_test_total{alias="default",error="Bad \\"error\\"\\\\\\n"} 3.0',
+            "# HELP odjango_test_seconds Test histogram.",
+            "# TYPE odjango_test_seconds histogram",
+            'odjango_test_seconds_bucket{alias="default",le="0.1"} 1.0',
+            'odjango_test_seconds_bucket{alias="default",le="1"} 2.0',
+            'odjango_test_seconds_bucket{alias="default",le="+Inf"} 3.0',
+            'odjango_test_seconds_count{alias="default"} 3.0',
+            'odjango_test_seconds_sum{alias="default"} 5.55',
+        ]) + "\n")
+
+    def test_export(self):
+        registry = Registry()
+        registry.counter("odjango_test_total", "Test counter.").inc(alias="default")
+        samples = []
+        registry.export(lambda *sample: samples.append(sample))
+        self.assertEqual(samples, [("odjango_test_total", "counter", {"alias": "default"}, 1)])
+
+    def test_register_once(self):
+        registry = Registry()
+        counter = registry.counter("odjango_test_total", "Test counter.")
+        self.assertIs(registry.counter("odjango_test_total", "Test counter."), counter)
+        self.assertIs(registry.get("odjango_test_total"), counter)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+import threading
+import unittest
+
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_INTRANS
+
+from odjango.django.db.psycopg2_retries.base import DatabaseWrapper
+from odjango.django.db.psycopg2_retries.pool import ConnectionPool, PoolTimeoutError
+
+
+class StubConnection:
+    def __init__(self):
+        self.closed = 0
+        self.autocommit = False
+        self.transaction_status = TRANSACTION_STATUS_IDLE
+        self.rollbacks_nb = 0
+
+    def get_transaction_status(self):
+        return self.transaction_status
+
+    def rollback(self):
+        if self.closed:
+            raise Exception("connection closed")
+        self.rollbacks_nb += 1
+        self.transaction_status = TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+class TestConnectionPool(unittest.TestCase):
+    def test_reuse(self):
+        pool = ConnectionPool(max_size=2)
+        connection = pool.acquire(StubConnection)
+        pool.release(connection)
+        self.assertIs(connection, pool.acquire(StubConnection))
+        stats = pool.get_stats()
+        self.assertEqual((1, 1, 1, 0), (stats["hits"], stats["misses"], stats["in_use"], stats["idle"]))
+
+    def test_reset_on_release(self):
+        pool = ConnectionPool()
+        connection = pool.acquire(StubConnection)
+        connection.transaction_status = TRANSACTION_STATUS_INTRANS
+        pool.release(connection)
+        self.assertEqual(1, connection.rollbacks_nb)
+
+    def test_broken_connection_is_replaced(self):
+        pool = ConnectionPool()
+        connection = pool.acquire(StubConnection)
+        connection.closed = 2
+        pool.release(connection)
+        self.assertIsNot(connection, pool.acquire(StubConnection))
+        self.assertEqual(1, pool.get_stats()["closed_broken"])
+
+    def test_max_lifetime_and_idle_timeout(self):
+        pool = ConnectionPool(max_lifetime=0)
+        connection = pool.acquire(StubConnection)
+        pool.release(connection)
+        self.assertTrue(connection.closed)
+
+        pool = ConnectionPool(idle_timeout=0)
+        connection = pool.acquire(StubConnection)
+        pool.release(connection)
+        self.assertIsNot(connection, pool.acquire(StubConnection))
+        self.assertEqual(1, pool.get_stats()["closed_idle"])
+
+    def test_discard(self):
+        pool = ConnectionPool(max_size=1)
+        connection = pool.acquire(StubConnection)
+        pool.discard(connection)
+        self.assertTrue(connection.closed)
+        self.assertEqual((0, 1), (pool.get_stats()["size"], pool.get_stats()["closed_discarded"]))
+        self.assertIsNot(connection, pool.acquire(StubConnection))
+
+    def test_close_in_atomic_block(self):
+        pool = ConnectionPool()
+        wrapper = DatabaseWrapper.__new__(DatabaseWrapper)
+        wrapper.__dict__.update(pool=pool, _failover_alias=None, in_atomic_block=True)
+        wrapper.connection = pool.acquire(StubConnection)
+        wrapper._close()
+        self.assertTrue(wrapper.connection.closed)
+        self.assertEqual(0, pool.get_stats()["idle"])
+
+        wrapper.in_atomic_block = False
+        wrapper.connection = pool.acquire(StubConnection)
+        wrapper._close()
+        self.assertFalse(wrapper.connection.closed)
+        self.assertEqual(1, pool.get_stats()["idle"])
+
+    def test_max_size(self):
+        pool = ConnectionPool(max_size=1, timeout=0.01)
+        connection = pool.acquire(StubConnection)
+        self.assertRaises(PoolTimeoutError, pool.acquire, StubConnection)
+
+        timer = threading.Timer(0.05, pool.release, args=(connection, ))
+        timer.start()
+        pool.timeout = 5
+        self.assertIs(connection, pool.acquire(StubConnection))
+        timer.join()
+
+    def test_factory_failure_frees_slot(self):
+        pool = ConnectionPool(max_size=1, timeout=0.01)
+
+        def failing_factory():
+            raise RuntimeError()
+
+        self.assertRaises(RuntimeError, pool.acquire, failing_factory)
+        pool.acquire(StubConnection)
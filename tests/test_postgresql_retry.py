@@ -0,0 +1,101 @@
+import asyncio
+import unittest
+from unittest import mock
+
+from django.db.utils import OperationalError
+
+from odjango.django import postgresql
+from odjango.django.db.psycopg2_retries import retries
+
+
+class StubConnection:
+    def __init__(self, alias, errors_occurred=False, closed=0):
+        self.alias = alias
+        self.errors_occurred = errors_occurred
+        self.connection = mock.Mock(closed=closed)
+        self.close = mock.Mock()
+
+
+class StubConnections:
+    def __init__(self, *connections):
+        self._connections = {c.alias: c for c in connections}
+
+    def all(self):
+        return list(self._connections.values())
+
+    def __getitem__(self, alias):
+        return self._connections[alias]
+
+
+class TestPostgresqlDatabaseRetry(unittest.TestCase):
+    def setUp(self):
+        retries._retriers.clear()  # process-wide circuit breakers and budgets
+
+    def get_failing(self, failures_nb):
+        calls = []
+
+        async def f(x):
+            calls.append(x)
+            if len(calls) <= failures_nb:
+                raise OperationalError("server closed the connection unexpectedly")
+            return x * 2
+
+        return f, calls
+
+    def test_coroutine_retries_with_asyncio_sleep(self):
+        f, calls = self.get_failing(2)
+        wrapped = postgresql.PostgresqlDatabaseRetry()(f)
+        self.assertTrue(asyncio.iscoroutinefunction(wrapped))
+        with mock.patch.object(postgresql.asyncio, "sleep", new=mock.AsyncMock()) as async_sleep, \
+                mock.patch.object(postgresql.time, "sleep") as sleep, \
+                mock.patch.object(retries.RetryPolicy, "get_delay", return_value=0.5), \
+                mock.patch.object(postgresql, "_close_failed_connections") as close_failed_connections:
+            self.assertEqual(asyncio.run(wrapped(21)), 42)
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(async_sleep.await_count, 2)
+        async_sleep.assert_awaited_with(0.5)
+        sleep.assert_not_called()
+        self.assertEqual(close_failed_connections.call_count, 2)
+
+    def test_coroutine_retries_nb(self):
+        f, calls = self.get_failing(10)
+        wrapped = postgresql.PostgresqlDatabaseRetry(retries_nb=2)(f)
+        with mock.patch.object(postgresql.asyncio, "sleep", new=mock.AsyncMock()), \
+                mock.patch.object(postgresql, "_close_failed_connections"):
+            with self.assertRaises(OperationalError):
+                asyncio.run(wrapped(1))
+        self.assertEqual(len(calls), 3)  # first call + 2 retries
+
+    def test_retries_nb_replaces_max_attempts(self):
+        calls = []
+
+        @postgresql.PostgresqlDatabaseRetry(retries_nb=4)
+        def f():
+            calls.append(None)
+            raise OperationalError("server closed the connection unexpectedly")
+
+        with mock.patch.dict(postgresql.db.connections.databases["default"], OPTIONS=dict(
+                retries=dict(max_attempts=2, base_delay=0))), \
+                mock.patch.object(postgresql, "_close_failed_connections"):
+            self.assertRaises(OperationalError, f)
+        self.assertEqual(len(calls), 5)
+
+    def test_close_failed_connections(self):
+        failed, broken, other = StubConnection("failed", errors_occurred=True), StubConnection("broken", closed=2), \
+            StubConnection("other")
+        with mock.patch.object(postgresql.db, "connections", StubConnections(failed, broken, other)):
+            postgresql._close_failed_connections("other")
+        failed.close.assert_called_once()
+        broken.close.assert_called_once()
+        other.close.assert_not_called()
+
+        # no failed connection found: using alias is closed
+        other, default = StubConnection("other"), StubConnection("default")
+        with mock.patch.object(postgresql.db, "connections", StubConnections(other, default)):
+            postgresql._close_failed_connections("other")
+        other.close.assert_called_once()
+        default.close.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
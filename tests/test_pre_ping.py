@@ -0,0 +1,71 @@
+import time
+import unittest
+from unittest import mock
+
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_UNKNOWN
+
+from odjango.django.db.psycopg2_retries.base import DatabaseWrapper
+
+
+def get_database(pre_ping, idle_seconds=120, alive=True):
+    """
+    database whose connection was not used for idle_seconds, is_usable returns alive
+    """
+    database = DatabaseWrapper(
+        dict(NAME="db", USER="", PASSWORD="", HOST="", PORT="", OPTIONS=dict(pre_ping=pre_ping), CONN_MAX_AGE=0,
+             AUTOCOMMIT=True, TIME_ZONE=None, ATOMIC_REQUESTS=False), alias="pre_ping")
+    database.connection = mock.Mock(closed=0, get_transaction_status=lambda: TRANSACTION_STATUS_IDLE)
+    database._last_used_at = time.monotonic() - idle_seconds
+    database.is_usable = mock.Mock(return_value=alive)
+    database.close = mock.Mock()
+    database.connect = mock.Mock()
+    return database
+
+
+class TestPrePing(unittest.TestCase):
+    def test_dead_idle_connection_replaced(self):
+        database = get_database(dict(idle_seconds=60), alive=False)
+        database._pre_ping()
+        database.is_usable.assert_called_once_with()
+        database.close.assert_called_once_with()
+        database.connect.assert_called_once_with()
+
+    def test_alive_idle_connection_kept(self):
+        database = get_database(dict(idle_seconds=60))
+        database._pre_ping()
+        database.is_usable.assert_called_once_with()
+        database.connect.assert_not_called()
+
+    def test_recently_used_connection_not_checked(self):
+        database = get_database(dict(idle_seconds=60), idle_seconds=10, alive=False)
+        database._pre_ping()
+        database.is_usable.assert_not_called()
+        database.connect.assert_not_called()
+
+    def test_status_method(self):
+        database = get_database(dict(method="status"), alive=False)
+        database._pre_ping()
+        database.is_usable.assert_not_called()
+        database.connect.assert_not_called()
+
+        database = get_database(dict(method="status"))
+        database.connection.get_transaction_status = lambda: TRANSACTION_STATUS_UNKNOWN
+        database._pre_ping()
+        database.connect.assert_called_once_with()
+
+    def test_disabled(self):
+        database = get_database(None, alive=False)
+        database._pre_ping()
+        database.is_usable.assert_not_called()
+        database.connect.assert_not_called()
+
+    def test_not_checked_in_atomic_block(self):
+        database = get_database(dict(idle_seconds=60), alive=False)
+        database.in_atomic_block = True
+        database._pre_ping()  # transaction would be lost anyway
+        database.is_usable.assert_not_called()
+        database.connect.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
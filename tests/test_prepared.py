@@ -0,0 +1,74 @@
+import unittest
+from unittest import mock
+
+from odjango.django.db.psycopg2_retries.prepared import StatementCache, _to_server_placeholders
+
+
+class StubCursor:
+    def __init__(self):
+        self.connection = mock.Mock(autocommit=True, closed=0)
+        self.executed = []
+
+    def execute(self, sql, params=None):
+        self.executed.append(sql if params is None else (sql, params))
+
+
+class TestPlaceholders(unittest.TestCase):
+    def test_to_server_placeholders(self):
+        self.assertEqual(
+            _to_server_placeholders('SELECT "a" FROM "t" WHERE "b" LIKE %s AND "c" = %s AND "d" % 2 = %s'),
+            ('SELECT "a" FROM "t" WHERE "b" LIKE $1 AND "c" = $2 AND "d" % 2 = $3', 3))
+        self.assertEqual(_to_server_placeholders('SELECT 1'), ('SELECT 1', 0))
+
+
+class TestStatementCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = StatementCache("default", size=2, threshold=2)
+        self.cursor = StubCursor()
+
+    def execute(self, sql, params=(1, )):
+        return self.cache.execute(self.cursor, sql, params)
+
+    def test_prepared_after_threshold(self):
+        sql = 'SELECT "a" FROM "t" WHERE "b" = %s'
+        self.assertFalse(self.execute(sql))
+        self.assertTrue(self.execute(sql))
+        self.assertTrue(self.execute(sql, (2, )))
+        name = self.cache._statements[sql]
+        self.assertEqual(self.cursor.executed, [
+            'PREPARE %s AS SELECT "a" FROM "t" WHERE "b" = $1' % name,
+            ("EXECUTE %s (%%s)" % name, (1, )),
+            ("EXECUTE %s (%%s)" % name, (2, ))])
+
+    def test_lru_eviction(self):
+        statements = ['SELECT %%s FROM "t%s"' % i for i in range(3)]
+        for sql in (statements[0], statements[0], statements[1], statements[1]):
+            self.execute(sql)
+        evicted_name = self.cache._statements[statements[1]]
+        self.execute(statements[0])  # most recently used
+        for _ in range(2):
+            self.execute(statements[2])
+        self.assertEqual(list(self.cache._statements), [statements[0], statements[2]])
+        self.assertIn("DEALLOCATE %s" % evicted_name, self.cursor.executed)
+
+    def test_not_prepared(self):
+        for sql, params in (
+                ("SELECT 'a%%' || %s", (1, )),  # string literal
+                ("SELECT $$a$$ || %s", (1, )),  # dollar quoting
+                ('SELECT "a" FROM "t"', None),  # not interpolated by psycopg2
+                ("SET search_path = %s", (1, )),
+        ):
+            with self.subTest(sql):
+                for _ in range(3):
+                    self.assertFalse(self.cache.execute(self.cursor, sql, params))
+        self.assertEqual(self.cursor.executed, [])
+
+    def test_parameters_mismatch(self):
+        sql = 'SELECT "a" FROM "t" WHERE "b" = %s AND "c" = %s'
+        for _ in range(3):
+            self.assertFalse(self.execute(sql))
+        self.assertEqual(self.cursor.executed, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,63 @@
+import datetime as dt
+import io
+import unittest
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from odjango.rest_framework.authentication.purge import (
+    purge_expired_tokens, CREATE_CREATED_INDEX_SQL, DROP_CREATED_INDEX_SQL, CREATED_INDEX_NAME)
+
+
+class TestPurgeExpiredTokens(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        call_command("migrate", verbosity=0)
+
+    def setUp(self):
+        Token.objects.all().delete()
+        now = timezone.now()
+        # 5 expired tokens (created one by one, in the past), 2 valid ones
+        for i in range(7):
+            token = Token.objects.create(user=User.objects.get_or_create(username="purge%s" % i)[0])
+            created = now - dt.timedelta(days=10, seconds=i) if i < 5 else now
+            Token.objects.filter(key=token.key).update(created=created)
+
+    def test_purge_by_chunks(self):
+        with CaptureQueriesContext(connection) as queries:
+            stats = purge_expired_tokens(chunk_size=2)
+        self.assertEqual((stats["deleted"], stats["chunks"], stats["complete"]), (5, 3, True))
+        self.assertEqual(sorted(Token.objects.values_list("user__username", flat=True)), ["purge5", "purge6"])
+        # next chunks start from last created of previous chunk (keyset)
+        selects = [query["sql"] for query in queries.captured_queries if query["sql"].startswith("SELECT")]
+        self.assertNotIn('"created" >=', selects[0])
+        self.assertTrue(all('"created" >=' in sql for sql in selects[1:]))
+
+    def test_max_duration(self):
+        stats = purge_expired_tokens(chunk_size=2, max_duration=0)
+        self.assertEqual((stats["deleted"], stats["chunks"], stats["complete"]), (2, 1, False))
+        self.assertEqual(Token.objects.count(), 5)
+
+    def test_command(self):
+        out = io.StringIO()
+        call_command("purge_expired_tokens", chunk_size=3, stdout=out)
+        self.assertIn("authtoken: 5 expired tokens deleted in 2 chunks", out.getvalue())
+        self.assertEqual(Token.objects.count(), 2)
+
+    def test_created_index_sql(self):
+        with connection.cursor() as cursor:
+            cursor.execute(CREATE_CREATED_INDEX_SQL)
+            cursor.execute(CREATE_CREATED_INDEX_SQL)
+            self.assertIn(
+                CREATED_INDEX_NAME, connection.introspection.get_constraints(cursor, Token._meta.db_table))
+            cursor.execute(DROP_CREATED_INDEX_SQL)
+            self.assertNotIn(
+                CREATED_INDEX_NAME, connection.introspection.get_constraints(cursor, Token._meta.db_table))
+
+
+if __name__ == "__main__":
+    unittest.main()
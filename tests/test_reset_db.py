@@ -0,0 +1,75 @@
+import unittest
+
+from django.contrib.auth.models import Group, User
+from django.core.management import call_command
+from django.db import connection, models
+
+from odjango.django import reset_db
+
+
+# models of an excluded app (contenttypes) referencing reset app (auth)
+class ResetSetNull(models.Model):
+    group = models.ForeignKey(Group, null=True, on_delete=models.SET_NULL)
+
+    class Meta:
+        app_label = "testapp"
+
+
+class ResetCascade(models.Model):
+    group = models.ForeignKey(Group, null=True, on_delete=models.CASCADE)
+
+    class Meta:
+        app_label = "testapp"
+
+
+class ResetProtect(models.Model):
+    user = models.ForeignKey(User, null=True, on_delete=models.PROTECT)
+
+    class Meta:
+        app_label = "testapp"
+
+
+class TestResetDb(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        call_command("migrate", verbosity=0)
+        with connection.schema_editor() as editor:
+            for model in (ResetSetNull, ResetCascade, ResetProtect):
+                if model._meta.db_table not in connection.introspection.table_names():
+                    editor.create_model(model)
+
+    def setUp(self):
+        for model in (ResetSetNull, ResetCascade, ResetProtect):
+            model.objects.all().delete()
+
+    def test_excluded_apps_are_kept(self):
+        group = Group.objects.create(name="g")
+        ResetSetNull.objects.create(group=group)
+        ResetSetNull.objects.create(group=None)
+        ResetCascade.objects.create(group=group)
+        ResetCascade.objects.create(group=None)
+        content_types_nb = connection.cursor().execute("SELECT count(*) FROM django_content_type").fetchone()[0]
+
+        reset_db(apps=["auth"])
+
+        self.assertEqual(Group.objects.count(), 0)
+        self.assertEqual(list(ResetSetNull.objects.values_list("group", flat=True)), [None, None])
+        self.assertEqual(list(ResetCascade.objects.values_list("group", flat=True)), [None])
+        self.assertEqual(
+            connection.cursor().execute("SELECT count(*) FROM django_content_type").fetchone()[0], content_types_nb)
+        # sequences were reset
+        self.assertEqual(Group.objects.create(name="h").pk, 1)
+
+    def test_protected_reference(self):
+        user = User.objects.create(username="u")
+        ResetProtect.objects.create(user=user)
+        with self.assertRaises(ValueError):
+            reset_db(apps=["auth"])
+        self.assertEqual(User.objects.count(), 1)
+        ResetProtect.objects.all().delete()
+        reset_db(apps=["auth"])
+        self.assertEqual(User.objects.count(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,175 @@
+import itertools
+import time
+import unittest
+from unittest import mock
+
+from psycopg2 import OperationalError, ProgrammingError
+
+from odjango.django.db.psycopg2_retries.retries import CircuitBreaker, CircuitOpenError, RetryBudget, Retrier, \
+    RetryPolicy, FailFastError
+
+
+def _fail(error):
+    def f():
+        raise error
+    return f
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_after_threshold(self):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+        breaker.record_failure()
+        self.assertFalse(breaker.before_call())
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertRaises(CircuitOpenError, breaker.before_call)
+
+    def test_probe(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+        breaker.record_failure()
+        time.sleep(0.02)
+        self.assertTrue(breaker.before_call())
+        self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertRaises(CircuitOpenError, breaker.before_call)  # only one probe
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    def test_probe_failure_reopens(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+        breaker.record_failure()
+        time.sleep(0.02)
+        breaker.before_call()
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+    def test_release_probe(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+        breaker.record_failure()
+        time.sleep(0.02)
+        breaker.before_call()
+        breaker.release_probe()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        time.sleep(0.02)
+        self.assertTrue(breaker.before_call())
+
+    def test_lost_probe(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.01)
+        breaker.record_failure()
+        time.sleep(0.02)
+        breaker.before_call()
+        time.sleep(0.02)
+        self.assertTrue(breaker.before_call())
+
+
+class TestRetryBudget(unittest.TestCase):
+    def test_exhaust_and_refill(self):
+        budget = RetryBudget(capacity=2, refill_per_second=100)
+        self.assertTrue(budget.try_acquire())
+        self.assertTrue(budget.try_acquire())
+        self.assertFalse(budget.try_acquire())
+        time.sleep(0.02)
+        self.assertTrue(budget.try_acquire())
+
+    def test_no_refill(self):
+        budget = RetryBudget(capacity=1, refill_per_second=0)
+        self.assertTrue(budget.try_acquire())
+        self.assertFalse(budget.try_acquire())
+
+
+class TestRetrier(unittest.TestCase):
+    def get_retrier(self, **policy):
+        policy = dict(dict(base_delay=0, failure_threshold=100, reset_timeout=0.01), **policy)
+        return Retrier(RetryPolicy(**policy))
+
+    def test_retries_then_succeeds(self):
+        retrier = self.get_retrier()
+        calls = []
+
+        def f():
+            calls.append(None)
+            if len(calls) < 3:
+                raise OperationalError("lost")
+            return "ok"
+
+        recover = mock.Mock()
+        self.assertEqual(retrier.call(f, recover=recover), "ok")
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(recover.call_count, 2)
+
+    def test_max_attempts(self):
+        retrier = self.get_retrier(max_attempts=3)
+        f = mock.Mock(side_effect=OperationalError("lost"))
+        self.assertRaises(OperationalError, retrier.call, f)
+        self.assertEqual(f.call_count, 3)
+
+    def test_deadline(self):
+        retrier = self.get_retrier(deadline=5)
+        with mock.patch.object(RetryPolicy, "get_delay", return_value=1):
+            self.assertEqual(retrier.get_retry_delay(OperationalError("lost"), 1, time.monotonic()), 1)
+            self.assertRaises(
+                OperationalError, retrier.get_retry_delay, OperationalError("lost"), 1, time.monotonic() - 4.5)
+
+    def test_budget(self):
+        retrier = self.get_retrier(retry_budget=2, retry_budget_refill=0)
+        f = mock.Mock(side_effect=OperationalError("lost"))
+        self.assertRaises(OperationalError, retrier.call, f)
+        self.assertEqual(f.call_count, 3)  # first attempt + 2 retries
+
+    def test_fail_fast_not_retried(self):
+        retrier = self.get_retrier()
+        f = mock.Mock(side_effect=FailFastError("pool timeout"))
+        self.assertRaises(FailFastError, retrier.call, f)
+        self.assertEqual(f.call_count, 1)
+
+    def test_deterministic_errors_not_retried(self):
+        retrier = self.get_retrier(retry_budget=1, retry_budget_refill=0)
+        f = mock.Mock(side_effect=ProgrammingError("syntax error"))
+        self.assertRaises(ProgrammingError, retrier.call, f)
+        self.assertRaises(
+            ProgrammingError, retrier.get_retry_delay, ProgrammingError("syntax error"), 0, time.monotonic())
+        self.assertEqual(f.call_count, 1)
+        self.assertTrue(retrier.budget.try_acquire())
+
+    def test_nested_calls_share_deadline(self):
+        retrier = self.get_retrier()
+        starts = []
+
+        def get_retry_delay(error, retry_nb, start):
+            starts.append(start)
+            if len(starts) > 1:
+                raise error
+            return 0
+
+        def recover():
+            # reconnection, retried by the same retrier
+            retrier.call(_fail(OperationalError("lost")))
+
+        with mock.patch.object(retrier, "get_retry_delay", side_effect=get_retry_delay), \
+                mock.patch.object(time, "monotonic", side_effect=itertools.count(100, 100)):
+            self.assertRaises(OperationalError, retrier.call, _fail(OperationalError("lost")), recover=recover)
+        self.assertEqual(starts, [100, 100])
+        self.assertIsNone(retrier._local.start)
+
+    def test_circuit_opens(self):
+        retrier = self.get_retrier(failure_threshold=2, reset_timeout=10)
+        f = mock.Mock(side_effect=OperationalError("lost"))
+        self.assertRaises(OperationalError, retrier.call, f)
+        self.assertEqual(f.call_count, 2)
+        self.assertRaises(CircuitOpenError, retrier.call, f)
+        self.assertEqual(f.call_count, 2)
+
+    def test_unexpected_probe_error(self):
+        retrier = self.get_retrier(failure_threshold=1)
+        self.assertRaises(OperationalError, retrier.call, _fail(OperationalError("lost")))
+        for error in (TypeError("bad params"), FailFastError("pool timeout")):
+            with self.subTest(type(error).__name__):
+                time.sleep(0.02)
+                self.assertRaises(type(error), retrier.call, _fail(error))  # probe
+                self.assertEqual(retrier.circuit_breaker.state, CircuitBreaker.OPEN)
+        time.sleep(0.02)
+        self.assertEqual(retrier.call(lambda: "ok"), "ok")
+        self.assertEqual(retrier.circuit_breaker.state, CircuitBreaker.CLOSED)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,117 @@
+import subprocess
+import sys
+import unittest
+from unittest import mock
+
+from django.db.backends.postgresql.base import DatabaseWrapper as BaseDatabaseWrapper
+from django.test import override_settings
+from psycopg2 import OperationalError
+
+from odjango.django.db.psycopg2_retries import base, routers
+from odjango.django.db.psycopg2_retries.retries import Retrier, RetryPolicy, CircuitBreaker
+
+
+def get_retrier(**policy):
+    return Retrier(RetryPolicy(**dict(dict(base_delay=0, max_attempts=2, failure_threshold=100), **policy)))
+
+
+class TestReplicaRouterPins(unittest.TestCase):
+    def test_local_pins_are_pruned(self):
+        router = routers.ReplicaRouter()
+        now = 1000
+        with mock.patch.object(routers, "_get_pin_seconds", return_value=5), \
+                mock.patch.object(routers.time, "monotonic", side_effect=lambda: now):
+            router._local_pins_pruned_at = now
+            for user_key in range(100):
+                with routers.replica_reads(user_key=user_key):
+                    router.db_for_write(None)
+            self.assertEqual(len(router._local_pins), 100)
+
+            now += 10
+            with routers.replica_reads(user_key="last"):
+                router.db_for_write(None)
+                self.assertTrue(router._is_pinned(routers.get_replica_context()))
+            self.assertEqual(list(router._local_pins), ["last"])
+
+
+class TestReplicaRouter(unittest.TestCase):
+    def setUp(self):
+        self.connections = {"default": mock.Mock(in_atomic_block=False), "replica_1": mock.Mock(retrier=get_retrier()),
+                            "replica_2": mock.Mock(retrier=get_retrier())}
+        patcher = mock.patch.object(routers, "connections", self.connections)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        with override_settings(DATABASE_REPLICAS={"default": ["replica_1", "replica_2"]}):
+            self.router = routers.ReplicaRouter()
+
+    def test_reads_are_balanced(self):
+        self.assertIsNone(self.router.db_for_read(None))  # outside replica reads context
+        with routers.replica_reads():
+            self.assertEqual([self.router.db_for_read(None) for _ in range(3)], ["replica_1", "replica_2", "replica_1"])
+            self.connections["replica_2"].retrier.circuit_breaker.state = CircuitBreaker.OPEN
+            self.assertEqual([self.router.db_for_read(None) for _ in range(2)], ["replica_1", "replica_1"])
+            self.connections["default"].in_atomic_block = True
+            self.assertIsNone(self.router.db_for_read(None))
+
+    def test_reads_pinned_after_write(self):
+        with routers.replica_reads(user_key="writer"):
+            self.assertEqual(self.router.db_for_read(None), "replica_1")
+            self.assertIsNone(self.router.db_for_write(None))
+            self.assertIsNone(self.router.db_for_read(None))
+        # next requests of the user
+        with routers.replica_reads(user_key="writer"):
+            self.assertIsNone(self.router.db_for_read(None))
+        with routers.replica_reads(user_key="reader"):
+            self.assertEqual(self.router.db_for_read(None), "replica_2")
+
+    def test_replica_objects_written_in_primary(self):
+        instance = mock.Mock()
+        instance._state.db = "replica_1"
+        self.assertEqual(self.router.db_for_write(None, instance=instance), "default")
+        self.assertFalse(self.router.allow_migrate("replica_1", "testapp"))
+
+
+class TestReplicaFailover(unittest.TestCase):
+    def get_database(self, options):
+        return base.DatabaseWrapper(
+            dict(NAME="replica", USER="", PASSWORD="", HOST="", PORT="", OPTIONS=options, CONN_MAX_AGE=0,
+                 AUTOCOMMIT=True, TIME_ZONE=None, ATOMIC_REQUESTS=False), alias="replica")
+
+    def connect(self, database, primary_retrier):
+        connected_to = []
+
+        def super_connect(self):
+            if self._failover_alias is None:
+                raise OperationalError("replica unreachable")
+            connected_to.append(self._failover_alias)
+
+        database.__dict__["retrier"] = get_retrier()
+        with mock.patch.object(BaseDatabaseWrapper, "connect", autospec=True, side_effect=super_connect), \
+                mock.patch.object(base, "connections", {"default": mock.Mock(retrier=primary_retrier)}):
+            database.connect()
+        return connected_to
+
+    def test_failover_to_primary(self):
+        database = self.get_database({"primary": "default"})
+        primary_retrier = get_retrier()
+        self.assertEqual(self.connect(database, primary_retrier), ["default"])
+        self.assertEqual(database._failover_alias, "default")
+        self.assertEqual(database.retrier.circuit_breaker._failures_nb, 2)
+        self.assertEqual(primary_retrier.circuit_breaker._failures_nb, 0)
+
+    def test_no_primary(self):
+        database = self.get_database({})
+        self.assertRaises(OperationalError, self.connect, database, get_retrier())
+        self.assertIsNone(database._failover_alias)
+
+
+class TestReplicaContextImport(unittest.TestCase):
+    def test_psycopg2_not_imported(self):
+        script = "import sys; import odjango.django.db.psycopg2_retries.replica_context; " \
+            "print('psycopg2' in sys.modules)"
+        output = subprocess.run([sys.executable, "-c", script], check=True, stdout=subprocess.PIPE).stdout
+        self.assertEqual(output.strip(), b"False")
+
+
+if __name__ == "__main__":
+    unittest.main()
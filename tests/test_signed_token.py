@@ -0,0 +1,97 @@
+import datetime as dt
+import unittest
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import override_settings
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory
+
+from odjango.rest_framework.authentication import signed_token_authentication
+from odjango.rest_framework.authentication.signed_token_authentication import SignedToken
+from odjango.rest_framework.authentication.deny_list import DenyList
+from odjango.rest_framework.authentication.views import (
+    obtain_signed_token, refresh_signed_token, logout_signed_token)
+from odjango.rest_framework_app.models import RevokedSignedToken
+
+
+class TestSignedToken(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        call_command("migrate", verbosity=0)
+
+    def setUp(self):
+        RevokedSignedToken.objects.all().delete()
+        self.user, _ = User.objects.get_or_create(username="signed")
+        self.user.set_password("password")
+        self.user.save()
+        self.factory = APIRequestFactory()
+        # each test starts with an empty deny-list
+        patcher = mock.patch.object(signed_token_authentication, "deny_list", DenyList())
+        self.deny_list = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def obtain(self):
+        response = obtain_signed_token(
+            self.factory.post("/", {"username": "signed", "password": "password"}, format="json"))
+        self.assertEqual(response.status_code, 200)
+        return response.data["token"]
+
+    def logout(self, token=None):
+        headers = {} if token is None else {"HTTP_AUTHORIZATION": "Bearer %s" % token}
+        return logout_signed_token(self.factory.get("/", **headers))
+
+    def test_obtain(self):
+        token = SignedToken(self.obtain())
+        self.assertEqual(token["user_id"], self.user.id)
+        self.assertGreater(token["refresh_exp"], token["exp"])
+
+        response = obtain_signed_token(
+            self.factory.post("/", {"username": "signed", "password": "wrong"}, format="json"))
+        self.assertEqual(response.status_code, 400)
+
+    def test_refresh(self):
+        token = self.obtain()
+        response = refresh_signed_token(self.factory.post("/", {"token": token}, format="json"))
+        self.assertEqual(response.status_code, 200)
+        new_token = SignedToken(response.data["token"])
+        self.assertEqual(new_token["user_id"], self.user.id)
+
+        # refreshed token is revoked, it can't be refreshed again
+        jti = SignedToken(token, verify=False)["jti"]
+        self.assertTrue(RevokedSignedToken.objects.filter(jti=jti).exists())
+        response = refresh_signed_token(self.factory.post("/", {"token": token}, format="json"))
+        self.assertEqual(response.status_code, 403)  # no authenticate header: authentication failure is a 403
+
+    def test_logout_revokes_token(self):
+        token = self.obtain()
+        self.assertEqual(self.logout(token).status_code, 200)
+        self.assertEqual(RevokedSignedToken.objects.count(), 1)
+        self.assertEqual(self.logout(token).status_code, 401)
+
+    def test_logout_requires_authentication(self):
+        self.assertEqual(self.logout().status_code, 401)
+        self.assertEqual(self.logout("invalid").status_code, 401)
+
+    def test_deny_list_refresh(self):
+        token = SignedToken(self.obtain())
+        with override_settings(SIGNED_TOKEN_DENY_LIST_REFRESH_SECONDS=30):
+            self.assertFalse(self.deny_list.is_revoked(token["jti"]))
+
+            # revoked by another process: seen once the deny-list is refreshed
+            RevokedSignedToken.objects.create(jti=token["jti"], expires_at=timezone.now() + dt.timedelta(days=1))
+            self.assertFalse(self.deny_list.is_revoked(token["jti"]))
+            self.deny_list._loaded_at -= 31
+            self.assertTrue(self.deny_list.is_revoked(token["jti"]))
+
+    def test_purge_expired(self):
+        now = timezone.now()
+        RevokedSignedToken.objects.create(jti="expired", expires_at=now - dt.timedelta(days=1))
+        RevokedSignedToken.objects.create(jti="valid", expires_at=now + dt.timedelta(days=1))
+        self.assertEqual(self.deny_list.purge_expired(), 1)
+        self.assertEqual(list(RevokedSignedToken.objects.values_list("jti", flat=True)), ["valid"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+import contextlib
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from django.contrib.auth.models import Group
+from django.core.management import call_command
+from django.db import connection
+
+from odjango.django import snapshots
+
+
+class TestSnapshotKey(unittest.TestCase):
+    def test_key(self):
+        key = snapshots.get_snapshot_key()
+        self.assertEqual(key, snapshots.get_snapshot_key())
+        self.assertNotEqual(key, snapshots.get_snapshot_key(extra="fixtures-v2"))
+
+    def test_edited_migration(self):
+        key = snapshots.get_snapshot_key()
+        get_source = snapshots._get_migration_source
+
+        def get_edited_source(migration):
+            source = get_source(migration)
+            return source + b"\n# edited" if migration.name == "0001_initial" else source
+
+        with mock.patch.object(snapshots, "_get_migration_source", side_effect=get_edited_source):
+            self.assertNotEqual(key, snapshots.get_snapshot_key())
+
+
+class TestSqliteSnapshots(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        call_command("migrate", verbosity=0)
+
+    def setUp(self):
+        with connection.cursor() as cursor:  # no collector: other tests models relate to Group
+            cursor.execute("DELETE FROM auth_group")
+
+    def check_restore_or_snapshot(self):
+        prepare = mock.Mock(side_effect=lambda: Group.objects.get_or_create(name="prepared"))
+        self.assertFalse(snapshots.restore_or_snapshot_db(prepare, key="k1"))
+        self.assertTrue(snapshots.snapshot_exists(key="k1"))
+
+        Group.objects.create(name="modified")
+        self.assertTrue(snapshots.restore_or_snapshot_db(prepare, key="k1"))
+        self.assertEqual(list(Group.objects.values_list("name", flat=True)), ["prepared"])
+        self.assertEqual(prepare.call_count, 1)
+
+        # new key: stale snapshot is dropped
+        self.assertFalse(snapshots.restore_or_snapshot_db(prepare, key="k2"))
+        self.assertFalse(snapshots.snapshot_exists(key="k1"))
+        self.assertTrue(snapshots.snapshot_exists(key="k2"))
+        self.assertFalse(snapshots.restore_db(key="k1"))
+        snapshots.drop_stale_snapshots(key="other")
+        self.assertFalse(snapshots.snapshot_exists(key="k2"))
+
+    def test_in_memory(self):
+        self.check_restore_or_snapshot()
+
+    def test_file(self):
+        with tempfile.TemporaryDirectory() as dir_path:
+            file_path = os.path.join(dir_path, "db.sqlite3")
+            # snapshots are copied from and to current (in memory) connection, named after database file
+            with mock.patch.dict(connection.settings_dict, NAME=file_path):
+                self.check_restore_or_snapshot()
+                Group.objects.create(name="x")
+                snapshots.snapshot_db(key="k3")
+                self.assertTrue(os.path.isfile(file_path + snapshots.SQLITE_SNAPSHOT_SUFFIX + "k3"))
+                snapshots.drop_stale_snapshots(key="other")
+                self.assertEqual(os.listdir(dir_path), [])
+
+
+class StubCursor:
+    def __init__(self, sessions=(), target_exists=True, failing_sql=None):
+        self.sessions = list(sessions)
+        self.target_exists = target_exists
+        self.failing_sql = failing_sql
+        self.executed = []
+
+    def execute(self, sql, params=None):
+        if sql == self.failing_sql:
+            raise Exception("failed")
+        if not sql.startswith("SELECT"):
+            self.executed.append(sql)
+
+    def fetchall(self):
+        return self.sessions
+
+    def fetchone(self):
+        return (1, ) if self.target_exists else None
+
+
+class TestPostgresqlClone(unittest.TestCase):
+    def clone(self, cursor):
+        connection = mock.Mock(pool=None)
+        connection.ops.quote_name = lambda name: '"%s"' % name
+        connection._nodb_cursor = lambda: contextlib.nullcontext(cursor)
+        snapshots._clone_postgresql_database(connection, "db_snap_k", "db")
+        connection.close.assert_called_once_with()
+
+    def test_restore(self):
+        cursor = StubCursor()
+        self.clone(cursor)
+        self.assertEqual(cursor.executed, [
+            'DROP DATABASE IF EXISTS "db_tmp"',
+            'CREATE DATABASE "db_tmp" TEMPLATE "db_snap_k"',
+            'DROP DATABASE IF EXISTS "db_old"',
+            'ALTER DATABASE "db" RENAME TO "db_old"',
+            'ALTER DATABASE "db_tmp" RENAME TO "db"',
+            'DROP DATABASE "db_old"'])
+
+    def test_new_target(self):
+        cursor = StubCursor(target_exists=False)
+        self.clone(cursor)
+        self.assertEqual(cursor.executed[-1], 'ALTER DATABASE "db_tmp" RENAME TO "db"')
+
+    def test_other_sessions(self):
+        cursor = StubCursor(sessions=[("db", 2)])
+        with self.assertRaisesRegex(snapshots.DatabaseInUseError, r"db \(2 sessions\)"):
+            self.clone(cursor)
+        self.assertEqual(cursor.executed, [])
+
+    def test_rename_failure(self):
+        cursor = StubCursor(failing_sql='ALTER DATABASE "db_tmp" RENAME TO "db"')
+        self.assertRaises(Exception, self.clone, cursor)
+        # previous database is put back in place
+        self.assertEqual(cursor.executed[-1], 'ALTER DATABASE "db_old" RENAME TO "db"')
+
+
+if __name__ == "__main__":
+    unittest.main()
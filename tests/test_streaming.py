@@ -0,0 +1,77 @@
+import unittest
+from unittest import mock
+
+from django.db import connection, models
+from django.db.models.query import QuerySet
+from psycopg2 import OperationalError
+
+from odjango.django.db.psycopg2_retries import streaming
+from odjango.django.db.psycopg2_retries.retries import Retrier, RetryPolicy
+
+
+class StreamSample(models.Model):
+    code = models.CharField(max_length=20, unique=True)
+    name = models.CharField(max_length=20)
+
+    class Meta:
+        app_label = "testapp"
+
+
+class TestIterateResumable(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        with connection.schema_editor() as editor:
+            editor.create_model(StreamSample)
+        StreamSample.objects.bulk_create(
+            [StreamSample(code="c%02d" % i, name="n%s" % (i % 3)) for i in range(10)])
+
+    @classmethod
+    def tearDownClass(cls):
+        with connection.schema_editor() as editor:
+            editor.delete_model(StreamSample)
+
+    def setUp(self):
+        # sqlite connection, with psycopg2_retries backend retries
+        self.connection = mock.Mock(in_atomic_block=False, retrier=Retrier(RetryPolicy(base_delay=0)))
+        patcher = mock.patch.object(streaming, "connections", {"default": self.connection})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def iterate_with_failures(self, queryset, failures_after, **kwargs):
+        """
+        iterator of queryset raises OperationalError after having delivered failures_after[i] rows, on call i
+        """
+        iterator = QuerySet.iterator
+        failures_after = list(failures_after)
+
+        def failing_iterator(qs, chunk_size):
+            fail_after = failures_after.pop(0) if len(failures_after) > 0 else None
+            for i, row in enumerate(iterator(qs, chunk_size=chunk_size)):
+                if i == fail_after:
+                    raise OperationalError("lost")
+                yield row
+
+        with mock.patch.object(QuerySet, "iterator", failing_iterator):
+            return list(streaming.iterate_resumable(queryset, chunk_size=2, **kwargs))
+
+    def test_resumes_after_last_row(self):
+        rows = self.iterate_with_failures(StreamSample.objects.all(), [3, 0, 4])
+        self.assertEqual([row.code for row in rows], ["c%02d" % i for i in range(10)])
+        self.assertEqual(self.connection.close.call_count, 3)
+
+    def test_values_list_key(self):
+        rows = self.iterate_with_failures(
+            StreamSample.objects.values_list("code", flat=True), [5], key="code")
+        self.assertEqual(rows, ["c%02d" % i for i in range(10)])
+
+    def test_not_unique_key(self):
+        self.assertRaises(ValueError, streaming.iterate_resumable(StreamSample.objects.all(), key="name").__next__)
+
+    def test_max_attempts(self):
+        self.connection.retrier = Retrier(RetryPolicy(base_delay=0, max_attempts=2))
+        with self.assertRaises(OperationalError):
+            self.iterate_with_failures(StreamSample.objects.all(), [0, 0])
+
+
+if __name__ == "__main__":
+    unittest.main()
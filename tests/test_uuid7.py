@@ -0,0 +1,15 @@
+import unittest
+
+from odjango.django.util import uuid7
+
+
+class TestUUID7(unittest.TestCase):
+    def test_version(self):
+        value = uuid7()
+        self.assertEqual(value.version, 7)
+        self.assertEqual(value.variant, "specified in RFC 4122")
+
+    def test_ordered(self):
+        values = [uuid7() for _ in range(10000)]
+        self.assertEqual(values, sorted(values))
+        self.assertEqual(len(set(values)), len(values))
@@ -0,0 +1,38 @@
+import unittest
+
+from rest_framework.exceptions import ValidationError
+
+from odjango.django.validators import validate_timezone, validate_timezones, validate_freq, \
+    validate_freqs
+
+
+class TestValidators(unittest.TestCase):
+    def test_timezones(self):
+        validate_timezone("Europe/Paris")
+        validate_timezones(["UTC", "Europe/Paris", None, "UTC"], allow_none=True)
+        for timezones in (["UTC", "Europe/Pariss"], ["UTC", None], [["UTC"]]):
+            with self.assertRaises(ValidationError):
+                validate_timezones(timezones)
+        with self.assertRaisesRegex(ValidationError, "Unknown timezone: 'Mars/Olympus'"):
+            validate_timezone("Mars/Olympus")
+
+    def test_freqs(self):
+        validate_freqs(["15min", "1h", "D", "2D", "W-MON", "1h30min", ""], allow_empty=True)
+        for freq in ("2xyz", "xyz", "1.5.h", ""):
+            with self.assertRaisesRegex(ValidationError, "Could not parse freq: '%s'." % freq):
+                validate_freq(freq)
+        with self.assertRaises(ValidationError):
+            validate_freqs(["D", "2xyz"])
+
+    def test_freqs_fast_path_matches_pandas(self):
+        from pandas.tseries.frequencies import to_offset
+        for freq in ("2D\n", "2xyz\n", "123456789D", "99999999999999999999999D"):
+            with self.subTest(freq=freq):
+                try:
+                    to_offset(freq)
+                except ValueError:
+                    self.assertRaises(ValidationError, validate_freq, freq)
+                except OverflowError:
+                    self.assertRaises(OverflowError, validate_freq, freq)
+                else:
+                    validate_freq(freq)
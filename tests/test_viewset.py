@@ -0,0 +1,85 @@
+import unittest
+
+from django.db import models
+from rest_framework import serializers
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from odjango.rest_framework.viewset import MultipleSerializerViewSet, get_deferrable_fields
+
+
+class DeferSample(models.Model):
+    name = models.CharField(max_length=20)
+    description = models.TextField(blank=True)
+    digest = models.BinaryField(blank=True)
+
+    class Meta:
+        app_label = "testapp"
+
+
+class ListSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = DeferSample
+        fields = ("id", "name")
+
+
+class RequestListSerializer(serializers.ModelSerializer):
+    def get_fields(self):
+        fields = super().get_fields()
+        self.context["request"]  # fields depend on request
+        return fields
+
+    class Meta:
+        model = DeferSample
+        fields = ("id", "name")
+
+
+class FullListSerializer(serializers.ModelSerializer):
+    def get_fields(self):
+        fields = super().get_fields()
+        if "full" not in self.context["request"].query_params:
+            del fields["description"]
+        return fields
+
+    class Meta:
+        model = DeferSample
+        fields = ("id", "name", "description")
+
+
+def get_list_view(serializer_class, path="/"):
+    class View(MultipleSerializerViewSet):
+        queryset = DeferSample.objects.all()
+        list_serializer_class = serializer_class
+
+    view = View(action="list", format_kwarg=None)
+    view.request = Request(APIRequestFactory().get(path))
+    return view
+
+
+class TestDeferListLargeFields(unittest.TestCase):
+    def test_defer(self):
+        queryset = get_list_view(ListSerializer).get_queryset()
+        self.assertEqual(queryset.query.deferred_loading, ({"description"}, True))
+
+    def test_serializer_with_request_context(self):
+        queryset = get_list_view(RequestListSerializer).get_queryset()
+        self.assertEqual(queryset.query.deferred_loading, ({"description"}, True))
+
+    def test_fields_depending_on_request(self):
+        # analysis of first request is not reused for requests with other fields
+        queryset = get_list_view(FullListSerializer).get_queryset()
+        self.assertEqual(queryset.query.deferred_loading, ({"description"}, True))
+        queryset = get_list_view(FullListSerializer, path="/?full").get_queryset()
+        self.assertEqual(queryset.query.deferred_loading, (frozenset(), True))
+
+    def test_analysis_error(self):
+        # no context: analysis fails, nothing is deferred
+        class OtherSerializer(RequestListSerializer):
+            pass
+
+        with self.assertLogs("odjango.rest_framework.viewset", "WARNING"):
+            self.assertEqual(get_deferrable_fields(OtherSerializer, DeferSample), ())
+
+
+if __name__ == "__main__":
+    unittest.main()
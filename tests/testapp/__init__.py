@@ -0,0 +1,3 @@
+"""
+App of the models declared by test modules (app_label = "testapp"), tables are created by tests.
+"""